@@ -0,0 +1,949 @@
+# Importing process management packages:
+import subprocess
+import sys
+import os
+import tempfile
+import shutil
+import platform
+
+# Importing data management packages:
+import json
+import statistics
+from datetime import datetime
+
+# Importing profiling packages:
+import tracemalloc
+import time
+import gc
+
+# The script run in a fresh interpreter to time the import of a single module:
+IMPORT_TIMING_SCRIPT = """
+import json, sys, time
+start_time = time.perf_counter()
+import {module}
+import_time = time.perf_counter() - start_time
+heavy_modules = {heavy_modules!r}
+print(json.dumps({{'seconds': import_time,
+    'heavy_modules': [name for name in heavy_modules if name in sys.modules]}}))
+"""
+
+# Object that guards the cold-start import time of the data_api entry points:
+class import_time_benchmark(object):
+    """
+    This object measures the cold-start import time of the data_api entry points
+    and checks that each stays under a latency budget without loading heavy
+    dependencies it does not need. Each measurement imports the module in a
+    fresh interpreter so that nothing is already cached in sys.modules.
+
+    The default entry points are:
+
+    - 'query': data_api.dfs_file_query_api, used to explore the file directory.
+    - 'pipeline': data_api.pipeline_api, used by scheduled (cron) pipeline runs.
+
+    Neither may import mikeio, pandas, numpy, matplotlib, plotly or dash. These
+    are only loaded when a file is actually decoded or a figure is built.
+
+    >>> import_time_benchmark().check()
+
+    Parameters
+    ----------
+    entry_points : dict : default = None
+        A dict of {entry point name: {'module': str, 'max_seconds': float,
+        'forbidden_modules': list}}. By default DEFAULT_ENTRY_POINTS.
+
+    repeats : int : default = 5
+        The number of fresh interpreters each module is imported in. The median
+        import time is compared against the budget.
+    """
+    # The heavy dependencies of the package:
+    HEAVY_MODULES = ['mikeio', 'pandas', 'numpy', 'matplotlib', 'plotly', 'dash']
+
+    DEFAULT_ENTRY_POINTS = {
+        'query': {'module': 'data_api.dfs_file_query_api', 'max_seconds': 0.25,
+            'forbidden_modules': HEAVY_MODULES},
+        'pipeline': {'module': 'data_api.pipeline_api', 'max_seconds': 0.25,
+            'forbidden_modules': HEAVY_MODULES},
+        }
+
+    def __init__(self, entry_points=None, repeats=5):
+
+        # Declaring instance variables:
+        self.entry_points = self.DEFAULT_ENTRY_POINTS if entry_points == None \
+            else entry_points
+        self.repeats = repeats
+
+    # Method that times the import of a module in a fresh interpreter:
+    def measure_import(self, module):
+        '''
+        Method imports a module in a fresh python interpreter and returns the
+        import time and the heavy modules that were loaded by the import.
+
+        Parameters
+        ----------
+        module : str
+            The dotted name of the module.
+
+        Returns
+        -------
+        result_dict : dict
+            A dict of {'seconds': float, 'heavy_modules': list}.
+
+        Raises
+        ------
+        RuntimeError : RuntimeError
+            If the module cannot be imported.
+        '''
+        script = IMPORT_TIMING_SCRIPT.format(module=module,
+            heavy_modules=self.HEAVY_MODULES)
+
+        # Running from the package root so that data_api is importable:
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        completed = subprocess.run([sys.executable, '-c', script],
+            capture_output=True, text=True, cwd=package_root)
+
+        if completed.returncode != 0:
+            raise RuntimeError(f'Could not import {module}: {completed.stderr}')
+
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # Method that measures every entry point:
+    def run(self):
+        '''
+        Method measures the median cold-start import time of every entry point.
+
+        Returns
+        -------
+        results_dict : dict
+            A dict of {entry point name: {'module', 'seconds', 'max_seconds',
+            'heavy_modules', 'forbidden_loaded'}}.
+        '''
+        results_dict = {}
+
+        for name, entry_point in self.entry_points.items():
+
+            measurements = [self.measure_import(entry_point['module'])
+                for i in range(self.repeats)]
+
+            heavy_modules = measurements[-1]['heavy_modules']
+
+            results_dict[name] = {
+                'module': entry_point['module'],
+                'seconds': statistics.median([result['seconds'] for result in measurements]),
+                'max_seconds': entry_point['max_seconds'],
+                'heavy_modules': heavy_modules,
+                'forbidden_loaded': [module for module in heavy_modules
+                    if module in entry_point.get('forbidden_modules', [])]
+                }
+
+        return results_dict
+
+    # Method that checks every entry point against its budget:
+    def check(self):
+        '''
+        Method measures every entry point and raises if any exceeds its import
+        time budget or loads a forbidden module.
+
+        Returns
+        -------
+        results_dict : dict
+            The results of run().
+
+        Raises
+        ------
+        AssertionError : AssertionError
+            If an entry point is over budget or loads a forbidden module.
+        '''
+        results_dict = self.run()
+
+        failures = []
+
+        for name, result in results_dict.items():
+
+            print(f"[IMPORT TIME]: {name} ({result['module']}) "
+                f"{result['seconds'] * 1000:.1f}ms, heavy modules: {result['heavy_modules']}")
+
+            if result['seconds'] > result['max_seconds']:
+                failures.append(f"{name} took {result['seconds']:.3f}s "
+                    f"(budget {result['max_seconds']}s)")
+
+            if result['forbidden_loaded']:
+                failures.append(f"{name} loaded {result['forbidden_loaded']}")
+
+        if failures:
+            raise AssertionError('Import time regression: ' + '; '.join(failures))
+
+        return results_dict
+
+
+# Object that measures the memory allocated by data extraction and rendering calls:
+class allocation_benchmark(object):
+    """
+    This object measures the memory allocated by a set of calls, e.g. the data
+    extraction paths of the dfsu_ingestion_engine or a dashboard render, with
+    tracemalloc. It is used to compare extraction paths before and after a
+    change.
+
+    For every call it records the bytes and the number of memory blocks still
+    held once the call has returned (the memory of the result), the peak bytes
+    traced during the call and the wall time of the call. The wall time is
+    measured on a separate call made without tracing.
+
+    >>> benchmark = allocation_benchmark()
+    >>> benchmark.compare(benchmark.build_extraction_cases(engine, element_index))
+
+    Parameters
+    ----------
+    repeats : int : default = 5
+        The number of times each call is measured. The median of each
+        measurement is reported.
+    """
+    # The categories extracted by a dashboard render:
+    RENDER_CATEGORIES = ['Current speed', 'Temperature', 'Density', 'Salinity',
+        'Current direction (degrees)']
+
+    def __init__(self, repeats=5):
+
+        # Declaring instance variables:
+        self.repeats = repeats
+
+    # Method that measures the memory allocated by a single call:
+    def measure(self, function, *args, **kwargs):
+        '''
+        Method calls a function repeatedly with tracemalloc tracing and returns
+        the median allocation measurements of the calls.
+
+        Parameters
+        ----------
+        function : callable
+            The function that is measured.
+
+        *args, **kwargs : arguments
+            The arguments of the function.
+
+        Returns
+        -------
+        result_dict : dict
+            A dict of {'retained_bytes', 'retained_blocks', 'peak_bytes', 'seconds'}.
+        '''
+        measurements = []
+
+        for i in range(self.repeats):
+
+            # Timing an untraced call, as tracing slows every allocation down:
+            gc.collect()
+
+            start_time = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start_time
+
+            del result
+
+            gc.collect()
+            tracemalloc.start()
+
+            result = function(*args, **kwargs)
+
+            # Measuring while the result is still referenced:
+            (retained_bytes, peak_bytes) = tracemalloc.get_traced_memory()
+            retained_blocks = sum(stat.count for stat in
+                tracemalloc.take_snapshot().statistics('filename'))
+
+            tracemalloc.stop()
+            del result
+
+            measurements.append({'retained_bytes': retained_bytes,
+                'retained_blocks': retained_blocks, 'peak_bytes': peak_bytes,
+                'seconds': seconds})
+
+        return {key: statistics.median([measurement[key] for measurement in measurements])
+            for key in measurements[0]}
+
+    # Method that measures and reports several calls:
+    def compare(self, cases):
+        '''
+        Method measures every case and prints a line per case.
+
+        Parameters
+        ----------
+        cases : dict
+            A dict of {case name: callable without arguments}.
+
+        Returns
+        -------
+        results_dict : dict
+            A dict of {case name: result of measure()}.
+        '''
+        results_dict = {}
+
+        for name, function in cases.items():
+
+            result = self.measure(function)
+            results_dict[name] = result
+
+            print(f"[ALLOCATIONS]: {name} retained {result['retained_bytes']} bytes "
+                f"in {result['retained_blocks']} blocks, peak {result['peak_bytes']} "
+                f"bytes, {result['seconds'] * 1000:.2f}ms")
+
+        return results_dict
+
+    # Method that builds the extraction cases of a dashboard render:
+    def build_extraction_cases(self, engine, element_index, cat_names=None):
+        '''
+        Method builds the cases that extract the data of a dashboard render from
+        an engine: a dataframe per category via extract_data(), one dataframe via
+        extract_snapshot() and views via extract_view(). If the engine is a
+        dashboard the full figure build is added as the 'render' case.
+
+        Parameters
+        ----------
+        engine : dfsu_ingestion_engine
+            The engine (or dashboard) the data is extracted from.
+
+        element_index : int
+            The index of the element that is extracted.
+
+        cat_names : list : default = None
+            The data categories that are extracted. By default RENDER_CATEGORIES.
+
+        Returns
+        -------
+        cases : dict
+            A dict of {case name: callable without arguments} for compare().
+        '''
+        if cat_names == None:
+            cat_names = self.RENDER_CATEGORIES
+
+        cases = {
+            'extract_data': lambda: [engine.extract_data(cat_name, element_index)
+                for cat_name in cat_names],
+            'extract_snapshot': lambda: engine.extract_snapshot(cat_names, element_index),
+            'extract_view': lambda: engine.extract_view(cat_names, element_index),
+            }
+
+        if hasattr(engine, 'build_node_figure'):
+            (long, lat, depth) = engine.element_coordinates[element_index]
+            cases['render'] = lambda: engine.build_node_figure(long, lat, depth,
+                element_index)
+
+        return cases
+
+
+# Object that compares the payload size and encode time of figure serializations:
+class serialization_benchmark(object):
+    """
+    This object compares the text serialization of dashboard figures
+    (plotly.io.to_json) against the binary typed array serialization of the
+    figure_serializer: the payload size and the time to encode and decode it.
+
+    >>> serialization_benchmark().compare(dashboard_obj.plot_node_data(long, lat, depth))
+
+    Parameters
+    ----------
+    repeats : int : default = 5
+        The number of times each payload is encoded and decoded. The median time
+        is reported.
+    """
+    def __init__(self, repeats=5):
+
+        # Declaring instance variables:
+        self.repeats = repeats
+
+    # Method that measures a single serializer:
+    def measure(self, serializer, fig):
+        '''
+        Method encodes and decodes a figure with a serializer.
+
+        Parameters
+        ----------
+        serializer : figure_serializer
+            The serializer.
+
+        fig : plotly figure object
+            The figure.
+
+        Returns
+        -------
+        result_dict : dict
+            A dict of {'bytes', 'encode_s', 'decode_s'}.
+        '''
+        encode_times = []
+        decode_times = []
+
+        for i in range(self.repeats):
+
+            start_time = time.perf_counter()
+            payload = serializer.to_json(fig)
+            encode_times.append(time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            serializer.from_json(payload)
+            decode_times.append(time.perf_counter() - start_time)
+
+        return {'bytes': len(payload.encode('utf-8')),
+            'encode_s': statistics.median(encode_times),
+            'decode_s': statistics.median(decode_times)}
+
+    # Method that compares the text and binary serializations of a figure:
+    def compare(self, fig):
+        '''
+        Method measures the text and binary serializations of a figure and prints
+        a line per serialization.
+
+        Parameters
+        ----------
+        fig : plotly figure object
+            The figure, e.g. from dashboard.plot_node_data().
+
+        Returns
+        -------
+        results_dict : dict
+            A dict of {'text': result of measure(), 'binary': result of measure()}.
+        '''
+        # Importing the visualization api (and with it plotly) only when used:
+        from data_api.dfs_visualization_api import figure_serializer
+
+        results_dict = {}
+
+        for name, binary in [('text', False), ('binary', True)]:
+
+            result = self.measure(figure_serializer(binary=binary), fig)
+            results_dict[name] = result
+
+            print(f"[SERIALIZATION]: {name} {result['bytes']} bytes, encode "
+                f"{result['encode_s'] * 1000:.2f}ms, decode {result['decode_s'] * 1000:.2f}ms")
+
+        return results_dict
+
+
+# Object that guards the query, ingestion, pipeline and visualization paths against
+# performance regressions:
+class performance_regression_suite(object):
+    """
+    This object runs the key operations of the file_query_api, the ingestion
+    engines, the dfs0_pipeline and the dashboard on deterministic synthetic
+    fixtures and checks the wall time, peak traced memory and retained memory
+    blocks of each (see allocation_benchmark.measure) against a stored baseline.
+
+    The synthetic fixtures are a CDL style file directory of empty dfs0 and dfsu
+    files, a seeded dfs0 forecast file written via mikeio, seeded forecast
+    dataframes, series and figures. Synthetic dfsu files cannot be written
+    without a mesh, so the dfsu ingestion and dashboard cases only run when
+    dfsu_path is given.
+
+    A case fails when a metric exceeds its baseline by more than the relative
+    threshold of the metric and by more than the metric's NOISE_FLOORS, which
+    keeps very fast cases from failing on timer noise. Cases without a baseline
+    are recorded and never fail. Every run is appended to the results file as a
+    line of JSON for trend tracking.
+
+    The suite is also a pytest plugin that adds a test item per case, without
+    any test files. Run it with --perf-update-baseline to write the baseline:
+
+        pytest -p data_api.dfs_benchmark_api --perf-update-baseline
+        pytest -p data_api.dfs_benchmark_api --perf-baseline perf_baseline.json
+
+    Or without pytest:
+
+    >>> performance_regression_suite('perf_baseline.json').check()
+
+    Parameters
+    ----------
+    baseline_path : str : default = None
+        The path of the JSON baseline. If None no case can fail.
+
+    results_path : str : default = None
+        The path of the JSON lines file every run is appended to. If None the
+        results are not written.
+
+    thresholds : dict : default = None
+        A dict of {metric: relative threshold}, e.g. {'seconds': 0.5} fails a
+        case that is 50% slower than its baseline. Metrics that are not given
+        use DEFAULT_THRESHOLDS.
+
+    repeats : int : default = 5
+        The number of times each case is measured. The median is compared.
+
+    dfsu_path : str : default = None
+        The path of a .dfsu file for the dfsu ingestion and dashboard cases.
+
+    seed : int : default = 0
+        The seed of the synthetic fixtures.
+    """
+    # The relative threshold of every checked metric:
+    DEFAULT_THRESHOLDS = {'seconds': 0.5, 'peak_bytes': 0.25, 'retained_blocks': 0.25}
+
+    # The absolute increase over the baseline below which a metric never fails:
+    NOISE_FLOORS = {'seconds': 0.002, 'peak_bytes': 64 * 1024, 'retained_blocks': 64}
+
+    # The size of the synthetic fixtures:
+    FIXTURE_CLIENTS = ['client_a', 'client_b', 'client_c']
+    FIXTURE_RUNS = 60
+    FIXTURE_FORECAST_FILES = 7
+    FIXTURE_FORECAST_STEPS = 24 * 7 * 2
+    FIXTURE_SERIES_LENGTH = 200000
+
+    def __init__(self, baseline_path=None, results_path=None, thresholds=None, repeats=5,
+        dfsu_path=None, seed=0):
+
+        # Declaring instance variables:
+        self.baseline_path = baseline_path
+        self.results_path = results_path
+        self.thresholds = dict(self.DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.dfsu_path = dfsu_path
+        self.seed = seed
+
+        self.allocation_benchmark = allocation_benchmark(repeats)
+        self.baseline = self.load_baseline()
+
+        # The results of the cases run so far and the fixture directory:
+        self.results_dict = {}
+        self.fixture_dir = None
+
+    # Method that reads the baseline:
+    def load_baseline(self):
+        '''
+        Method reads the per case results of the baseline file.
+
+        Returns
+        -------
+        baseline : dict
+            A dict of {case name: metrics}. Empty if there is no baseline file.
+        '''
+        if self.baseline_path == None or not os.path.exists(self.baseline_path):
+            return {}
+
+        with open(self.baseline_path, 'r') as baseline_file:
+            return json.load(baseline_file)['results']
+
+    # Method that builds the record of a run written to the baseline and results:
+    def build_record(self, results_dict):
+        '''
+        Method wraps the results of a run with the time and environment of the run.
+        '''
+        return {'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'repeats': self.allocation_benchmark.repeats, 'results': results_dict}
+
+    # Method that writes the results of the run as the new baseline:
+    def save_baseline(self, results_dict=None):
+        '''
+        Method writes the results of the run to the baseline file.
+
+        Parameters
+        ----------
+        results_dict : dict : default = None
+            The results to write. By default the results of the cases run so far.
+        '''
+        results_dict = self.results_dict if results_dict == None else results_dict
+
+        with open(self.baseline_path, 'w') as baseline_file:
+            json.dump(self.build_record(results_dict), baseline_file, indent=2)
+
+        self.baseline = dict(results_dict)
+
+        print(f'[PERFORMANCE BASELINE WRITTEN]: {self.baseline_path}')
+
+    # Method that appends the results of the run to the results file:
+    def save_results(self, results_dict=None):
+        '''
+        Method appends the results of the run to the results file as a single
+        line of JSON.
+
+        Parameters
+        ----------
+        results_dict : dict : default = None
+            The results to write. By default the results of the cases run so far.
+        '''
+        results_dict = self.results_dict if results_dict == None else results_dict
+
+        if self.results_path == None or not results_dict:
+            return
+
+        with open(self.results_path, 'a') as results_file:
+            results_file.write(json.dumps(self.build_record(results_dict)) + '\n')
+
+    # Method that writes the synthetic file directory fixture:
+    def build_directory_fixture(self, root_dir):
+        '''
+        Method writes a CDL style file directory of empty files: a yyyymmddhh
+        folder per run with a TimeSeries sub-folder that holds a dfsu file and
+        the F-value dfs0 forecast files of every client.
+
+        Parameters
+        ----------
+        root_dir : str
+            The root directory of the fixture.
+        '''
+        first_run = datetime(2021, 1, 1)
+
+        for run in range(self.FIXTURE_RUNS):
+
+            run_date = first_run.replace(day=1 + run % 28, hour=12 * (run // 28 % 2),
+                month=1 + run // 56)
+            timeseries_dir = os.path.join(root_dir, run_date.strftime('%Y%m%d%H'),
+                'TimeSeries')
+
+            os.makedirs(timeseries_dir, exist_ok=True)
+
+            for client_name in self.FIXTURE_CLIENTS:
+
+                file_names = [f'TT_HD_{client_name}.dfsu'] + [
+                    f'TT_HD_{client_name}_F{f_value:03d}.dfs0' for f_value in range(1, 4)]
+
+                for file_name in file_names:
+                    open(os.path.join(timeseries_dir, file_name), 'w').close()
+
+    # Method that writes the synthetic dfs0 fixture:
+    def build_dfs0_fixture(self, filepath):
+        '''
+        Method writes a dfs0 file of FIXTURE_FORECAST_STEPS seeded hourly values
+        of the forecast items via mikeio, to be decoded by the
+        dfs0_ingestion_engine.
+
+        Parameters
+        ----------
+        filepath : str
+            The path of the dfs0 file.
+        '''
+        import numpy as np
+        from mikeio import Dfs0
+        from mikeio.eum import ItemInfo, EUMType
+
+        rng = np.random.default_rng(self.seed)
+
+        items = [ItemInfo('Current speed', EUMType.Current_Speed),
+            ItemInfo('Current direction', EUMType.Current_Direction),
+            ItemInfo('Temperature', EUMType.Temperature),
+            ItemInfo('Salinity', EUMType.Salinity)]
+
+        data = [rng.random(self.FIXTURE_FORECAST_STEPS).astype(np.float32)
+            for item in items]
+
+        Dfs0().write(filename=filepath, data=data, start_time=datetime(2021, 1, 1),
+            dt=3600, items=items, title='dfs performance fixture')
+
+    # Method that builds the synthetic forecast dataframes:
+    def build_forecast_fixture(self):
+        '''
+        Method builds the seeded hourly dataframes of a seven day forecast as they
+        are decoded from the dfs0 files, each overlapping the next by a day.
+
+        Returns
+        -------
+        forecast_df_lst : list
+            A dataframe per forecast file, oldest first.
+        '''
+        import numpy as np
+        import pandas as pd
+
+        rng = np.random.default_rng(self.seed)
+        columns = ['Current speed', 'Current direction', 'Temperature', 'Salinity']
+
+        return [pd.DataFrame(rng.random((self.FIXTURE_FORECAST_STEPS, len(columns))),
+            index=pd.date_range('2021-01-01', periods=self.FIXTURE_FORECAST_STEPS,
+            freq='h') + pd.Timedelta(days=day), columns=columns)
+            for day in range(self.FIXTURE_FORECAST_FILES)]
+
+    # Method that builds the cases of the synthetic fixtures:
+    def build_cases(self):
+        '''
+        Method writes the synthetic fixtures to a temporary directory and builds
+        the measured cases. The setup of each case is done here so that only the
+        operation itself is measured.
+
+        Returns
+        -------
+        cases : dict
+            A dict of {case name: callable without arguments}.
+        '''
+        import numpy as np
+        import plotly.graph_objects as go
+        from data_api.dfs_file_query_api import file_query_api
+        from data_api.dfs_ingestion_api import dfs0_ingestion_engine
+        from data_api.pipeline_api import dfs0_pipeline
+        from data_api.dfs_rollup_api import temporal_rollup
+        from data_api.dfs_visualization_api import trace_downsampler, rose_binner, \
+            figure_serializer
+
+        self.fixture_dir = tempfile.mkdtemp(prefix='dfs_performance_')
+        root_dir = os.path.join(self.fixture_dir, 'Results')
+
+        self.build_directory_fixture(root_dir)
+
+        dfs0_path = os.path.join(self.fixture_dir, 'TT_HD_fixture.dfs0')
+        self.build_dfs0_fixture(dfs0_path)
+
+        client_name = self.FIXTURE_CLIENTS[0]
+        cached_query = file_query_api(root_dir)
+        cached_query.get_client_data_paths(client_name, file_type='.dfs0')
+
+        pipeline = dfs0_pipeline(client_name, root_dir)
+        forecast_paths = [f'forecast_{day}.dfs0' for day in range(self.FIXTURE_FORECAST_FILES)]
+        forecast_df_lst = self.build_forecast_fixture()
+        forecast_df = pipeline.concat_forecast_data(forecast_paths, forecast_df_lst)
+
+        rng = np.random.default_rng(self.seed)
+        series_time = np.arange('2021-01-01', self.FIXTURE_SERIES_LENGTH,
+            dtype='datetime64[m]')
+        speed = rng.random(self.FIXTURE_SERIES_LENGTH) * 2
+        direction = rng.random(self.FIXTURE_SERIES_LENGTH) * 360
+
+        fig = go.Figure(go.Scatter(x=series_time[:20000], y=speed[:20000]))
+
+        downsampler = trace_downsampler(2000)
+        binner = rose_binner(direction_units='degrees')
+        serializer = figure_serializer()
+
+        cases = {
+            'file_query_paths': lambda: file_query_api(root_dir, cache=False
+                ).get_client_data_paths(client_name, file_type='.dfs0'),
+            'file_query_paths_cached': lambda: cached_query.get_client_data_paths(
+                client_name, file_type='.dfs0'),
+            'ingestion_dfs0_decode': lambda: dfs0_ingestion_engine(dfs0_path).main_df,
+            'pipeline_concat': lambda: pipeline.concat_forecast_data(forecast_paths,
+                forecast_df_lst),
+            'pipeline_rollup': lambda: temporal_rollup().update_dataframe(forecast_df),
+            'visualization_downsample': lambda: downsampler.downsample(series_time, speed),
+            'visualization_rose': lambda: binner.bin(speed, direction),
+            'visualization_serialize': lambda: serializer.to_json(fig),
+            }
+
+        if self.dfsu_path != None:
+            cases.update(self.build_dfsu_cases())
+
+        return cases
+
+    # Method that builds the cases of the dfsu file:
+    def build_dfsu_cases(self):
+        '''
+        Method builds the dfsu ingestion and dashboard cases on the element in the
+        middle of the mesh of self.dfsu_path.
+
+        Returns
+        -------
+        cases : dict
+            A dict of {case name: callable without arguments}.
+        '''
+        from data_api.dfs_ingestion_api import dfsu_ingestion_engine
+        from data_api.dfs_visualization_api import dashboard
+
+        dashboard_obj = dashboard(self.dfsu_path, None)
+
+        element_index = dashboard_obj.n_elements // 2
+        (long, lat, depth) = dashboard_obj.element_coordinates[element_index]
+        cat_names = allocation_benchmark.RENDER_CATEGORIES
+
+        def derive_variable():
+            dfsu_ingestion_engine.clear_derived_cache()
+            return dashboard_obj.get_variable_array('Current direction (degrees)')
+
+        return {
+            'ingestion_load': lambda: dfsu_ingestion_engine(self.dfsu_path),
+            'ingestion_extract_view': lambda: dashboard_obj.extract_view(cat_names,
+                element_index),
+            'ingestion_derived_variable': derive_variable,
+            'dashboard_node_figure': lambda: dashboard_obj.build_node_figure(long, lat,
+                depth, element_index),
+            }
+
+    # Method that removes the synthetic fixtures:
+    def cleanup(self):
+        if self.fixture_dir != None:
+            shutil.rmtree(self.fixture_dir, ignore_errors=True)
+            self.fixture_dir = None
+
+    # Method that compares the metrics of a case with its baseline:
+    def compare_case(self, name, result):
+        '''
+        Method compares the metrics of a case with the baseline of the case.
+
+        Parameters
+        ----------
+        name : str
+            The case name.
+
+        result : dict
+            The metrics of the case, see allocation_benchmark.measure().
+
+        Returns
+        -------
+        failures : list
+            A message per metric over its threshold. Empty if the case has no
+            baseline.
+        '''
+        failures = []
+
+        for metric, threshold in self.thresholds.items():
+
+            if name not in self.baseline or metric not in self.baseline[name]:
+                continue
+
+            baseline_value = self.baseline[name][metric]
+
+            if result[metric] > baseline_value * (1 + threshold) and \
+                result[metric] - baseline_value > self.NOISE_FLOORS.get(metric, 0):
+
+                failures.append(f'{name} {metric} {result[metric]:.6g} exceeds baseline '
+                    f'{baseline_value:.6g} by more than {threshold:.0%}')
+
+        return failures
+
+    # Method that measures a single case:
+    def run_case(self, name, function):
+        '''
+        Method measures a case and records its metrics.
+
+        Parameters
+        ----------
+        name : str
+            The case name.
+
+        function : callable
+            The operation of the case.
+
+        Returns
+        -------
+        failures : list
+            The failures of compare_case().
+        '''
+        result = self.allocation_benchmark.measure(function)
+        self.results_dict[name] = result
+
+        print(f"[PERFORMANCE]: {name} {result['seconds'] * 1000:.2f}ms, peak "
+            f"{result['peak_bytes']} bytes, {result['retained_blocks']} blocks retained")
+
+        return self.compare_case(name, result)
+
+    # Method that measures every case:
+    def run(self):
+        '''
+        Method builds the fixtures, measures every case and appends the results to
+        the results file.
+
+        Returns
+        -------
+        failures : list
+            The failures of every case.
+        '''
+        failures = []
+
+        try:
+            for name, function in self.build_cases().items():
+                failures.extend(self.run_case(name, function))
+
+        finally:
+            self.cleanup()
+
+        self.save_results()
+
+        return failures
+
+    # Method that checks every case against the baseline:
+    def check(self):
+        '''
+        Method measures every case and raises if any case regressed.
+
+        Returns
+        -------
+        results_dict : dict
+            A dict of {case name: metrics}.
+
+        Raises
+        ------
+        AssertionError : AssertionError
+            If a metric of a case exceeds its threshold over the baseline.
+        '''
+        failures = self.run()
+
+        if failures:
+            raise AssertionError('Performance regression: ' + '; '.join(failures))
+
+        return self.results_dict
+
+    # Method that builds a pytest item per case:
+    def build_pytest_items(self, session):
+        '''
+        Method builds a pytest item per case of the suite, collected under the
+        session.
+
+        Parameters
+        ----------
+        session : pytest Session
+            The pytest session.
+
+        Returns
+        -------
+        items : list
+            A performance_case_item per case.
+        '''
+        import pytest
+
+        # pytest item that measures a single case of the suite:
+        class performance_case_item(pytest.Item):
+
+            def __init__(self, *, suite, function, **kwargs):
+                super().__init__(**kwargs)
+                self.suite = suite
+                self.function = function
+
+            def runtest(self):
+                failures = self.suite.run_case(self.name, self.function)
+
+                if failures and not self.config.getoption('perf_update_baseline'):
+                    raise AssertionError('Performance regression: ' + '; '.join(failures))
+
+            def reportinfo(self):
+                return (self.path, None, f'performance case: {self.name}')
+
+        return [performance_case_item.from_parent(session, name=name, suite=self,
+            function=function) for name, function in self.build_cases().items()]
+
+
+# <-------------------------------pytest Plugin Hooks-------------------------->
+
+# Hook that adds the options of the performance suite:
+def pytest_addoption(parser):
+    group = parser.getgroup('dfs_performance', 'dfs performance regression suite')
+
+    group.addoption('--perf-baseline', default='perf_baseline.json',
+        help='Path of the JSON baseline of the performance suite.')
+    group.addoption('--perf-results', default='perf_results.jsonl',
+        help='Path of the JSON lines file every run is appended to.')
+    group.addoption('--perf-threshold', type=float, default=None,
+        help='Relative threshold applied to every metric, e.g. 0.3 for 30%%.')
+    group.addoption('--perf-repeats', type=int, default=5,
+        help='Number of times each case is measured.')
+    group.addoption('--perf-dfsu', default=os.environ.get('DFS_PERF_DFSU'),
+        help='Path of a .dfsu file for the dfsu ingestion and dashboard cases.')
+    group.addoption('--perf-update-baseline', action='store_true', default=False,
+        help='Write the results of the run as the new baseline.')
+
+# Hook that builds the suite of the session:
+def pytest_configure(config):
+    threshold = config.getoption('perf_threshold')
+
+    config.performance_suite = performance_regression_suite(
+        baseline_path=config.getoption('perf_baseline'),
+        results_path=config.getoption('perf_results'),
+        thresholds=None if threshold == None else
+            dict.fromkeys(performance_regression_suite.DEFAULT_THRESHOLDS, threshold),
+        repeats=config.getoption('perf_repeats'),
+        dfsu_path=config.getoption('perf_dfsu'))
+
+# Hook that adds the cases of the suite to the collected items:
+def pytest_collection_modifyitems(session, config, items):
+    items.extend(config.performance_suite.build_pytest_items(session))
+
+# Hook that writes the results (and baseline) once every case has run:
+def pytest_sessionfinish(session, exitstatus):
+    suite = getattr(session.config, 'performance_suite', None)
+
+    if suite == None:
+        return
+
+    suite.cleanup()
+    suite.save_results()
+
+    if session.config.getoption('perf_update_baseline') and suite.results_dict:
+        suite.save_baseline()
@@ -0,0 +1,599 @@
+# Importing mikeio package from DHI repo: https://github.com/DHI/mikeio.git
+import mikeio
+# Importing data management packages:
+import numpy as np
+import pandas as pd
+# Importing the dfs apis used to find and align the run history:
+from data_api.dfs_file_query_api import file_query_api
+from data_api.dfs_ingestion_api import DFSU_ITEM_MAP
+# Importing file and process management packages:
+import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+# The default (min, max) value range of the histogram of each data category. Values
+# outside of the range are counted in the first or last bin:
+DEFAULT_VALUE_RANGES = {'Salinity': (0, 40), 'Temperature': (-2, 35),
+    'Density': (995, 1035), 'Current direction': (0, 2 * np.pi),
+    'Current speed': (0, 3), 'W velocity': (-0.1, 0.1), 'U velocity': (-3, 3)}
+
+# Object that holds mergeable monthly running statistics of every element:
+class running_statistics(object):
+    """
+    This object holds the running statistics of a single data category for each
+    calendar month and element: the count, mean, sum of squared deviations (M2),
+    min, max and a fixed bin histogram used as a quantile sketch. Statistics are
+    updated chunk by chunk and two sets of statistics of the same elements can
+    be merged in any order (Chan et al. parallel variance), which allows the
+    statistics of every run to be reduced separately and merged.
+
+    Parameters
+    ----------
+    n_elements : int
+        The number of elements.
+
+    bin_edges : array-like
+        The edges of the histogram bins.
+    """
+    # The names of the statistic arrays, used to save and load the statistics:
+    ARRAY_NAMES = ['count', 'mean', 'm2', 'min', 'max', 'histogram']
+
+    def __init__(self, n_elements, bin_edges):
+
+        # Declaring instance variables:
+        self.bin_edges = np.asarray(bin_edges, dtype=float)
+        n_bins = len(self.bin_edges) - 1
+
+        # (month, element) statistics, month 0 is January:
+        self.count = np.zeros((12, n_elements), dtype=np.int64)
+        self.mean = np.zeros((12, n_elements))
+        self.m2 = np.zeros((12, n_elements))
+        self.min = np.full((12, n_elements), np.nan)
+        self.max = np.full((12, n_elements), np.nan)
+        self.histogram = np.zeros((12, n_elements, n_bins), dtype=np.uint32)
+
+    # Method that adds a chunk of values to the statistics:
+    def update(self, values, months):
+        '''
+        Method adds a (time, elements) chunk of values to the statistics of the
+        month of each timestep. NaN values are ignored.
+
+        Parameters
+        ----------
+        values : numpy array
+            The (time, elements) values.
+
+        months : numpy array
+            The (time,) calendar month (1 to 12) of each timestep.
+        '''
+        values = np.asarray(values, dtype=float)
+        (n_elements, n_bins) = self.histogram.shape[1:]
+
+        for month in np.unique(months):
+
+            block = values[months == month]
+            valid = ~np.isnan(block)
+
+            block_count = valid.sum(axis=0)
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                block_mean = np.where(valid, block, 0).sum(axis=0) / block_count
+                block_m2 = np.where(valid, (block - block_mean) ** 2, 0).sum(axis=0)
+
+            self.merge_moments(month - 1, block_count, np.nan_to_num(block_mean), block_m2,
+                np.fmin.reduce(block, axis=0), np.fmax.reduce(block, axis=0))
+
+            # Counting every valid value in its (element, bin) cell:
+            bins = np.clip(np.searchsorted(self.bin_edges, block, side='right') - 1,
+                0, n_bins - 1)
+            cells = (np.arange(n_elements)[None, :] * n_bins + bins)[valid]
+
+            self.histogram[month - 1] += np.bincount(cells,
+                minlength=n_elements * n_bins).reshape(n_elements, n_bins).astype(np.uint32)
+
+    # Method that merges the moments of a month with a block of moments:
+    def merge_moments(self, month_index, count, mean, m2, minimum, maximum):
+        '''
+        Method merges a block of counts, means, M2s, mins and maxes into the
+        statistics of a month.
+        '''
+        total = self.count[month_index] + count
+        delta = mean - self.mean[month_index]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean[month_index] = np.where(total > 0,
+                self.mean[month_index] + delta * count / total, 0)
+            self.m2[month_index] = np.where(total > 0, self.m2[month_index] + m2 +
+                delta ** 2 * self.count[month_index] * count / total, 0)
+
+        self.count[month_index] = total
+        self.min[month_index] = np.fmin(self.min[month_index], minimum)
+        self.max[month_index] = np.fmax(self.max[month_index], maximum)
+
+    # Method that merges another set of statistics into the statistics:
+    def merge(self, other):
+        '''
+        Method merges the statistics of the same elements and bins into the
+        statistics.
+
+        Parameters
+        ----------
+        other : running_statistics
+            The statistics that are merged.
+        '''
+        for month_index in range(12):
+            self.merge_moments(month_index, other.count[month_index],
+                other.mean[month_index], other.m2[month_index],
+                other.min[month_index], other.max[month_index])
+
+        self.histogram += other.histogram
+
+    # Method that returns the standard deviation of each month and element:
+    def get_std(self):
+        '''
+        Method returns the (month, element) sample standard deviation. It is NaN
+        where there are fewer than two values.
+        '''
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    # Method that estimates percentiles from the histograms:
+    def get_percentiles(self, q):
+        '''
+        Method estimates the percentiles of every month and element from the
+        histograms, interpolating linearly within the bin that contains each
+        percentile.
+
+        Parameters
+        ----------
+        q : float or list
+            The percentile(s) between 0 and 100.
+
+        Returns
+        -------
+        percentiles : numpy array
+            The (len(q), month, element) percentiles. NaN where there are no
+            values.
+        '''
+        q = np.atleast_1d(np.asarray(q, dtype=float)) / 100
+
+        cumulative = np.cumsum(self.histogram, axis=2, dtype=np.float64)
+        totals = cumulative[:, :, -1]
+
+        percentiles = np.full((len(q),) + totals.shape, np.nan)
+
+        for i, fraction in enumerate(q):
+
+            target = fraction * totals
+
+            # The first bin whose cumulative count reaches the target:
+            bins = np.minimum((cumulative < target[:, :, None]).sum(axis=2),
+                cumulative.shape[2] - 1)
+
+            below = np.where(bins > 0, np.take_along_axis(cumulative,
+                np.maximum(bins - 1, 0)[:, :, None], axis=2)[:, :, 0], 0)
+            in_bin = np.take_along_axis(self.histogram, bins[:, :, None], axis=2)[:, :, 0]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                position = np.where(in_bin > 0, (target - below) / in_bin, 0)
+
+            percentiles[i] = np.where(totals > 0, self.bin_edges[bins] + np.clip(position, 0, 1)
+                * (self.bin_edges[bins + 1] - self.bin_edges[bins]), np.nan)
+
+        return percentiles
+
+    # Method that returns the statistics as a dict of named arrays:
+    def to_arrays(self, prefix):
+        '''
+        Method returns the statistic arrays as {f'{prefix}_{name}': array} to be
+        saved in an .npz file. Only the months with values are kept (a run
+        usually covers a single month), listed in f'{prefix}_months'.
+        '''
+        months = np.flatnonzero(self.count.any(axis=1))
+
+        arrays = {f'{prefix}_{name}': getattr(self, name)[months] for name in self.ARRAY_NAMES}
+        arrays[f'{prefix}_months'] = months
+        arrays[f'{prefix}_n_elements'] = np.array(self.count.shape[1])
+        arrays[f'{prefix}_bin_edges'] = self.bin_edges
+
+        return arrays
+
+    # Constructor that rebuilds statistics from named arrays:
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        '''
+        Method rebuilds the statistics saved via to_arrays(). Months that were
+        not saved are empty.
+        '''
+        statistics = cls(int(arrays[f'{prefix}_n_elements']), arrays[f'{prefix}_bin_edges'])
+        months = arrays[f'{prefix}_months']
+
+        for name in cls.ARRAY_NAMES:
+            getattr(statistics, name)[months] = arrays[f'{prefix}_{name}']
+
+        return statistics
+
+
+# Function run by the climatology workers to reduce a single run:
+def reduce_run(task):
+    '''
+    Function that streams the items of a single dfsu run chunk by chunk,
+    reduces the timesteps the run contributes into running_statistics per data
+    category and writes them to the run's checkpoint file. It is a module level
+    function so that it can be sent to the workers of a process pool.
+
+    Parameters
+    ----------
+    task : dict
+        A dict of {'filepath', 'times', 'mask', 'cat_names', 'map_dict',
+        'element_ids', 'bin_edges', 'chunk_size', 'checkpoint_path'}. See
+        climatology_job.build_tasks().
+
+    Returns
+    -------
+    checkpoint_path : str
+        The path of the checkpoint file of the run.
+    '''
+    element_ids = task['element_ids']
+    n_elements = len(element_ids)
+
+    statistics = {cat_name: running_statistics(n_elements, task['bin_edges'][cat_name])
+        for cat_name in task['cat_names']}
+
+    months = pd.DatetimeIndex(task['times']).month.values
+    used_steps = np.flatnonzero(task['mask'])
+
+    for i in range(0, len(used_steps), task['chunk_size']):
+
+        time_steps = used_steps[i:i + task['chunk_size']]
+
+        dataset = mikeio.Dfsu().read(task['filepath'],
+            items=[task['map_dict'][cat_name] for cat_name in task['cat_names']],
+            time_steps=list(time_steps), elements=list(element_ids))
+
+        for cat_name in task['cat_names']:
+            statistics[cat_name].update(
+                np.asarray(dataset[task['map_dict'][cat_name]]).reshape(len(time_steps), -1),
+                months[time_steps])
+
+    arrays = {}
+
+    for cat_name, cat_statistics in statistics.items():
+        arrays.update(cat_statistics.to_arrays(cat_name))
+
+    # Writing the checkpoint atomically so a partial checkpoint is never read. The
+    # histograms are mostly empty bins and compress well:
+    temp_path = f"{task['checkpoint_path']}.{os.getpid()}.tmp"
+
+    with open(temp_path, 'wb') as checkpoint_file:
+        np.savez_compressed(checkpoint_file, **arrays)
+
+    os.replace(temp_path, task['checkpoint_path'])
+
+    return task['checkpoint_path']
+
+
+# Object that computes monthly climatologies over the full run history of a client:
+class climatology_job(object):
+    """
+    This object computes the monthly climatology (count, mean, standard
+    deviation, min, max and percentiles) of several data categories at every
+    element over the full dfsu run history of a client, without ever loading a
+    whole file.
+
+    The run history is found via the file_query_api and aligned into a single
+    timeline where the newest run wins (as in dfsu_multi_run_view), so each
+    timestep is only counted once. Only the time axis of each run is read to
+    align the runs; the mesh is taken from the first run. Every run is then reduced on a process pool:
+    its items are streamed chunk_size timesteps at a time for the selected
+    elements only, reduced into mergeable running_statistics and written to a
+    checkpoint file of the run. The checkpoints are merged into the climatology.
+
+    Checkpoints are keyed by the run's file version, the timesteps it
+    contributes and the job settings, so a re-run only reduces new runs and the
+    run whose contribution was shortened by a newer run. An interrupted job
+    resumes from the checkpoints that were written.
+
+    >>> job = climatology_job(root_dir, 'client', ['Current speed'], 'climatology')
+    >>> job.run()
+    >>> job.get_percentiles('Current speed', [50, 90])
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory of the model output file directory.
+
+    client_name : str
+        The client name of the dfsu files.
+
+    cat_names : list
+        The data categories (keys of map_dict) of the climatology.
+
+    output_dir : str
+        The directory the checkpoints and the climatology are written to.
+
+    element_ids : list : default = None
+        The elements of the climatology. If None every element is used.
+
+    processes : int : default = None
+        The number of worker processes. Defaults to the number of CPUs.
+
+    chunk_size : int : default = 24
+        The number of timesteps read from a file at a time.
+
+    n_bins : int : default = 64
+        The number of histogram bins used to estimate percentiles.
+
+    value_ranges : dict : default = None
+        A dict of {data category: (min, max)} histogram ranges. Categories that
+        are not given use DEFAULT_VALUE_RANGES.
+
+    map_dict : dict : default = None
+        The item re-mapping dict. Defaults to DFSU_ITEM_MAP.
+    """
+    def __init__(self, root_dir, client_name, cat_names, output_dir, element_ids=None,
+        processes=None, chunk_size=24, n_bins=64, value_ranges=None, map_dict=None):
+
+        # Declaring instance variables:
+        self.root_dir = root_dir
+        self.client_name = client_name
+        self.cat_names = list(cat_names)
+        self.output_dir = output_dir
+        self.element_ids = element_ids
+        self.processes = processes if processes != None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.map_dict = dict(DFSU_ITEM_MAP) if map_dict == None else map_dict
+
+        value_ranges = dict(DEFAULT_VALUE_RANGES, **(value_ranges or {}))
+        self.bin_edges = {cat_name: np.linspace(*value_ranges[cat_name], n_bins + 1)
+            for cat_name in self.cat_names}
+
+        self.checkpoint_dir = os.path.join(self.output_dir, 'checkpoints')
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        # The merged statistics of every category, loaded or built by run():
+        self.statistics = None
+
+    # Method that builds the reduction task of every run:
+    def build_tasks(self):
+        '''
+        Method finds the run history of the client, aligns the runs into a single
+        timeline and builds the reduction task of every run that contributes
+        timesteps.
+
+        Returns
+        -------
+        tasks : list
+            A reduction task dict per run. See reduce_run().
+
+        Raises
+        ------
+        ValueError : ValueError
+            If the client has no dfsu files.
+        '''
+        # The yyyymmddhh date folder in each path orders the runs:
+        file_query = file_query_api(self.root_dir)
+        filepaths = sorted(file_query.get_client_data_paths(self.client_name, file_type='.dfsu'))
+
+        if len(filepaths) == 0:
+            raise ValueError(f'No dfsu files of {self.client_name} in {self.root_dir}')
+
+        run_times = self.read_run_times(filepaths)
+
+        if self.element_ids is None:
+            self.element_ids = np.arange(self.n_elements)
+
+        element_ids = np.asarray(self.element_ids, dtype=int)
+
+        # The settings that change the result of every run's reduction:
+        settings = '|'.join([','.join(self.cat_names),
+            hashlib.sha1(element_ids.tobytes()).hexdigest(),
+            hashlib.sha1(np.concatenate(list(self.bin_edges.values())).tobytes()).hexdigest()])
+
+        tasks = []
+
+        for i, (filepath, run_time) in enumerate(zip(filepaths, run_times)):
+
+            # Each run contributes the timesteps before the start of the next run:
+            if i + 1 < len(run_times):
+                run_mask = np.asarray(run_time < run_times[i + 1][0])
+            else:
+                run_mask = np.ones(len(run_time), dtype=bool)
+
+            if not run_mask.any():
+                continue
+
+            run_key = hashlib.sha1(f'{os.path.abspath(filepath)}|'
+                f'{os.path.getmtime(filepath)}|{int(run_mask.sum())}|{settings}'.encode()
+                ).hexdigest()
+
+            tasks.append({'filepath': filepath, 'times': run_time.values,
+                'mask': run_mask, 'cat_names': self.cat_names, 'map_dict': self.map_dict,
+                'element_ids': element_ids, 'bin_edges': self.bin_edges,
+                'chunk_size': self.chunk_size,
+                'checkpoint_path': os.path.join(self.checkpoint_dir, f'{run_key}.npz')})
+
+        return tasks
+
+    # Method that reads the time axis of every run:
+    def read_run_times(self, filepaths, max_workers=4):
+        '''
+        Method reads the first item of a single element from every run, in
+        parallel, and keeps only each run's time axis. The number of elements is
+        taken from the first run, so a single mesh is held at a time.
+
+        Parameters
+        ----------
+        filepaths : list
+            The filepaths of the .dfsu files ordered from the oldest to the
+            newest run.
+
+        max_workers : int : default = 4
+            The number of files read in parallel.
+
+        Returns
+        -------
+        run_times : list
+            The DatetimeIndex of each run, in the order of filepaths.
+        '''
+        first_item = self.map_dict[next(iter(self.map_dict))]
+
+        # The Dfsu object of each read is dropped once its size is known:
+        def read_run_time(filepath):
+
+            run_engine = mikeio.Dfsu()
+            dataset = run_engine.read(filepath, items=[first_item], elements=[0])
+
+            return (run_engine.n_elements, pd.DatetimeIndex(dataset.time))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            run_reads = list(executor.map(read_run_time, filepaths))
+
+        self.n_elements = run_reads[0][0]
+
+        return [run_time for (n_elements, run_time) in run_reads]
+
+    # Method that reduces every run without a checkpoint and merges the checkpoints:
+    def run(self):
+        '''
+        Method reduces every run that has no checkpoint on the process pool, then
+        merges every run's checkpoint into the climatology, writes it to
+        'climatology.npz' in the output directory and removes the checkpoints of
+        runs that no longer contribute.
+
+        Returns
+        -------
+        statistics : dict
+            A dict of {data category: running_statistics} of the climatology.
+        '''
+        tasks = self.build_tasks()
+
+        pending = [task for task in tasks if not os.path.exists(task['checkpoint_path'])]
+
+        print(f'[CLIMATOLOGY]: {len(tasks)} runs, {len(tasks) - len(pending)} checkpointed, '
+            f'{len(pending)} to reduce')
+
+        if self.processes <= 1 or len(pending) <= 1:
+            for task in pending:
+                print(f'[REDUCED]: {reduce_run(task)}')
+
+        else:
+            with multiprocessing.Pool(min(self.processes, len(pending))) as pool:
+                for checkpoint_path in pool.imap_unordered(reduce_run, pending):
+                    print(f'[REDUCED]: {checkpoint_path}')
+
+        # Merging the checkpoint of every run:
+        n_elements = len(self.element_ids)
+        self.statistics = {cat_name: running_statistics(n_elements, self.bin_edges[cat_name])
+            for cat_name in self.cat_names}
+
+        for task in tasks:
+            with np.load(task['checkpoint_path']) as arrays:
+                for cat_name in self.cat_names:
+                    self.statistics[cat_name].merge(
+                        running_statistics.from_arrays(arrays, cat_name))
+
+        self.save()
+
+        # Removing the checkpoints of runs that were replaced or shortened:
+        current_paths = {task['checkpoint_path'] for task in tasks}
+
+        for entry in os.scandir(self.checkpoint_dir):
+            if entry.name.endswith('.npz') and entry.path not in current_paths:
+                os.remove(entry.path)
+
+        return self.statistics
+
+    # Method that writes the climatology:
+    def save(self):
+        '''
+        Method writes the merged statistics and the element indices to
+        'climatology.npz' in the output directory.
+        '''
+        arrays = {'element_ids': np.asarray(self.element_ids)}
+
+        for cat_name, statistics in self.statistics.items():
+            arrays.update(statistics.to_arrays(cat_name))
+
+        climatology_path = os.path.join(self.output_dir, 'climatology.npz')
+        temp_path = f'{climatology_path}.{os.getpid()}.tmp'
+
+        with open(temp_path, 'wb') as climatology_file:
+            np.savez_compressed(climatology_file, **arrays)
+
+        os.replace(temp_path, climatology_path)
+
+    # Method that reads the climatology written by a previous run:
+    def load(self):
+        '''
+        Method reads the merged statistics from 'climatology.npz' in the output
+        directory.
+        '''
+        with np.load(os.path.join(self.output_dir, 'climatology.npz')) as arrays:
+
+            self.element_ids = arrays['element_ids']
+            self.statistics = {cat_name: running_statistics.from_arrays(arrays, cat_name)
+                for cat_name in self.cat_names}
+
+        return self.statistics
+
+    # Method that returns the monthly climatology of a category as a dataframe:
+    def get_climatology(self, cat_name):
+        '''
+        Method returns the monthly count, mean, standard deviation, min and max of
+        a data category at every element.
+
+        Parameters
+        ----------
+        cat_name : str
+            The data category.
+
+        Returns
+        -------
+        climatology_df : pandas dataframe
+            A dataframe indexed by (month, element) with a column per statistic.
+        '''
+        if self.statistics == None:
+            self.load()
+
+        statistics = self.statistics[cat_name]
+
+        index = pd.MultiIndex.from_product([range(1, 13), self.element_ids],
+            names=['month', 'element'])
+
+        return pd.DataFrame({'count': statistics.count.ravel(),
+            'mean': np.where(statistics.count > 0, statistics.mean, np.nan).ravel(),
+            'std': statistics.get_std().ravel(), 'min': statistics.min.ravel(),
+            'max': statistics.max.ravel()}, index=index)
+
+    # Method that returns monthly percentiles of a category as a dataframe:
+    def get_percentiles(self, cat_name, q):
+        '''
+        Method returns the monthly percentiles of a data category at every
+        element, estimated from the histogram sketches.
+
+        Parameters
+        ----------
+        cat_name : str
+            The data category.
+
+        q : float or list
+            The percentile(s) between 0 and 100.
+
+        Returns
+        -------
+        percentile_df : pandas dataframe
+            A dataframe indexed by (month, element) with a column per percentile.
+        '''
+        if self.statistics == None:
+            self.load()
+
+        q = list(np.atleast_1d(q))
+        percentiles = self.statistics[cat_name].get_percentiles(q)
+
+        index = pd.MultiIndex.from_product([range(1, 13), self.element_ids],
+            names=['month', 'element'])
+
+        return pd.DataFrame({f'p{percentile:g}': percentiles[i].ravel()
+            for i, percentile in enumerate(q)}, index=index)
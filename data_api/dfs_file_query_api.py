@@ -3,12 +3,242 @@ import os
 import sys
 import warnings
 
-# Importing the dfs ingestion api: # NOTE: For Production
-#from * import dfs_ingestion_api.dfs0_ingestion_engine as dfs0_ingestion_engine
-from data_api.dfs_ingestion_api import dfs0_ingestion_engine # NOTE: For development
+# NOTE: The dfs ingestion api (and with it mikeio, pandas and numpy) is only
+# imported by the methods that decode files so that directory queries start fast.
+from data_api.dfs_prefetch_api import dfs_prefetch_reader
 
 # Importing data management packages:
 from datetime import datetime
+from collections import OrderedDict
+import copy
+import functools
+import inspect
+import threading
+import time
+
+# Object that memoizes query results and validates them against directory mtimes:
+class query_result_cache(object):
+    """
+    This object is the memoization layer used by the file_query_api. It stores
+    the result of each query keyed by (method name, client name, arguments) and
+    validates a cached result against the state of the directory before it is
+    returned.
+
+    The directory state is a signature of the modification times of the root
+    directory, every date folder in it and the TimeSeries sub-folder of each date
+    folder. A new date folder changes the root mtime and a new or replaced dfs
+    file changes the mtime of its TimeSeries folder, so a cached result is only
+    returned while none of these have changed. Building the signature is a
+    single directory listing plus a stat per date folder instead of a full
+    os.walk.
+
+    Entries expire after ttl seconds and the least recently used entry is
+    evicted once max_entries is reached. Entries can also be invalidated
+    explicitly via invalidate().
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory whose state the cached results are validated against.
+
+    max_entries : int : default = 128
+        The maximum number of cached query results.
+
+    ttl : float : default = None
+        The number of seconds after which an entry expires regardless of the
+        directory state. If None entries only expire when the directory changes.
+
+    validation_interval : float : default = 0
+        The number of seconds a computed directory signature is re-used for. The
+        default of 0 re-validates on every call. Raising it lets bursts of
+        repeated queries return without touching the file system at the cost of
+        serving results up to validation_interval seconds old.
+    """
+    def __init__(self, root_dir, max_entries=128, ttl=None, validation_interval=0):
+
+        # Declaring instance variables:
+        self.root_dir = root_dir
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.validation_interval = validation_interval
+
+        # Key-Value store of {query key: (directory signature, created time, result)}:
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+        # The last directory signature and the time it was computed:
+        self.signature = None
+        self.signature_time = None
+
+        # Counters used to measure the effectiveness of the cache:
+        self.hits = 0
+        self.misses = 0
+
+    # Method that builds the signature of the current state of the directory:
+    def get_directory_signature(self):
+        '''
+        Method builds a signature of the root directory from the mtimes of the root
+        directory, each date folder and each date folder's TimeSeries sub-folder.
+
+        Returns
+        -------
+        signature : tuple
+            A hashable tuple that changes whenever a date folder or a TimeSeries
+            file is added, removed or replaced. None if the root directory can
+            not be listed.
+        '''
+        # Re-using the last signature within the validation interval:
+        now = time.monotonic()
+
+        if self.signature != None and now - self.signature_time < self.validation_interval:
+            return self.signature
+
+        # A missing or unreadable root directory has no signature, the queries
+        # then run uncached and return what os.walk() finds:
+        try:
+            signature = [os.stat(self.root_dir).st_mtime_ns]
+
+            with os.scandir(self.root_dir) as root_entries:
+
+                for entry in root_entries:
+
+                    if not entry.is_dir():
+                        continue
+
+                    signature.append((entry.name, entry.stat().st_mtime_ns))
+
+                    # Both capitalizations of the sub-folder are in use:
+                    for sub_folder in ('TimeSeries', 'Timeseries'):
+
+                        try:
+                            signature.append(
+                                os.stat(os.path.join(entry.path, sub_folder)).st_mtime_ns)
+                        except OSError:
+                            pass
+
+        except OSError:
+            return None
+
+        self.signature = tuple(signature)
+        self.signature_time = now
+
+        return self.signature
+
+    # Method that returns a cached result or computes and caches it:
+    def get_or_compute(self, key, compute):
+        '''
+        Method returns the cached result for key if it exists, has not expired
+        and the directory has not changed since it was computed. Otherwise the
+        result is computed, cached and returned. The cache is bypassed if the
+        directory has no signature.
+
+        Parameters
+        ----------
+        key : tuple
+            The (method name, client name, arguments) key of the query.
+
+        compute : callable
+            A function with no arguments that performs the query.
+
+        Returns
+        -------
+        result : object
+            A copy of the query result so that callers cannot modify the cache.
+        '''
+        signature = self.get_directory_signature()
+
+        if signature == None:
+            return compute()
+
+        with self.lock:
+
+            entry = self.entries.get(key)
+
+            if entry != None:
+
+                (entry_signature, created, result) = entry
+                expired = self.ttl != None and time.monotonic() - created > self.ttl
+
+                if entry_signature == signature and not expired:
+
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+
+                    return copy.copy(result)
+
+                del self.entries[key]
+
+            self.misses += 1
+
+        result = compute()
+
+        with self.lock:
+
+            self.entries[key] = (signature, time.monotonic(), result)
+            self.entries.move_to_end(key)
+
+            # Evicting the least recently used entries:
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return copy.copy(result)
+
+    # Method that removes cached entries:
+    def invalidate(self, method_name=None, client_name=None):
+        '''
+        Method removes cached entries matching the method name and client name.
+        If neither is given every entry is removed.
+
+        Parameters
+        ----------
+        method_name : str : default = None
+            The name of the query method whose entries are removed.
+
+        client_name : str : default = None
+            The client name whose entries are removed.
+        '''
+        with self.lock:
+
+            for key in list(self.entries):
+
+                if method_name != None and key[0] != method_name:
+                    continue
+
+                if client_name != None and key[1] != client_name:
+                    continue
+
+                del self.entries[key]
+
+            # Forcing the next query to re-read the directory state:
+            self.signature = None
+
+# Decorator that routes a file_query_api method through its query_result_cache:
+def memoized_query(method):
+    '''
+    Decorator that memoizes a file_query_api query method in the instance's
+    query_cache. The cache key is built from the method name and its bound
+    arguments with defaults applied, so equivalent calls share an entry. The
+    first argument after self must be the client name. If the instance has no
+    query_cache the method is called directly.
+    '''
+    method_signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+
+        if self.query_cache == None:
+            return method(self, *args, **kwargs)
+
+        bound_args = method_signature.bind(self, *args, **kwargs)
+        bound_args.apply_defaults()
+
+        arg_values = list(bound_args.arguments.values())[1:]
+        key = (method.__name__, arg_values[0], tuple(arg_values[1:]))
+
+        return self.query_cache.get_or_compute(key,
+            lambda: method(self, *args, **kwargs))
+
+    return wrapper
 
 # An object that is means to represent the file diectory containing dfs files:
 class file_query_api(object):
@@ -29,16 +259,56 @@ class file_query_api(object):
     root_dir : str
         A filepath string representing the root or highest level DHI directory.
         This is root dir is outlined in the API's documentation.
+
+    cache : bool : default = True
+        If True the results of the query methods are memoized in a
+        query_result_cache that is validated against the directory state.
+
+    cache_size : int : default = 128
+        The maximum number of memoized query results.
+
+    cache_ttl : float : default = None
+        The number of seconds after which a memoized result expires. See
+        query_result_cache.
     """
 
-    def __init__(self, root_dir):
+    def __init__(self, root_dir, cache=True, cache_size=128, cache_ttl=None):
 
         # Path of the root diretory:
         self.root_dir = root_dir
 
+        # Initalizing the memoization layer for the query methods:
+        if cache is True:
+            self.query_cache = query_result_cache(self.root_dir,
+                max_entries=cache_size, ttl=cache_ttl)
+
+        else:
+            self.query_cache = None
+
+    # Method that removes memoized query results:
+    def invalidate_cache(self, method_name=None, client_name=None):
+        '''
+        Method removes memoized query results so that the next query walks the
+        directory again. It is the hook for callers that know the directory has
+        changed, such as after writing new model output.
+
+        Parameters
+        ----------
+        method_name : str : default = None
+            The name of the query method whose results are removed, e.g.
+            'get_client_dates'. If None results of every method are removed.
+
+        client_name : str : default = None
+            The client whose results are removed. If None results of every
+            client are removed.
+        '''
+        if self.query_cache != None:
+            self.query_cache.invalidate(method_name, client_name)
+
 # <-------------------------------General File Query Methods------------------->
 
     # Method that queries the directory and returns dfs filepaths based on kwargs:
+    @memoized_query
     def get_client_data_paths(self, client_name, date=None, file_type='.dfsu'):
         '''
         Method that searches the CDL directory structure for dfs files based on the
@@ -116,6 +386,7 @@ class file_query_api(object):
         return dfs_filepaths
 
     # Method that extracts all the dates in which the client folder is present:
+    @memoized_query
     def get_client_dates(self, client_name, file_type='.dfsu'):
         '''
         This method uses the os.walk method to iterate through the list of all
@@ -189,7 +460,7 @@ class file_query_api(object):
 
     # Method that iterates through the list generated by get_client_data_paths and
     # initalizes each list element as a dfs0 file object from the ingestion_api:
-    def get_dfs0_list(self, client_name):
+    def get_dfs0_list(self, client_name, lookahead=2):
         '''
         This method iterates through the list of dfs0 file paths generated from the
         self.get_client_data_paths(), initalizes these paths as dfs0_ingestion objects
@@ -203,12 +474,19 @@ class file_query_api(object):
             The name of the client for which the dfs filepaths will be generated.
             Via the self.get_client_data_paths(client_name).
 
+        lookahead : int : default = 2
+            The number of upcoming dfs0 files the dfs_prefetch_reader copies to
+            local scratch while the current file is decoded.
+
         Returns
         -------
         path_dict : dict
             A key value dictionary that contains all the key-value pairs of format
             {datetime : dataframe} from the client data path list.
         '''
+        # Importing the dfs ingestion api on first use:
+        from data_api.dfs_ingestion_api import dfs0_ingestion_engine
+
         # Initalizing the list of dfs0 paths:
         file_type = '.dfs0'
         dfs_list = self.get_client_data_paths(client_name, file_type=file_type)
@@ -219,30 +497,34 @@ class file_query_api(object):
         # Building the start path to be stripped from path value:
         start_path = self.root_dir
 
-        # Iterating through the list of dfs0 paths and building the dictionary:
-        for path in dfs_list:
+        # Reading upcoming files into local scratch while each file is decoded:
+        with dfs_prefetch_reader(dfs_list, lookahead=lookahead) as reader:
+
+            # Iterating through the list of dfs0 paths and building the dictionary:
+            for path, local_path in reader:
 
-            # Initalizing dfs0 file via the dfs0 ingestion engine:
-            dfs0 = dfs0_ingestion_engine(path)
+                # Initalizing dfs0 file via the dfs0 ingestion engine:
+                dfs0 = dfs0_ingestion_engine(local_path)
 
-            # Brute force slicing the path string for date value:
-            df_date = path.replace(start_path, '').replace('\\TimeSeries', '')
-            df_date = df_date.replace(f"\\TT_HD_{client_name}{file_type}", '')
+                # Brute force slicing the path string for date value:
+                df_date = path.replace(start_path, '').replace('\\TimeSeries', '')
+                df_date = df_date.replace(f"\\TT_HD_{client_name}{file_type}", '')
 
-            # Attempting to convert the df_date string to a datetime object:
-            df_date = datetime.strptime(df_date, "%Y%m%d%H")
+                # Attempting to convert the df_date string to a datetime object:
+                df_date = datetime.strptime(df_date, "%Y%m%d%H")
 
-            # Extracting dataframe from the dfs0 file:
-            dfs0_df = dfs0.main_df
+                # Extracting dataframe from the dfs0 file:
+                dfs0_df = dfs0.main_df
 
-            # Adding datetime object-dataframe, key-value pair to the path_dict:
-            path_dict[df_date] = dfs0_df
+                # Adding datetime object-dataframe, key-value pair to the path_dict:
+                path_dict[df_date] = dfs0_df
 
         return path_dict
 
 # <-----------------------------Specific File Search Algorithms---------------->
 
     # Method that performs the file search for 7-day forcecasting data:
+    @memoized_query
     def get_seven_day_forcast_files(self, client_name):
         '''
         This method implements the Seven Day Forecasting File search algorithm to
@@ -3,10 +3,26 @@ import mikeio
 # Importing data management packages:
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 # Misc Imports
 import datetime
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+# Importing the memory profiler that is enabled via DFS_MEMORY_PROFILE:
+from data_api.dfs_profiling_api import shared_memory_profiler
+
+# The scipy KD-tree is used as the spatial index of region and interpolation
+# queries, and scipy sparse matrices to apply interpolation weights, when scipy
+# is installed:
+try:
+    from scipy.spatial import cKDTree
+    from scipy import sparse
+except ImportError:
+    cKDTree = None
+    sparse = None
 
 class dfs0_ingestion_engine(mikeio.Dfs0):
     '''
@@ -88,6 +104,234 @@ class dfs0_ingestion_engine(mikeio.Dfs0):
                 pass
 
 
+# Object that holds views of the data of several categories at a single element:
+class node_view(object):
+    """
+    This is the lightweight result of dfsu_ingestion_engine.extract_view(). It
+    holds a numpy view of each data category at a single element and the time
+    index shared by every view of the dataset. Columns are read like a dataframe
+    (view['Current speed'], view.index, view.attrs) without building one.
+
+    Parameters
+    ----------
+    time_index : pandas DatetimeIndex
+        The time index of the dataset.
+
+    columns : dict
+        A dict of {data category: numpy view}.
+
+    element_index : int
+        The index of the element.
+
+    extraction_stats : dict : default = None
+        The extraction_stats of the engine, in which dataframe builds are counted.
+    """
+    def __init__(self, time_index, columns, element_index, extraction_stats=None):
+
+        # Declaring instance variables:
+        self.index = time_index
+        self.columns = columns
+        self.attrs = {'element_index': element_index}
+        self.extraction_stats = extraction_stats
+
+    def __getitem__(self, cat_name):
+        return self.columns[cat_name]
+
+    def __contains__(self, cat_name):
+        return cat_name in self.columns
+
+    def __len__(self):
+        return len(self.index)
+
+    # Method that builds a dataframe of the views:
+    def to_dataframe(self):
+        '''
+        Method builds a dataframe indexed by the shared time index with one column
+        per data category. The dataframe is built without copying where pandas
+        allows it.
+
+        Returns
+        -------
+        snapshot_df : pandas dataframe
+            A dataframe with one column per data category. The element index is
+            stored in snapshot_df.attrs['element_index'].
+        '''
+        if self.extraction_stats != None:
+            self.extraction_stats['frame_builds'] += 1
+
+        snapshot_df = pd.DataFrame(data=self.columns, index=self.index,
+            columns=list(self.columns), copy=False)
+        snapshot_df.attrs.update(self.attrs)
+
+        return snapshot_df
+
+# The default re-mapping of dfsu item names: {'Data we want':'Data from Dfsu() Dataset'}
+# See dfsu_ingestion_engine.__init__ for why the re-mapping is necessary.
+DFSU_ITEM_MAP = {'Salinity':'Temperature',
+            'Temperature':'Density',
+            'Density':'Current direction (Horizontal)',
+            'Current direction':'Current speed',
+            'Current speed':'W velocity',
+            'W velocity':'V velocity',
+            'U velocity':'Z coordinate'
+            }
+
+# Functions of the default derived variables. Current directions are the direction
+# the current flows towards, clockwise from north, in radians:
+def derive_u_component(speed, direction):
+    return speed * np.sin(direction)
+
+def derive_v_component(speed, direction):
+    return speed * np.cos(direction)
+
+def derive_direction_degrees(direction):
+    return np.degrees(direction) % 360
+
+def derive_density_anomaly(density):
+    return density - 1000
+
+def derive_speed_from_components(u, v):
+    return np.hypot(u, v)
+
+# The derived variables that can be extracted from a dfsu_ingestion_engine like
+# the items of its map_dict: {name: {'inputs': [item or derived variable names],
+# 'function': function of the input arrays, 'units': str}}. Derived variables are
+# computed on demand for the requested elements and timesteps only. See
+# dfsu_ingestion_engine.get_variable_array().
+DERIVED_VARIABLES = {
+    'Current u': {'inputs': ['Current speed', 'Current direction'],
+        'function': derive_u_component, 'units': 'm/s'},
+    'Current v': {'inputs': ['Current speed', 'Current direction'],
+        'function': derive_v_component, 'units': 'm/s'},
+    'Current speed (from components)': {'inputs': ['Current u', 'Current v'],
+        'function': derive_speed_from_components, 'units': 'm/s'},
+    'Current direction (degrees)': {'inputs': ['Current direction'],
+        'function': derive_direction_degrees, 'units': 'Degrees'},
+    'Density anomaly': {'inputs': ['Density'],
+        'function': derive_density_anomaly, 'units': 'kg/m^3'},
+    }
+
+# Function that declares a derived variable:
+def register_derived_variable(name, inputs, function, units=None):
+    '''
+    Function declares a derived variable that can then be extracted from every
+    dfsu_ingestion_engine by name. Registering an existing name replaces it.
+
+    Parameters
+    ----------
+    name : str
+        The name of the derived variable.
+
+    inputs : list
+        The names of the items (keys of map_dict) or derived variables the
+        variable is computed from.
+
+    function : callable
+        A vectorized function that takes the input arrays, in the order of
+        inputs, and returns the array of the variable with the same shape.
+
+    units : str : default = None
+        The units of the variable.
+    '''
+    DERIVED_VARIABLES[name] = {'inputs': list(inputs), 'function': function,
+        'units': units}
+
+    # Results memoised under a previous definition of the name are discarded:
+    dfsu_ingestion_engine.clear_derived_cache()
+
+# Object that holds a bounded number of cached values in least recently used order:
+class lru_cache_store(object):
+    """
+    This object is a thread safe key-value store bounded by number of entries
+    and, optionally, by the total size of its values. Once either bound is
+    exceeded, the least recently used values are evicted whenever a value is
+    added. It holds the geometry, weight and array caches that the
+    dfsu_ingestion_engine shares between engines, which would otherwise keep
+    the results of every file version loaded by a long running process.
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximum number of values held. If None only max_bytes bounds the
+        store.
+
+    max_bytes : int : default = None
+        The maximum total size in bytes of the values held, as measured by
+        sizeof. Values larger than max_bytes are not stored. If None the size
+        of the values is not bounded.
+
+    sizeof : callable : default = None
+        A function that returns the size in bytes of a value, e.g. the nbytes
+        of an array. Required if max_bytes is given.
+    """
+    def __init__(self, max_entries, max_bytes=None, sizeof=None):
+
+        if max_bytes != None and sizeof == None:
+            raise ValueError('A sizeof function is required to bound the store by max_bytes')
+
+        # Declaring instance variables:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+
+        # The total size of the values held, tracked when max_bytes is given:
+        self.total_bytes = 0
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Method that returns a cached value:
+    def get(self, key, default=None):
+        '''
+        Method returns the value of a key and marks it as the most recently used,
+        or default if the key is not cached.
+        '''
+        with self.lock:
+
+            if key not in self.entries:
+                return default
+
+            self.entries.move_to_end(key)
+
+            return self.entries[key][0]
+
+    # Method that adds a value and evicts the least recently used values:
+    def put(self, key, value):
+        '''
+        Method adds a value and evicts the least recently used values until at
+        most max_entries values of at most max_bytes in total are held.
+        '''
+        value_bytes = 0 if self.max_bytes == None else self.sizeof(value)
+
+        with self.lock:
+
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+
+            if self.max_bytes != None and value_bytes > self.max_bytes:
+                return
+
+            self.entries[key] = (value, value_bytes)
+            self.total_bytes += value_bytes
+
+            while (self.max_entries != None and len(self.entries) > self.max_entries) or \
+                (self.max_bytes != None and self.total_bytes > self.max_bytes):
+
+                (evicted_key, (evicted_value, evicted_bytes)) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+
+    # Method that removes every value:
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
 class dfsu_ingestion_engine(mikeio.Dfsu):
     '''
     The ingestion engine ingests a dfsu file path and provides a series of APIs
@@ -98,24 +342,68 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
     ----------
     filepath: str
         The filepath of the .dfsu file.
+
+    shared_store : shared_dataset_store : default = None
+        The store the dataset is shared through with other processes. If given,
+        the dataset is a read-only memory mapped shared_dataset that is only read
+        from the file by the first process to load this version of the file.
+        If None the file is read into this process.
     '''
 
-    def __init__(self, filepath):
+    # LRU store of the transect geometries resolved by get_transect_geometry()
+    # shared by every engine and keyed by the file version, polyline and spacing:
+    transect_cache = lru_cache_store(128)
+
+    # LRU stores of the element selections of get_region_elements() and of the
+    # spatial indexes of each mesh, keyed by the file version:
+    region_cache = lru_cache_store(256)
+    spatial_index_cache = lru_cache_store(4)
+
+    # LRU store of the interpolation weights of get_interpolation_weights() keyed
+    # by the file version, query points and interpolation settings:
+    interpolation_cache = lru_cache_store(64)
+
+    # LRU store of the derived variable arrays computed by get_variable_array(),
+    # shared by every engine, keyed by the file version and the selection and
+    # bounded by the total size of the arrays:
+    derived_cache = lru_cache_store(None, max_bytes=512 * 1024**2,
+        sizeof=lambda variable_array: variable_array.nbytes)
+
+    def __init__(self, filepath, shared_store=None):
 
         # Instance Variables:
         self.filepath = filepath
 
+        # The (path, modification time) of the file when it was read. Used to key
+        # anything cached from this dataset to the version of the file:
+        self.file_version = (os.path.abspath(filepath), os.path.getmtime(filepath))
+
         # Invoking mikeio parent to initalize Dfsu():
         super().__init__()
 
         # Reading core data from .dfsu file:
-        self.dataset = self.read(filepath)
+        with shared_memory_profiler.stage('dfsu_read', owner=self, filepath=filepath):
+
+            if shared_store == None:
+                self.dataset = self.read(filepath)
+            else:
+                self.dataset = shared_store.load(self)
+
+        shared_memory_profiler.register_source('dataset', self,
+            dfsu_ingestion_engine.get_memory_usage, filepath)
+
+        # The time index shared by every view and dataframe extracted from the
+        # dataset. pandas indexes are immutable so it is never copied:
+        self.time_index = pd.DatetimeIndex(self.dataset.time)
 
         # Conditional to ensure that the dfsu file contains long/lat mesh:
         if self.is_geo is True:
 
             # Once long/lat mesh confirmed, initalizing other data:
-            self.nodes = self.get_node_coords() # (long, lat, z-value) of each node
+            self.nodes = self.get_shared_geometry('node_coordinates') # (long, lat, z-value) of each node
+
+            if self.nodes is None:
+                self.nodes = self.get_node_coords()
 
         else:
             # if there is no long/lat mesh error out w custom error msg:
@@ -139,15 +427,118 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
         '''
 
         # Declaring the re-mapping dict: {'Data we want':'Data from Dfsu() Dataset'}
-        self.map_dict = {'Salinity':'Temperature',
-                    'Temperature':'Density',
-                    'Density':'Current direction (Horizontal)',
-                    'Current direction':'Current speed',
-                    'Current speed':'W velocity',
-                    'W velocity':'V velocity',
-                    'U velocity':'Z coordinate'
-                    }
+        self.map_dict = dict(DFSU_ITEM_MAP)
+
+        # Counters of nearest-element searches and dataframe builds that are used
+        # to measure how much work each query or dashboard render performs:
+        self.extraction_stats = {'element_searches': 0, 'frame_builds': 0}
+
+    # Method that returns the memory held by the loaded dataset:
+    def get_memory_usage(self):
+        '''
+        Method returns the number of bytes held by the arrays of the loaded
+        dataset. It is registered as the 'dataset' source of the memory profiler.
+
+        Returns
+        -------
+        dataset_bytes : int
+            The total size of the item arrays of self.dataset in bytes.
+        '''
+        return int(sum(np.asarray(item_array).nbytes for item_array in self.dataset.data))
+
+    # Method that returns a mesh geometry array published to the shared store:
+    def get_shared_geometry(self, name):
+        '''
+        Method returns a mesh geometry array of the shared_dataset the engine was
+        loaded from, so processes attached to a published file version share the
+        geometry instead of each computing it from the mesh.
+
+        Parameters
+        ----------
+        name : str
+            The name of the geometry array. See
+            shared_dataset_store.GEOMETRY_ATTRIBUTES.
+
+        Returns
+        -------
+        geometry : numpy array
+            The read-only geometry array, or None if the dataset was not loaded
+            from a shared store or the geometry was not published.
+        '''
+        geometry = getattr(getattr(self, 'dataset', None), 'geometry', None)
+
+        if geometry == None:
+            return None
+
+        return geometry.get(name)
+
+    # Property that returns the element centroids, shared if they were published:
+    @property
+    def element_coordinates(self):
+        '''
+        The (long, lat, z-value) centroid of each element. Read from the shared
+        store if the dataset was attached to one, otherwise computed by mikeio.
+        '''
+        element_coordinates = self.get_shared_geometry('element_coordinates')
+
+        if element_coordinates is None:
+            return super().element_coordinates
 
+        return element_coordinates
+
+    # Method that resolves the index of the element closest to a location point:
+    def resolve_element(self, long, lat, depth):
+        '''
+        Method performs the nearest element search for a location point and
+        records the search in self.extraction_stats. All data extraction methods
+        resolve their element through this method.
+
+        Parameters
+        ----------
+        long : float
+            The longnitude value of the location point
+
+        lat : float
+            The latitude value of the location point
+
+        depth : float
+            The depth value of the location point
+
+        Returns
+        -------
+        element_index : int
+            The index of the element closest to the location point.
+        '''
+        self.extraction_stats['element_searches'] += 1
+
+        return self.find_closest_element_index(long, lat, depth)
+
+    # Method that resets the extraction counters:
+    def reset_extraction_stats(self):
+        '''
+        Method resets the counters in self.extraction_stats to zero so that the
+        work of a single query or render can be measured.
+        '''
+        for stat in self.extraction_stats:
+            self.extraction_stats[stat] = 0
+
+
+    # Method that returns the indices of the surface layer elements:
+    def get_surface_elements(self):
+        '''
+        Method returns the indices of the elements in the surface layer of the
+        mesh. For a layered (3D) dfsu these are the top element of every water
+        column and for a 2D dfsu every element.
+
+        Returns
+        -------
+        surface_elements : numpy array
+            The integer indices of the surface elements.
+        '''
+        if self.is_layered:
+            return np.asarray(self.top_elements)
+
+        return np.arange(self.n_elements)
 
     # Method that extracts all data from a single category for a single point:
     def get_node_data(self, long, lat, depth, cat_name):
@@ -180,11 +571,231 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
         '''
 
         # Extracting the index value of the data segement that corresponds to the cords:
-        element_index = self.find_closest_element_index(long, lat, depth)
+        element_index = self.resolve_element(long, lat, depth)
 
         # extracting data based on the data category and index as a dataframe:
         return self.extract_data(cat_name, element_index)
 
+    # Method that extracts several categories for a single point in one pass:
+    def get_node_snapshot(self, long, lat, depth, cat_names=None):
+        '''
+        Method resolves the element closest to a location point once and slices
+        every requested data category for that element into a single time
+        indexed dataframe. It is intended to replace repeated get_node_data()
+        calls for the same point, which each repeat the nearest element search
+        and build their own dataframe.
+
+        Parameters
+        ----------
+        long : float
+            The longnitude value of the location point
+
+        lat : float
+            The latitude value of the location point
+
+        depth : float
+            The depth value of the location point
+
+        cat_names : list : default = None
+            The data categories (keys of self.map_dict) to extract. If None every
+            category is extracted. Duplicate categories are only extracted once.
+
+        Returns
+        -------
+        snapshot_df : pandas dataframe
+            A dataframe indexed by the dataset time with one column per data
+            category. The element index is stored in snapshot_df.attrs['element_index'].
+        '''
+        if cat_names == None:
+            cat_names = list(self.map_dict)
+
+        # Removing duplicate categories while preserving their order:
+        cat_names = list(dict.fromkeys(cat_names))
+
+        element_index = self.resolve_element(long, lat, depth)
+
+        return self.extract_snapshot(cat_names, element_index)
+
+    # Method that builds a single dataframe of several categories for one element:
+    def extract_snapshot(self, cat_names, element_index):
+        '''
+        Method slices every data category in cat_names for a single element and
+        builds one dataframe from the slices.
+
+        Parameters
+        ----------
+        cat_names : list
+            The data categories (keys of self.map_dict or
+            DERIVED_VARIABLES) to extract.
+
+        element_index : int
+            An integer representing the index location of the element in the
+            dataset.
+
+        Returns
+        -------
+        snapshot_df : pandas dataframe
+            A dataframe indexed by the dataset time with one column per data
+            category.
+        '''
+        return self.extract_view(cat_names, element_index).to_dataframe()
+
+    # Method that returns the array of a data category without copying it:
+    def get_item_array(self, cat_name):
+        '''
+        Method returns the (time, elements) numpy array of a data category of the
+        dataset. The array is the dataset's own array, not a copy.
+
+        Parameters
+        ----------
+        cat_name : str
+            The data category (key of self.map_dict).
+
+        Returns
+        -------
+        item_array : numpy array
+            The (time, elements) array of the data category.
+        '''
+        return np.asarray(self.dataset[self.map_dict[cat_name]])
+
+    # Method that returns the names of every extractable variable:
+    def get_variable_names(self):
+        '''
+        Method returns the names of every variable that can be extracted from
+        the engine: the items of self.map_dict and the DERIVED_VARIABLES.
+        '''
+        return list(self.map_dict) + [name for name in DERIVED_VARIABLES
+            if name not in self.map_dict]
+
+    # Method that builds the part of a derived cache key describing a selection:
+    def build_selection_key(self, selection):
+        '''
+        Method builds a hashable key of an element or time selection: None, an
+        integer, a slice or an array of indices.
+        '''
+        if selection is None:
+            return None
+
+        if isinstance(selection, slice):
+            return ('slice', selection.start, selection.stop, selection.step)
+
+        selection = np.asarray(selection)
+
+        if selection.ndim == 0:
+            return int(selection)
+
+        return ('ids', selection.shape, hashlib.sha1(
+            np.ascontiguousarray(selection).tobytes()).hexdigest())
+
+    # Method that returns the array of an item or derived variable for a selection:
+    def get_variable_array(self, name, element_ids=None, time_slice=None):
+        '''
+        Method returns the (time, elements) array of an item or derived variable
+        for a selection of elements and timesteps.
+
+        Items are sliced from the dataset, as a view where the selection allows
+        it. Derived variables are computed from their inputs for the selection
+        only, with vectorized numpy, and memoised per file version and
+        selection in an LRU shared by every engine so that every view and export
+        of the same selection re-uses the result. Memoised arrays are read-only.
+
+        Parameters
+        ----------
+        name : str
+            The name of the item (key of self.map_dict) or derived variable (key
+            of DERIVED_VARIABLES).
+
+        element_ids : int, slice or array-like : default = None
+            The elements of the selection. If None every element is selected.
+
+        time_slice : slice : default = None
+            The timesteps of the selection. If None every timestep is selected.
+
+        Returns
+        -------
+        variable_array : numpy array
+            The array of the variable for the selection.
+
+        Raises
+        ------
+        KeyError : KeyError
+            If the name is neither an item nor a derived variable.
+        '''
+        time_slice = slice(None) if time_slice == None else time_slice
+
+        if name in self.map_dict:
+
+            item_array = self.get_item_array(name)
+
+            if element_ids is None:
+                return item_array[time_slice]
+
+            return item_array[time_slice, element_ids]
+
+        if name not in DERIVED_VARIABLES:
+            raise KeyError(f'{name} is neither an item nor a derived variable: '
+                f'{self.get_variable_names()}')
+
+        cache_key = (self.file_version, name, self.build_selection_key(element_ids),
+            self.build_selection_key(time_slice))
+
+        variable_array = dfsu_ingestion_engine.derived_cache.get(cache_key)
+
+        if variable_array is not None:
+            return variable_array
+
+        derived_variable = DERIVED_VARIABLES[name]
+
+        input_arrays = [self.get_variable_array(input_name, element_ids, time_slice)
+            for input_name in derived_variable['inputs']]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variable_array = np.asarray(derived_variable['function'](*input_arrays))
+
+        variable_array.flags.writeable = False
+
+        # Arrays larger than the bound of the derived_cache are not cached:
+        dfsu_ingestion_engine.derived_cache.put(cache_key, variable_array)
+
+        return variable_array
+
+    # Method that removes every memoised derived array:
+    @classmethod
+    def clear_derived_cache(cls):
+        '''
+        Method removes every array from the derived_cache.
+        '''
+        cls.derived_cache.clear()
+
+    # Method that returns views of several categories for one element:
+    def extract_view(self, cat_names, element_index):
+        '''
+        Method slices every data category in cat_names for a single element as
+        numpy views over the dataset's arrays. Nothing is copied and no dataframe
+        is built; the views share self.time_index. Use node_view.to_dataframe()
+        where a dataframe is needed. Derived variables are computed for the
+        element only, see get_variable_array().
+
+        Parameters
+        ----------
+        cat_names : list
+            The data categories (keys of self.map_dict or DERIVED_VARIABLES) to
+            extract.
+
+        element_index : int
+            An integer representing the index location of the element in the
+            dataset.
+
+        Returns
+        -------
+        view : node_view
+            The views of the data categories of the element.
+        '''
+        return node_view(self.time_index,
+            {cat_name: self.get_variable_array(cat_name, element_index)
+            for cat_name in cat_names},
+            element_index, self.extraction_stats)
+
     # Method that extracts data from a single category for an whole layer:
     def get_node_layers(self, long, lat):
         '''
@@ -239,7 +850,7 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
         for node in layer_coords:
 
             # Getting index for node:
-            node_index = self.find_closest_element_index(*node)
+            node_index = self.resolve_element(*node)
 
             # Adding key-value pair to layers_dict and iterating layers int for next loop:
             layer = node[2]
@@ -248,6 +859,565 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
         # data stored in layers_dict can be extracted from the datset via self.extract_data()
         return layers_dict
 
+    # Method that samples a polyline and resolves the water column stacks along it:
+    def get_transect_geometry(self, polyline, spacing):
+        '''
+        Method samples a polyline of (long, lat) vertices at a regular spacing and
+        resolves the water column (the stack of elements from the surface to the
+        bottom) under every sample in a single vectorized nearest column search.
+        The resolved geometry is cached per file version, polyline and spacing.
+
+        Columns are read from the element ordering of the mesh: the elements of
+        a column are stored contiguously from the bottom to the top element, so
+        the top_elements of the mesh delimit every column.
+
+        Parameters
+        ----------
+        polyline : list
+            A list of (long, lat) vertices of the transect.
+
+        spacing : float
+            The distance between transect samples. In metres for long/lat meshes
+            and in mesh units otherwise.
+
+        Returns
+        -------
+        geometry_dict : dict
+            A dict of {'distance': (n_samples,) distance along the polyline,
+            'long', 'lat': (n_samples,) sample coordinates, 'element_index':
+            (n_samples, n_layers) element indices ordered from the surface down,
+            'valid': (n_samples, n_layers) mask of the layers that exist in each
+            column and 'z': (n_samples, n_layers) element z values}.
+        '''
+        vertices = np.asarray(polyline, dtype=float)
+
+        if vertices.ndim != 2 or len(vertices) < 2:
+            raise ValueError('A transect polyline needs at least two (long, lat) vertices')
+
+        if spacing <= 0:
+            raise ValueError(f'The transect spacing must be positive, not {spacing}')
+
+        geometry_key = (self.file_version, vertices.tobytes(), float(spacing))
+
+        geometry_dict = dfsu_ingestion_engine.transect_cache.get(geometry_key)
+
+        if geometry_dict is not None:
+            return geometry_dict
+
+        # Scale from mesh units to metres. Long/lat is projected locally around the
+        # mean latitude of the polyline (equirectangular):
+        if self.is_geo:
+            metres_per_degree = 6371000 * math.pi / 180
+            scale = np.array([metres_per_degree * math.cos(math.radians(vertices[:, 1].mean())),
+                metres_per_degree])
+        else:
+            scale = np.ones(2)
+
+        # Sampling the polyline at the spacing, keeping the final vertex:
+        segment_lengths = np.hypot(*((np.diff(vertices, axis=0) * scale).T))
+        vertex_distance = np.concatenate([[0], np.cumsum(segment_lengths)])
+
+        distance = np.arange(0, vertex_distance[-1], spacing)
+        distance = np.append(distance, vertex_distance[-1])
+
+        sample_long = np.interp(distance, vertex_distance, vertices[:, 0])
+        sample_lat = np.interp(distance, vertex_distance, vertices[:, 1])
+
+        # Building the column stacks of the mesh:
+        if self.is_layered:
+            top_elements = np.asarray(self.top_elements)
+            bottom_elements = np.concatenate([[0], top_elements[:-1] + 1])
+        else:
+            top_elements = np.arange(self.n_elements)
+            bottom_elements = top_elements
+
+        column_layers = top_elements - bottom_elements + 1
+        n_layers = int(column_layers.max())
+
+        # Resolving the nearest column of every sample, in chunks of samples to
+        # bound the memory of the distance matrix:
+        column_coords = np.asarray(self.element_coordinates)[top_elements, :2] * scale
+        sample_coords = np.column_stack([sample_long, sample_lat]) * scale
+
+        chunk_size = max(1, 4 * 1024**2 // len(column_coords))
+        sample_columns = np.concatenate([
+            np.argmin(((sample_coords[i:i + chunk_size, None, :]
+                - column_coords[None, :, :]) ** 2).sum(axis=2), axis=1)
+            for i in range(0, len(sample_coords), chunk_size)])
+
+        # The element of every layer of every sample column, from the surface down:
+        layer_offsets = np.arange(n_layers)
+        valid = layer_offsets[None, :] < column_layers[sample_columns][:, None]
+        element_index = np.where(valid,
+            top_elements[sample_columns][:, None] - layer_offsets[None, :], -1)
+
+        z = np.where(valid,
+            np.asarray(self.element_coordinates)[np.where(valid, element_index, 0), 2],
+            np.nan)
+
+        geometry_dict = {'distance': distance, 'long': sample_long, 'lat': sample_lat,
+            'element_index': element_index, 'valid': valid, 'z': z}
+
+        dfsu_ingestion_engine.transect_cache.put(geometry_key, geometry_dict)
+
+        return geometry_dict
+
+    # Method that extracts vertical sections of several categories along a polyline:
+    def get_transect(self, polyline, spacing, cat_names):
+        '''
+        Method extracts a vertical section of every requested data category along
+        a polyline. The data of all the water columns along the polyline is
+        sliced from the dataset in one indexing operation per category.
+
+        Parameters
+        ----------
+        polyline : list
+            A list of (long, lat) vertices of the transect.
+
+        spacing : float
+            The distance between transect samples. In metres for long/lat meshes
+            and in mesh units otherwise.
+
+        cat_names : list
+            The data categories (keys of self.map_dict or
+            DERIVED_VARIABLES) to extract.
+
+        Returns
+        -------
+        transect_dict : dict
+            A dict of {'distance', 'z', 'time'} and, for every data category, a
+            (distance x depth x time) numpy array. The depth axis is ordered from
+            the surface down and layers missing from a column are NaN. The
+            geometry is described by get_transect_geometry().
+        '''
+        geometry_dict = self.get_transect_geometry(polyline, spacing)
+
+        valid = geometry_dict['valid']
+        element_index = np.where(valid, geometry_dict['element_index'], 0)
+
+        transect_dict = {'distance': geometry_dict['distance'],
+            'z': geometry_dict['z'], 'time': self.time_index}
+
+        for cat_name in cat_names:
+
+            # (time, n_samples * n_layers) slice reshaped to (distance, depth, time):
+            category_slice = self.get_variable_array(cat_name,
+                element_index.ravel()).astype(float, copy=False)
+
+            transect_data = np.moveaxis(
+                category_slice.reshape(-1, *element_index.shape), 0, -1)
+
+            transect_dict[cat_name] = np.where(valid[:, :, None], transect_data, np.nan)
+
+        return transect_dict
+
+    # Method that returns the layer of every element counted from the surface:
+    def get_element_layers(self):
+        '''
+        Method returns the layer of every element counted from the surface, where
+        0 is the surface layer. Columns are read from the element ordering of the
+        mesh (see get_transect_geometry()). For a 2D dfsu every element is in
+        layer 0.
+
+        Returns
+        -------
+        element_layers : numpy array
+            The (n_elements,) layer of each element.
+        '''
+        if not self.is_layered:
+            return np.zeros(self.n_elements, dtype=int)
+
+        top_elements = np.asarray(self.top_elements)
+
+        # The column of every element is the first column whose top is above it:
+        element_columns = np.searchsorted(top_elements, np.arange(self.n_elements))
+
+        return top_elements[element_columns] - np.arange(self.n_elements)
+
+    # Method that returns the elements of a layer:
+    def get_layer_elements(self, layer):
+        '''
+        Method returns the indices of the elements of a layer.
+
+        Parameters
+        ----------
+        layer : str or int
+            'surface', 'bottom', 'all' or the layer counted from the surface (0
+            is the surface).
+
+        Returns
+        -------
+        element_ids : numpy array
+            The sorted indices of the elements of the layer.
+        '''
+        if layer == 'all':
+            return np.arange(self.n_elements)
+
+        if layer == 'surface':
+            return self.get_surface_elements()
+
+        if layer == 'bottom':
+
+            if not self.is_layered:
+                return np.arange(self.n_elements)
+
+            return np.concatenate([[0], np.asarray(self.top_elements)[:-1] + 1])
+
+        return np.flatnonzero(self.get_element_layers() == int(layer))
+
+    # Method that returns the spatial index of the element centroids:
+    def get_spatial_index(self):
+        '''
+        Method returns a KD-tree of the (long, lat) centroids of the elements,
+        shared by every engine of the same file version. If scipy is not installed
+        None is returned and region queries fall back to a bounding box scan.
+
+        Returns
+        -------
+        spatial_index : scipy cKDTree or None
+            The KD-tree of the element centroids.
+        '''
+        if cKDTree == None:
+            return None
+
+        spatial_index = dfsu_ingestion_engine.spatial_index_cache.get(self.file_version)
+
+        if spatial_index is None:
+            spatial_index = cKDTree(np.asarray(self.element_coordinates)[:, :2])
+            dfsu_ingestion_engine.spatial_index_cache.put(self.file_version, spatial_index)
+
+        return spatial_index
+
+    # Method that selects the elements with a centroid inside a region:
+    def get_region_elements(self, region, layer='surface'):
+        '''
+        Method selects every element whose centroid lies inside a bounding box or
+        polygon. Candidate elements are found with the spatial index when scipy
+        is installed and with a vectorized bounding box test otherwise, and are
+        then tested against the polygon with a vectorized ray casting test. The
+        selection is cached per file version, region and layer.
+
+        Parameters
+        ----------
+        region : tuple or list
+            Either a bounding box (min long, min lat, max long, max lat) or a
+            polygon as a list of (long, lat) vertices.
+
+        layer : str or int : default = 'surface'
+            The layer of the selected elements: 'surface', 'bottom', 'all' or the
+            layer counted from the surface (0 is the surface).
+
+        Returns
+        -------
+        element_ids : numpy array
+            The sorted indices of the selected elements.
+        '''
+        region_array = np.asarray(region, dtype=float)
+
+        # A bounding box is turned into its polygon:
+        if region_array.ndim == 1 and len(region_array) == 4:
+            (min_long, min_lat, max_long, max_lat) = region_array
+            polygon = np.array([[min_long, min_lat], [max_long, min_lat],
+                [max_long, max_lat], [min_long, max_lat]])
+
+        elif region_array.ndim == 2 and len(region_array) >= 3:
+            polygon = region_array[:, :2]
+
+        else:
+            raise ValueError('A region must be a (min long, min lat, max long, max lat) '
+                'bounding box or a list of at least three (long, lat) vertices')
+
+        region_key = (self.file_version, polygon.tobytes(), layer)
+
+        element_ids = dfsu_ingestion_engine.region_cache.get(region_key)
+
+        if element_ids is not None:
+            return element_ids
+
+        centroids = np.asarray(self.element_coordinates)[:, :2]
+        (min_corner, max_corner) = (polygon.min(axis=0), polygon.max(axis=0))
+
+        # Finding the candidate elements within the circle around the bounding box:
+        spatial_index = self.get_spatial_index()
+
+        if spatial_index != None:
+            candidates = np.asarray(spatial_index.query_ball_point(
+                (min_corner + max_corner) / 2,
+                np.hypot(*(max_corner - min_corner)) / 2), dtype=int)
+        else:
+            candidates = np.arange(len(centroids))
+
+        candidate_coords = centroids[candidates]
+        candidates = candidates[np.all((candidate_coords >= min_corner) &
+            (candidate_coords <= max_corner), axis=1)]
+
+        # Ray casting test of every candidate against every polygon edge:
+        (x, y) = centroids[candidates].T
+        inside = np.zeros(len(candidates), dtype=bool)
+
+        for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+
+            if y1 == y2:
+                continue
+
+            crosses = ((y1 > y) != (y2 > y)) & \
+                (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)
+            inside ^= crosses
+
+        element_ids = np.sort(candidates[inside])
+
+        # Filtering the selection by layer:
+        if layer != 'all':
+            element_ids = np.intersect1d(element_ids, self.get_layer_elements(layer))
+
+        dfsu_ingestion_engine.region_cache.put(region_key, element_ids)
+
+        return element_ids
+
+    # Method that computes area weighted statistics of several categories over a region:
+    def get_region_stats(self, region, cat_names, layer='surface'):
+        '''
+        Method computes the area weighted mean and the min and max of every
+        requested data category over the elements of a region at every timestep.
+        Each category is sliced from the dataset once for all the elements of
+        the region.
+
+        Parameters
+        ----------
+        region : tuple or list
+            Either a bounding box (min long, min lat, max long, max lat) or a
+            polygon as a list of (long, lat) vertices.
+
+        cat_names : list
+            The data categories (keys of self.map_dict or
+            DERIVED_VARIABLES) to compute.
+
+        layer : str or int : default = 'surface'
+            The layer of the region. See get_region_elements().
+
+        Returns
+        -------
+        region_df : pandas dataframe
+            A dataframe indexed by the dataset time with a (category, stat) column
+            for the 'mean', 'min' and 'max' of every category. The selected
+            element indices and their total area are stored in
+            region_df.attrs['element_ids'] and region_df.attrs['area'].
+
+        Raises
+        ------
+        ValueError : ValueError
+            If no element centroid lies inside the region.
+        '''
+        element_ids = self.get_region_elements(region, layer)
+
+        if len(element_ids) == 0:
+            raise ValueError(f'No element centroid lies inside the region {region}')
+
+        element_areas = np.asarray(self.get_element_area())[element_ids]
+
+        region_data = {}
+
+        for cat_name in cat_names:
+
+            region_slice = self.get_variable_array(cat_name, element_ids)
+            valid = ~np.isnan(region_slice)
+
+            # Area weighted mean that ignores the missing values of each timestep:
+            weighted_total = np.where(valid, region_slice, 0) @ element_areas
+            valid_area = valid @ element_areas
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                region_data[(cat_name, 'mean')] = weighted_total / valid_area
+
+            region_data[(cat_name, 'min')] = np.fmin.reduce(region_slice, axis=1)
+            region_data[(cat_name, 'max')] = np.fmax.reduce(region_slice, axis=1)
+
+        self.extraction_stats['frame_builds'] += 1
+
+        region_df = pd.DataFrame(region_data, index=self.time_index,
+            columns=pd.MultiIndex.from_tuples(list(region_data), names=['category', 'stat']))
+        region_df.attrs['element_ids'] = element_ids
+        region_df.attrs['area'] = float(element_areas.sum())
+
+        return region_df
+
+    # Method that computes the interpolation weights of a set of query points:
+    def get_interpolation_weights(self, points, n_neighbours=3, layer='surface', power=2):
+        '''
+        Method computes the inverse distance weights that interpolate the element
+        values of a layer to a set of (long, lat) query points from the
+        n_neighbours nearest element centroids of each point. A point that lies
+        on a centroid takes the value of that element. The weights are cached
+        per file version, points, neighbours, layer and power.
+
+        Distances are in metres (local equirectangular projection) for long/lat
+        meshes and in mesh units otherwise.
+
+        Parameters
+        ----------
+        points : array-like
+            The (n_points, 2) (long, lat) query points.
+
+        n_neighbours : int : default = 3
+            The number of nearest elements each point is interpolated from.
+
+        layer : str or int : default = 'surface'
+            The layer the points are interpolated in. See get_layer_elements().
+
+        power : float : default = 2
+            The power of the inverse distance weighting.
+
+        Returns
+        -------
+        weights : scipy sparse matrix or dict
+            The (n_points, n_elements) sparse matrix of the weights when scipy is
+            installed, otherwise a dict of {'element_ids': (n_points,
+            n_neighbours) element indices, 'weights': (n_points, n_neighbours)
+            weights}. Apply them via apply_interpolation_weights().
+        '''
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+        weights_key = (self.file_version, points.tobytes(), n_neighbours, layer, power)
+
+        weights = dfsu_ingestion_engine.interpolation_cache.get(weights_key)
+
+        if weights is not None:
+            return weights
+
+        layer_elements = self.get_layer_elements(layer)
+        n_neighbours = min(n_neighbours, len(layer_elements))
+
+        # Scaling long/lat to metres around the mean latitude of the points:
+        if self.is_geo:
+            metres_per_degree = 6371000 * math.pi / 180
+            scale = np.array([metres_per_degree * math.cos(math.radians(points[:, 1].mean())),
+                metres_per_degree])
+        else:
+            scale = np.ones(2)
+
+        layer_coords = np.asarray(self.element_coordinates)[layer_elements, :2] * scale
+        point_coords = points * scale
+
+        # Finding the nearest layer elements of every point:
+        if cKDTree != None:
+            (distances, neighbours) = cKDTree(layer_coords).query(point_coords, k=n_neighbours)
+            (distances, neighbours) = (distances.reshape(len(points), -1),
+                neighbours.reshape(len(points), -1))
+
+        else:
+            chunk_size = max(1, 4 * 1024**2 // len(layer_coords))
+            neighbour_lst = []
+            distance_lst = []
+
+            for i in range(0, len(point_coords), chunk_size):
+
+                squared = ((point_coords[i:i + chunk_size, None, :]
+                    - layer_coords[None, :, :]) ** 2).sum(axis=2)
+                nearest = np.argpartition(squared, n_neighbours - 1, axis=1)[:, :n_neighbours]
+
+                neighbour_lst.append(nearest)
+                distance_lst.append(np.sqrt(np.take_along_axis(squared, nearest, axis=1)))
+
+            (neighbours, distances) = (np.concatenate(neighbour_lst), np.concatenate(distance_lst))
+
+        # Inverse distance weights, where a point on a centroid takes its value:
+        on_centroid = distances == 0
+
+        with np.errstate(divide='ignore'):
+            inverse_distances = np.where(on_centroid.any(axis=1)[:, None],
+                on_centroid.astype(float), 1 / distances ** power)
+
+        point_weights = inverse_distances / inverse_distances.sum(axis=1)[:, None]
+        element_ids = layer_elements[neighbours]
+
+        if sparse != None:
+            weights = sparse.csr_matrix((point_weights.ravel(),
+                (np.repeat(np.arange(len(points)), n_neighbours), element_ids.ravel())),
+                shape=(len(points), self.n_elements))
+        else:
+            weights = {'element_ids': element_ids, 'weights': point_weights}
+
+        dfsu_ingestion_engine.interpolation_cache.put(weights_key, weights)
+
+        return weights
+
+    # Method that applies interpolation weights to every timestep of a variable:
+    def apply_interpolation_weights(self, weights, cat_name):
+        '''
+        Method interpolates every timestep of an item or derived variable to the
+        query points of a set of interpolation weights, as a single sparse
+        matrix product (or a vectorized weighted sum of the neighbours when
+        scipy is not installed).
+
+        Parameters
+        ----------
+        weights : scipy sparse matrix or dict
+            The weights built via get_interpolation_weights().
+
+        cat_name : str
+            The data category (key of self.map_dict or DERIVED_VARIABLES).
+
+        Returns
+        -------
+        interpolated : numpy array
+            The (time, n_points) interpolated values.
+        '''
+        if isinstance(weights, dict):
+
+            neighbour_values = self.get_variable_array(cat_name, weights['element_ids'])
+
+            return np.einsum('tpk,pk->tp', neighbour_values, weights['weights'])
+
+        # Only the columns of elements that are used are read from the dataset:
+        used_elements = np.unique(weights.indices)
+
+        return np.asarray(weights[:, used_elements].dot(
+            self.get_variable_array(cat_name, used_elements).T)).T
+
+    # Method that extracts interpolated time series at arbitrary points:
+    def interp_node_data(self, points, cat_names, n_neighbours=3, layer='surface'):
+        '''
+        Method extracts the time series of several categories interpolated to
+        arbitrary (long, lat) points, instead of snapping each point to its
+        nearest element. The interpolation weights are computed once per set of
+        points and cached, so repeated and batched queries only cost the sparse
+        matrix product over every timestep.
+
+        Parameters
+        ----------
+        points : array-like
+            The (n_points, 2) (long, lat) query points, or a single (long, lat)
+            point.
+
+        cat_names : list
+            The data categories (keys of self.map_dict or DERIVED_VARIABLES) to
+            extract.
+
+        n_neighbours : int : default = 3
+            The number of nearest elements each point is interpolated from.
+
+        layer : str or int : default = 'surface'
+            The layer the points are interpolated in. See get_layer_elements().
+
+        Returns
+        -------
+        interp_df : pandas dataframe
+            A dataframe indexed by the dataset time with a (category, point)
+            column for every category and query point, where point is the
+            position of the point in points.
+        '''
+        weights = self.get_interpolation_weights(points, n_neighbours, layer)
+        n_points = len(np.asarray(points, dtype=float).reshape(-1, 2))
+
+        interp_data = np.hstack([self.apply_interpolation_weights(weights, cat_name)
+            for cat_name in cat_names])
+
+        self.extraction_stats['frame_builds'] += 1
+
+        return pd.DataFrame(interp_data, index=self.time_index,
+            columns=pd.MultiIndex.from_product([cat_names, range(n_points)],
+            names=['category', 'point']))
+
     # Method that extracts data in the appropriate format to be input into a polar plot:
     def get_node_polar_coords(self, long, lat, depth):
         '''
@@ -281,11 +1451,10 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
         '''
 
         # Slicing and extracting speed and directional data from the main dataset:
-        r = self.get_node_data(long, lat, depth, 'Current speed')
-        theta = self.get_node_data(long, lat, depth, 'Current direction')
+        polar_df = self.get_node_snapshot(long, lat, depth,
+            ['Current speed', 'Current direction'])
 
-        # Creating a new dataframe that contains polar coordinate data columns:
-        polar_df = pd.concat([r, theta], axis=1)
+        # Renaming the columns to polar coordinate data columns:
         polar_df.rename(columns={'Current speed': 'r', 'Current direction': 'theta'},
          inplace=True)
 
@@ -314,15 +1483,237 @@ class dfsu_ingestion_engine(mikeio.Dfsu):
             sliced via data_category and index.
         '''
 
-        # Slicing the dataset based on the category:
-        category_slice = self.dataset[self.map_dict[data_category]]
-        #print(self.map_dict[data_category])
-
-        # Slicing the dataset based on the input index:
-        index_slice = category_slice[:, element_index]
+        # Slicing the dataset based on the category and the input index as a view:
+        index_slice = self.get_item_array(data_category)[:, element_index]
 
         # Generating a pandas DataFrame based on the index_slice data:
-        slice_df = pd.DataFrame(data=index_slice, index=self.dataset.time,
-        columns=[data_category])
+        self.extraction_stats['frame_builds'] += 1
+        slice_df = pd.DataFrame(data=index_slice, index=self.time_index,
+        columns=[data_category], copy=False)
 
         return slice_df
+
+
+class dfsu_multi_run_view(object):
+    '''
+    The multi run view presents a sequence of dfsu files from consecutive model
+    runs as a single timeline. It checks that every run shares the same mesh and
+    exposes a single virtual time axis in which each run only contributes the
+    timesteps before the start of the next (newer) run, so the newest run wins
+    wherever runs overlap.
+
+    Unlike the dfsu_ingestion_engine the runs are never loaded in full. Node
+    extraction reads only the requested items of the resolved element from each
+    file, in parallel on a thread pool, and stitches the results.
+
+    Parameters
+    ----------
+    filepaths : list
+        The filepaths of the .dfsu files ordered from the oldest to the newest
+        run, e.g. from file_query_api.get_client_data_paths().
+
+    max_workers : int : default = 4
+        The number of files read in parallel.
+
+    map_dict : dict : default = None
+        The item re-mapping dict. Defaults to DFSU_ITEM_MAP.
+    '''
+    def __init__(self, filepaths, max_workers=4, map_dict=None):
+
+        # Instance Variables:
+        self.filepaths = list(filepaths)
+        self.max_workers = max_workers
+        self.map_dict = dict(DFSU_ITEM_MAP) if map_dict == None else map_dict
+
+        # Reading the mesh and time axis of every run and checking they match:
+        self.run_times = self.check_runs()
+
+        # The first run's Dfsu object provides the mesh used to resolve elements:
+        self.mesh_engine = self.run_engines[0]
+
+    # Constructor that builds a view of every run of a client in a file directory:
+    @classmethod
+    def from_file_query(cls, file_query, client_name, max_workers=4):
+        '''
+        Method builds a multi run view of every dfsu file of a client found by
+        the file_query_api, ordered by the date folder of each run.
+
+        Parameters
+        ----------
+        file_query : file_query_api
+            The file query api of the file directory.
+
+        client_name : str
+            The client name of the dfsu files.
+
+        max_workers : int : default = 4
+            The number of files read in parallel.
+
+        Returns
+        -------
+        view : dfsu_multi_run_view
+            The view of every run of the client.
+        '''
+        # The yyyymmddhh date folder in each path orders the runs:
+        filepaths = sorted(file_query.get_client_data_paths(client_name, file_type='.dfsu'))
+
+        return cls(filepaths, max_workers=max_workers)
+
+    # Method that reads the items of a set of elements from a single run:
+    def read_run(self, filepath, cat_names, element_ids):
+        '''
+        Method reads only the requested items of the requested elements from a
+        dfsu file.
+
+        Parameters
+        ----------
+        filepath : str
+            The filepath of the .dfsu file.
+
+        cat_names : list
+            The data categories (keys of self.map_dict) to read.
+
+        element_ids : list
+            The indices of the elements to read.
+
+        Returns
+        -------
+        run_read : tuple
+            A tuple of (mikeio Dfsu object, mikeio Dataset) of the read.
+        '''
+        run_engine = mikeio.Dfsu()
+
+        dataset = run_engine.read(filepath,
+            items=[self.map_dict[cat_name] for cat_name in cat_names],
+            elements=list(element_ids))
+
+        return (run_engine, dataset)
+
+    # Method that checks every run shares one mesh and builds the run time axes:
+    def check_runs(self):
+        '''
+        Method reads the first item of a single element from every run, in
+        parallel, to obtain each run's mesh and time axis. The mesh signature of
+        every run is compared to the first run.
+
+        Returns
+        -------
+        run_times : list
+            The DatetimeIndex of each run, in the order of self.filepaths.
+
+        Raises
+        ------
+        ValueError : ValueError
+            If no files are given or a run does not share the mesh of the first
+            run.
+        '''
+        if len(self.filepaths) == 0:
+            raise ValueError('A multi run view needs at least one dfsu file')
+
+        first_cat = next(iter(self.map_dict))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            run_reads = list(executor.map(
+                lambda filepath: self.read_run(filepath, [first_cat], [0]),
+                self.filepaths))
+
+        self.run_engines = [run_engine for (run_engine, dataset) in run_reads]
+
+        mesh_signatures = [
+            hashlib.sha1(np.ascontiguousarray(run_engine.element_coordinates).tobytes()
+            ).hexdigest() for run_engine in self.run_engines]
+
+        mismatched = [filepath for filepath, signature in
+            zip(self.filepaths, mesh_signatures) if signature != mesh_signatures[0]]
+
+        if mismatched:
+            raise ValueError(f'Runs do not share the mesh of {self.filepaths[0]}: {mismatched}')
+
+        self.mesh_signature = mesh_signatures[0]
+
+        return [pd.DatetimeIndex(dataset.time) for (run_engine, dataset) in run_reads]
+
+    # Method that returns the mask of the timesteps each run contributes:
+    def get_run_masks(self):
+        '''
+        Method returns, for every run, the boolean mask of its timesteps that are
+        part of the virtual time axis: the timesteps before the first timestep
+        of the next run. The newest run contributes all of its timesteps.
+
+        Returns
+        -------
+        run_masks : list
+            A boolean numpy array per run.
+        '''
+        run_masks = []
+
+        for i, run_time in enumerate(self.run_times):
+
+            if i + 1 < len(self.run_times):
+                run_masks.append(np.asarray(run_time < self.run_times[i + 1][0]))
+            else:
+                run_masks.append(np.ones(len(run_time), dtype=bool))
+
+        return run_masks
+
+    # Method that returns the virtual time axis of the view:
+    def get_time_axis(self):
+        '''
+        Method returns the single virtual time axis of the stitched runs.
+
+        Returns
+        -------
+        time_axis : pandas DatetimeIndex
+            The timesteps of every run where the newest run wins.
+        '''
+        return pd.DatetimeIndex(np.concatenate([
+            run_time.values[run_mask] for run_time, run_mask in
+            zip(self.run_times, self.get_run_masks())]))
+
+    # Method that extracts the stitched timeline of several categories at a point:
+    def get_node_data(self, long, lat, depth, cat_names):
+        '''
+        Method resolves the element closest to a location point once, reads only
+        that element's requested categories from every run in parallel and
+        stitches the runs into a single timeline where the newest run wins.
+
+        Parameters
+        ----------
+        long : float
+            The longnitude value of the location point
+
+        lat : float
+            The latitude value of the location point
+
+        depth : float
+            The depth value of the location point
+
+        cat_names : list
+            The data categories (keys of self.map_dict) to extract.
+
+        Returns
+        -------
+        timeline_df : pandas dataframe
+            A dataframe indexed by the virtual time axis with one column per
+            data category.
+        '''
+        element_index = self.mesh_engine.find_closest_element_index(long, lat, depth)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            run_reads = list(executor.map(
+                lambda filepath: self.read_run(filepath, cat_names, [element_index]),
+                self.filepaths))
+
+        run_masks = self.get_run_masks()
+
+        timeline_data = {
+            cat_name: np.concatenate([
+                np.asarray(dataset[self.map_dict[cat_name]])[:, 0][run_mask]
+                for (run_engine, dataset), run_mask in zip(run_reads, run_masks)])
+            for cat_name in cat_names}
+
+        timeline_df = pd.DataFrame(timeline_data, index=self.get_time_axis(),
+            columns=cat_names)
+        timeline_df.attrs['element_index'] = element_index
+
+        return timeline_df
@@ -0,0 +1,251 @@
+# Importing file management packages:
+import os
+import shutil
+import tempfile
+
+# Importing threading packages:
+import threading
+import queue
+
+# Object that copies upcoming dfs files to local scratch on a background thread:
+class dfs_prefetch_reader(object):
+    """
+    This object is an iterator over an ordered list of dfs file paths that reads
+    the raw bytes of the upcoming files into local scratch on a background thread
+    while the current file is being decoded. This keeps the network share busy
+    during decoding so that the next decode starts from a warm local copy.
+
+    The number of files held in scratch ahead of the consumer is bounded by the
+    lookahead window. Each scratch copy is deleted once the consumer moves on to
+    the next file. If a file cannot be copied, or the prefetch filter fails for
+    it, the original path is yielded so the consumer falls back to reading the
+    file directly.
+
+    The reader is designed to wrap any loop over ordered dfs paths, such as the
+    seven day forecast build, file_query_api.get_dfs0_list() or an archive
+    backfill:
+
+    >>> with dfs_prefetch_reader(paths, lookahead=2) as reader:
+    ...     for path, local_path in reader:
+    ...         df = dfs0_ingestion_engine(local_path).main_df
+
+    Parameters
+    ----------
+    paths : list
+        The ordered list of file paths that will be read.
+
+    lookahead : int : default = 2
+        The maximum number of files copied into scratch ahead of the file
+        currently being consumed.
+
+    scratch_dir : str : default = None
+        The local directory the scratch copies are written to. By default a
+        temporary directory is created and removed when the reader is closed.
+
+    prefetch_filter : callable : default = None
+        An optional function of (path) that returns False for paths that should
+        not be prefetched, such as files that are already checkpointed. These
+        paths are yielded as their own local path without being copied.
+    """
+    def __init__(self, paths, lookahead=2, scratch_dir=None, prefetch_filter=None):
+
+        # Declaring instance variables:
+        self.paths = list(paths)
+        self.lookahead = max(1, lookahead)
+        self.prefetch_filter = prefetch_filter
+
+        # Creating a private scratch directory if one is not given:
+        self.owns_scratch_dir = scratch_dir == None
+        self.scratch_dir = tempfile.mkdtemp(prefix='dfs_prefetch_') if scratch_dir == None \
+            else scratch_dir
+
+        # Key-Value store of {path: error} for files that could not be prefetched:
+        self.errors = {}
+
+        # Background thread state:
+        self.slots = threading.Semaphore(self.lookahead)
+        self.ready_queue = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.current_copy = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.paths)
+
+    # Method that yields (path, local path) tuples in the order of self.paths:
+    def __iter__(self):
+        '''
+        Generator that starts the background thread and yields a tuple of
+        (original path, local path) for each path in order. The local path is
+        the scratch copy of the file if it was prefetched or the original path
+        otherwise.
+        '''
+        self.start()
+
+        try:
+            for i in range(len(self.paths)):
+
+                ready_item = self.ready_queue.get()
+
+                # Re-raising an error that stopped the background thread:
+                if isinstance(ready_item, BaseException):
+                    raise ready_item
+
+                (path, local_path) = ready_item
+
+                # Removing the copy of the previous file once it has been consumed:
+                self.release_current()
+
+                if local_path != path:
+                    self.current_copy = local_path
+
+                yield (path, local_path)
+
+            self.release_current()
+
+        finally:
+            self.close()
+
+    # Method that starts the background prefetch thread:
+    def start(self):
+        '''
+        Method starts the daemon thread that copies files into scratch. It is
+        called on the first iteration of the reader.
+        '''
+        if self.thread != None:
+            return
+
+        self.thread = threading.Thread(target=self.prefetch_files, daemon=True)
+        self.thread.start()
+
+    # Method run by the background thread to copy each path into scratch:
+    def prefetch_files(self):
+        '''
+        Method run on the background thread. It prefetches each path in order via
+        prefetch_path(). If the thread fails outside of a single path the error
+        is placed on the ready queue so the consumer re-raises it instead of
+        waiting forever.
+        '''
+        try:
+            for i, path in enumerate(self.paths):
+                if not self.prefetch_path(i, path):
+                    return
+
+        except BaseException as error:
+            self.ready_queue.put(error)
+
+    # Method that copies a single path into scratch:
+    def prefetch_path(self, i, path):
+        '''
+        Method copies a path into the scratch directory, waiting for a free
+        lookahead slot before the copy, and places the (path, local path) tuple
+        on the ready queue. If the prefetch filter or the copy fails the error
+        is recorded in self.errors and the original path is passed through.
+
+        Parameters
+        ----------
+        i : int
+            The position of the path in self.paths.
+
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        continue_prefetch : bool
+            False if the reader was closed while waiting for a slot.
+        '''
+        slot_acquired = False
+        local_path = path
+
+        try:
+            # Paths that are filtered out are passed through without a copy:
+            if self.prefetch_filter != None and not self.prefetch_filter(path):
+                self.ready_queue.put((path, path))
+                return True
+
+            # Waiting until the consumer has released a lookahead slot:
+            while not self.slots.acquire(timeout=0.1):
+                if self.stop_event.is_set():
+                    return False
+
+            slot_acquired = True
+
+            if self.stop_event.is_set():
+                self.slots.release()
+                return False
+
+            # Prefixing the index to keep copies of identically named files apart:
+            local_path = os.path.join(self.scratch_dir, f'{i}_{os.path.basename(path)}')
+
+            shutil.copyfile(path, local_path)
+
+        except Exception as error:
+
+            # Falling back to reading the original file directly:
+            self.errors[path] = error
+
+            if slot_acquired:
+                self.slots.release()
+
+            if local_path != path and os.path.exists(local_path):
+                os.remove(local_path)
+
+            local_path = path
+
+        self.ready_queue.put((path, local_path))
+
+        return True
+
+    # Method that deletes the scratch copy of the file that was last consumed:
+    def release_current(self):
+        '''
+        Method deletes the scratch copy of the most recently yielded file and
+        frees its lookahead slot.
+        '''
+        if self.current_copy == None:
+            return
+
+        try:
+            os.remove(self.current_copy)
+        except OSError:
+            pass
+
+        self.current_copy = None
+        self.slots.release()
+
+    # Method that stops the background thread and removes all scratch copies:
+    def close(self):
+        '''
+        Method stops the background thread and removes every scratch copy that
+        has not been consumed. The scratch directory is removed if it was created
+        by the reader.
+        '''
+        self.stop_event.set()
+
+        if self.thread != None:
+            self.thread.join()
+
+        self.release_current()
+
+        # Removing copies that were prefetched but never consumed:
+        while not self.ready_queue.empty():
+
+            ready_item = self.ready_queue.get()
+
+            if isinstance(ready_item, BaseException):
+                continue
+
+            (path, local_path) = ready_item
+
+            if local_path != path and os.path.exists(local_path):
+                os.remove(local_path)
+
+        if self.owns_scratch_dir:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
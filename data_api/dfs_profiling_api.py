@@ -0,0 +1,421 @@
+# Importing profiling packages:
+import tracemalloc
+import time
+# Importing file and process management packages:
+import os
+import sys
+import json
+import threading
+import functools
+import weakref
+from contextlib import contextmanager
+
+# The environment variable that enables the shared memory profiler. Set it to 1
+# to enable profiling or to a file path to also set the report path:
+PROFILE_ENV_VAR = 'DFS_MEMORY_PROFILE'
+
+# The environment variable of the RSS threshold (in MB) that triggers a report:
+PROFILE_RSS_ENV_VAR = 'DFS_MEMORY_PROFILE_RSS_MB'
+
+# Object that records the memory used by each stage of the data apis:
+class memory_profiler(object):
+    """
+    This object is the opt-in memory profiler of the data_api. When enabled it
+    records, for every profiled stage (loading a dfsu file, concatenating a
+    forecast, rendering a dashboard, ...), the peak and retained python memory
+    traced by tracemalloc and the resident set size (RSS) of the process before
+    and after the stage. Each record is attributed to the object that ran the
+    stage and to the file it was working on.
+
+    Objects that hold memory can also be registered as sources (e.g. the loaded
+    dataset of an engine or the payloads of a figure cache) so that the report
+    shows what is holding the memory at the time it is written. Sources are held
+    by weak reference and are dropped once their object is garbage collected.
+
+    A report is written on demand via dump_report() or automatically when a
+    stage ends above the RSS or retained memory thresholds.
+
+    When the profiler is disabled profiled stages run without any tracing.
+    Tracing is process wide, so stages that run at the same time on several
+    threads are attributed each other's allocations.
+
+    >>> profiler = memory_profiler(enabled=True, rss_threshold=2 * 1024**3)
+    >>> with profiler.stage('load', owner=engine, filepath=engine.filepath):
+    ...     engine.dataset = engine.read(engine.filepath)
+    >>> profiler.dump_report('memory_report.json')
+
+    Parameters
+    ----------
+    enabled : bool : default = None
+        If the profiler records stages. If None it is enabled when the
+        DFS_MEMORY_PROFILE environment variable is set to a non empty value
+        other than 0.
+
+    rss_threshold : int : default = None
+        The RSS in bytes above which a report is written at the end of a stage.
+        If None it is read from DFS_MEMORY_PROFILE_RSS_MB.
+
+    retained_threshold : int : default = None
+        The memory in bytes retained by a single stage above which a report is
+        written at the end of the stage.
+
+    report_path : str : default = None
+        The path reports are written to. If None it is the value of
+        DFS_MEMORY_PROFILE when that is not 1, otherwise
+        'dfs_memory_report_<pid>.json'.
+
+    max_records : int : default = 1000
+        The number of most recent stage records that are kept.
+    """
+    def __init__(self, enabled=None, rss_threshold=None, retained_threshold=None,
+        report_path=None, max_records=1000):
+
+        env_value = os.environ.get(PROFILE_ENV_VAR, '')
+
+        # Declaring instance variables:
+        self.enabled = env_value not in ('', '0', 'false', 'False') if enabled == None \
+            else enabled
+        self.rss_threshold = rss_threshold
+        self.retained_threshold = retained_threshold
+        self.max_records = max_records
+
+        if self.rss_threshold == None and os.environ.get(PROFILE_RSS_ENV_VAR):
+            self.rss_threshold = int(float(os.environ[PROFILE_RSS_ENV_VAR]) * 1024**2)
+
+        if report_path == None:
+            report_path = env_value if env_value not in ('', '0', '1', 'true', 'True',
+                'false', 'False') else f'dfs_memory_report_{os.getpid()}.json'
+
+        self.report_path = report_path
+
+        # The stage records, the registered sources and the stack of open stages
+        # of each thread:
+        self.records = []
+        self.sources = {}
+        self.lock = threading.RLock()
+        self.local = threading.local()
+
+        if self.enabled:
+            self.enable()
+
+    # Method that starts tracing:
+    def enable(self):
+        '''
+        Method enables the profiler and starts tracemalloc if it is not already
+        tracing.
+        '''
+        self.enabled = True
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # Method that stops tracing:
+    def disable(self):
+        '''
+        Method disables the profiler and stops tracemalloc.
+        '''
+        self.enabled = False
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # Method that returns the resident set size of the process:
+    def get_rss(self):
+        '''
+        Method returns the current resident set size of the process in bytes,
+        read from /proc/self/statm. Where /proc is not available the peak RSS
+        reported by the resource module is returned instead.
+
+        Returns
+        -------
+        rss : int
+            The RSS in bytes, or None if it cannot be read.
+        '''
+        try:
+            with open('/proc/self/statm', 'r') as statm_file:
+                return int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+        except (OSError, ValueError, AttributeError):
+            pass
+
+        try:
+            import resource
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            # ru_maxrss is in bytes on macOS and in kilobytes elsewhere:
+            return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+        except ImportError:
+            return None
+
+    # Method that builds the label an object is attributed by:
+    def get_owner_label(self, owner):
+        '''
+        Method returns the label of the object a record or source is attributed
+        to: its class name and id.
+        '''
+        if owner == None:
+            return None
+
+        return f'{type(owner).__name__}@{id(owner):x}'
+
+    # Method that registers an object that holds memory:
+    def register_source(self, name, owner, measure, filepath=None):
+        '''
+        Method registers a source of memory that is measured each time a report
+        is built. Registering the same name for the same owner again replaces
+        the previous source.
+
+        Parameters
+        ----------
+        name : str
+            The name of the source, e.g. 'dataset'.
+
+        owner : object
+            The object holding the memory.
+
+        measure : callable
+            A function that takes the owner and returns the size of the source
+            in bytes.
+
+        filepath : str : default = None
+            The file the memory was read from.
+        '''
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.sources[(name, self.get_owner_label(owner))] = {'name': name,
+                'owner': self.get_owner_label(owner), 'filepath': filepath,
+                'owner_ref': weakref.ref(owner), 'measure': measure}
+
+    # Context manager that records the memory of a stage:
+    @contextmanager
+    def stage(self, stage_name, owner=None, filepath=None):
+        '''
+        Context manager that records the peak and retained traced memory and the
+        RSS before and after the code it wraps. Nested stages are supported; the
+        peak of an outer stage includes the peaks of its inner stages.
+
+        Parameters
+        ----------
+        stage_name : str
+            The name of the stage.
+
+        owner : object : default = None
+            The object running the stage, e.g. the engine or dashboard.
+
+        filepath : str : default = None
+            The file the stage is working on.
+        '''
+        if not self.enabled or not tracemalloc.is_tracing():
+            yield None
+            return
+
+        stack = self.local.__dict__.setdefault('stack', [])
+
+        (start_bytes, peak_bytes) = tracemalloc.get_traced_memory()
+
+        # Handing the peak so far to the enclosing stage before it is reset:
+        if stack:
+            stack[-1]['peak_bytes'] = max(stack[-1]['peak_bytes'], peak_bytes)
+
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+
+        frame = {'start_bytes': start_bytes, 'peak_bytes': 0}
+        stack.append(frame)
+
+        rss_before = self.get_rss()
+        start_time = time.perf_counter()
+
+        try:
+            yield frame
+
+        finally:
+            (end_bytes, peak_bytes) = tracemalloc.get_traced_memory()
+            stack.pop()
+
+            peak_bytes = max(frame['peak_bytes'], peak_bytes)
+
+            if stack:
+                stack[-1]['peak_bytes'] = max(stack[-1]['peak_bytes'], peak_bytes)
+
+            self.add_record({'stage': stage_name, 'depth': len(stack),
+                'owner': self.get_owner_label(owner), 'filepath': filepath,
+                'peak_bytes': peak_bytes - start_bytes,
+                'retained_bytes': end_bytes - start_bytes,
+                'rss_before': rss_before, 'rss_after': self.get_rss(),
+                'seconds': time.perf_counter() - start_time,
+                'time': time.time()})
+
+    # Method that stores a record and checks it against the thresholds:
+    def add_record(self, record):
+        '''
+        Method stores a stage record and writes a report if the record crosses
+        the RSS or retained memory threshold.
+
+        Parameters
+        ----------
+        record : dict
+            The stage record built by stage().
+        '''
+        with self.lock:
+
+            self.records.append(record)
+            del self.records[:-self.max_records]
+
+        crossed = []
+
+        if self.rss_threshold != None and record['rss_after'] != None and \
+            record['rss_after'] > self.rss_threshold:
+            crossed.append(f"RSS {record['rss_after']} > {self.rss_threshold} bytes")
+
+        if self.retained_threshold != None and \
+            record['retained_bytes'] > self.retained_threshold:
+            crossed.append(f"retained {record['retained_bytes']} > {self.retained_threshold} bytes")
+
+        if crossed:
+            report_path = self.dump_report()
+            print(f"[MEMORY THRESHOLD]: {record['stage']} ({record['owner']}, "
+                f"{record['filepath']}) {', '.join(crossed)}; report written to {report_path}")
+
+    # Method that builds the memory report:
+    def get_report(self, top_allocations=10):
+        '''
+        Method builds the memory report: the current RSS and traced memory, the
+        size of every registered source, the totals of the stage records per
+        owner and file, the stage records and the source lines holding the most
+        traced memory.
+
+        Parameters
+        ----------
+        top_allocations : int : default = 10
+            The number of source lines with the most traced memory reported.
+
+        Returns
+        -------
+        report_dict : dict
+            The memory report.
+        '''
+        with self.lock:
+            records = list(self.records)
+            sources = list(self.sources.values())
+
+        source_lst = []
+
+        for source in sources:
+
+            owner = source['owner_ref']()
+
+            # Dropping the sources of objects that no longer exist:
+            if owner == None:
+                with self.lock:
+                    self.sources.pop((source['name'], source['owner']), None)
+                continue
+
+            try:
+                source_bytes = source['measure'](owner)
+            except Exception as error:
+                source_bytes = f'unavailable: {error}'
+
+            source_lst.append({'name': source['name'], 'owner': source['owner'],
+                'filepath': source['filepath'], 'bytes': source_bytes})
+
+        # Summing the records of every owner and file:
+        owner_totals = {}
+
+        for record in records:
+
+            totals = owner_totals.setdefault(f"{record['owner']}|{record['filepath']}",
+                {'owner': record['owner'], 'filepath': record['filepath'], 'stages': 0,
+                'retained_bytes': 0, 'max_peak_bytes': 0})
+
+            totals['stages'] += 1
+
+            # Nested stages are already included in their enclosing stage:
+            if record['depth'] == 0:
+                totals['retained_bytes'] += record['retained_bytes']
+
+            totals['max_peak_bytes'] = max(totals['max_peak_bytes'], record['peak_bytes'])
+
+        report_dict = {'pid': os.getpid(), 'time': time.time(), 'rss': self.get_rss(),
+            'traced_bytes': None, 'traced_peak_bytes': None, 'sources': source_lst,
+            'owners': list(owner_totals.values()), 'stages': records,
+            'top_allocations': []}
+
+        if tracemalloc.is_tracing():
+
+            (report_dict['traced_bytes'], report_dict['traced_peak_bytes']) = \
+                tracemalloc.get_traced_memory()
+
+            report_dict['top_allocations'] = [
+                {'location': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                for stat in tracemalloc.take_snapshot().statistics('lineno')[:top_allocations]]
+
+        return report_dict
+
+    # Method that writes the memory report to a file:
+    def dump_report(self, report_path=None):
+        '''
+        Method writes the memory report as JSON.
+
+        Parameters
+        ----------
+        report_path : str : default = None
+            The path of the report. If None self.report_path is used.
+
+        Returns
+        -------
+        report_path : str
+            The path the report was written to.
+        '''
+        report_path = self.report_path if report_path == None else report_path
+
+        with open(report_path, 'w') as report_file:
+            json.dump(self.get_report(), report_file, indent=2, default=str)
+
+        return report_path
+
+    # Method that removes every record and source:
+    def clear(self):
+        '''
+        Method removes every stage record and registered source.
+        '''
+        with self.lock:
+            self.records = []
+            self.sources = {}
+
+
+# The profiler shared by the data apis. It is enabled by the DFS_MEMORY_PROFILE
+# environment variable or via shared_memory_profiler.enable():
+shared_memory_profiler = memory_profiler()
+
+# Decorator that profiles a method as a stage of the shared memory profiler:
+def profiled_stage(stage_name):
+    '''
+    Decorator that runs a method as a stage of the shared_memory_profiler. The
+    stage is attributed to the object the method is called on (self) and to its
+    filepath attribute if it has one. When the profiler is disabled the method
+    is called directly.
+
+    Parameters
+    ----------
+    stage_name : str
+        The name of the stage.
+    '''
+    def decorator(method):
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+
+            if not shared_memory_profiler.enabled:
+                return method(self, *args, **kwargs)
+
+            with shared_memory_profiler.stage(stage_name, owner=self,
+                filepath=getattr(self, 'filepath', None)):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
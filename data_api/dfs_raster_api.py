@@ -0,0 +1,401 @@
+# Importing data management packages:
+import numpy as np
+import pandas as pd
+# Importing file management packages:
+import os
+import hashlib
+# Importing data visualization packages:
+import plotly.graph_objects as go
+# Importing the LRU store shared with the dfsu ingestion engine caches:
+from data_api.dfs_ingestion_api import lru_cache_store
+
+# The scipy KD-tree is used for the lookup tables when it is installed:
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Object that rasterises the surface layer of a dfsu file onto a regular grid:
+class surface_rasterizer(object):
+    """
+    This object interpolates the surface layer of a dfsu file onto a regular
+    long/lat grid for each timestep so that spatial fields such as surface
+    temperature can be animated as images instead of sending every element
+    value of every timestep to plotly.
+
+    The interpolation is driven by an element-to-pixel lookup table that is
+    computed once per mesh and grid: each pixel stores the indices of its
+    n_neighbours nearest surface elements and their inverse distance weights.
+    Pixels further than max_distance from any element (land or outside the
+    mesh) are masked. Rasterising a timestep is then a single gather and
+    weighted sum. Lookup tables are cached in memory and, if a cache_dir is
+    given, on disk.
+
+    Rasterised frames are quantized to 16 bit integers and written to a
+    compressed npz store with one member per frame, which surface_frame_store
+    reads one frame at a time.
+
+    Parameters
+    ----------
+    mesh_engine : dfsu_ingestion_engine
+        The ingestion engine of the dfsu file being rasterised.
+
+    shape : tuple : default = (256, 256)
+        The (rows, columns) of the raster grid.
+
+    bounds : tuple : default = None
+        The (min long, min lat, max long, max lat) of the grid. By default the
+        bounding box of the surface elements.
+
+    n_neighbours : int : default = 1
+        The number of nearest surface elements interpolated into each pixel. 1
+        gives nearest element rasters.
+
+    max_distance : float : default = None
+        The distance in degrees beyond which a pixel is masked. By default twice
+        the average surface element spacing.
+
+    cache_dir : str : default = None
+        The directory the lookup tables are cached in across processes.
+    """
+    # LRU store of {lookup key: (indices, weights, mask)} shared by every
+    # rasterizer in the process, bounded by the total size of the tables:
+    lookup_cache = lru_cache_store(None, max_bytes=256 * 1024**2,
+        sizeof=lambda lookup_table: sum(array.nbytes for array in lookup_table))
+
+    def __init__(self, mesh_engine, shape=(256, 256), bounds=None, n_neighbours=1,
+        max_distance=None, cache_dir=None):
+
+        # Declaring instance variables:
+        self.mesh_engine = mesh_engine
+        self.shape = shape
+        self.n_neighbours = n_neighbours
+        self.cache_dir = cache_dir
+
+        # Extracting the surface element centroids from the mesh:
+        self.surface_elements = self.mesh_engine.get_surface_elements()
+        self.surface_coords = np.asarray(
+            self.mesh_engine.element_coordinates)[self.surface_elements, :2]
+
+        if bounds == None:
+            bounds = tuple(np.r_[self.surface_coords.min(axis=0),
+                self.surface_coords.max(axis=0)])
+
+        self.bounds = bounds
+
+        # Defaulting the mask distance to twice the average element spacing:
+        if max_distance == None:
+            bbox_area = (bounds[2] - bounds[0]) * (bounds[3] - bounds[1])
+            max_distance = 2 * np.sqrt(bbox_area / max(1, len(self.surface_coords)))
+
+        self.max_distance = max_distance
+
+        (self.indices, self.weights, self.mask) = self.get_lookup_table()
+
+    # Method that returns the long and lat of the centre of each pixel column and row:
+    def get_pixel_centers(self):
+        '''
+        Method returns the long values of the pixel columns and the lat values of
+        the pixel rows of the raster grid.
+
+        Returns
+        -------
+        pixel_centers : tuple
+            A tuple of (long array, lat array).
+        '''
+        (min_long, min_lat, max_long, max_lat) = self.bounds
+        (n_rows, n_cols) = self.shape
+
+        long_step = (max_long - min_long) / n_cols
+        lat_step = (max_lat - min_lat) / n_rows
+
+        pixel_long = min_long + (np.arange(n_cols) + 0.5) * long_step
+        pixel_lat = min_lat + (np.arange(n_rows) + 0.5) * lat_step
+
+        return (pixel_long, pixel_lat)
+
+    # Method that returns the cached lookup table or computes it:
+    def get_lookup_table(self):
+        '''
+        Method returns the element-to-pixel lookup table of the mesh and grid,
+        from the in-process cache, the cache directory or by computing it via
+        build_lookup_table().
+
+        Returns
+        -------
+        lookup_table : tuple
+            A tuple of (indices, weights, mask) where indices and weights are
+            (pixels x n_neighbours) arrays and mask is a boolean array of the
+            pixels inside the mesh.
+        '''
+        lookup_hash = hashlib.sha1(np.ascontiguousarray(self.surface_coords).tobytes())
+        lookup_hash.update(repr((self.shape, self.bounds, self.n_neighbours,
+            self.max_distance)).encode())
+
+        lookup_key = lookup_hash.hexdigest()
+
+        lookup_table = surface_rasterizer.lookup_cache.get(lookup_key)
+
+        if lookup_table != None:
+            return lookup_table
+
+        lookup_path = None if self.cache_dir == None else \
+            os.path.join(self.cache_dir, f'raster_lookup_{lookup_key}.npz')
+
+        if lookup_path != None and os.path.exists(lookup_path):
+
+            with np.load(lookup_path) as lookup_file:
+                lookup_table = (lookup_file['indices'], lookup_file['weights'],
+                    lookup_file['mask'])
+
+        else:
+
+            lookup_table = self.build_lookup_table()
+
+            if lookup_path != None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez_compressed(lookup_path, indices=lookup_table[0],
+                    weights=lookup_table[1], mask=lookup_table[2])
+
+        surface_rasterizer.lookup_cache.put(lookup_key, lookup_table)
+
+        return lookup_table
+
+    # Method that computes the nearest surface elements and weights of each pixel:
+    def build_lookup_table(self):
+        '''
+        Method finds the n_neighbours nearest surface elements of every pixel
+        and computes their normalized inverse distance weights. A KD-tree is
+        used when scipy is installed, otherwise the distances are computed in
+        vectorized chunks of pixels.
+
+        Returns
+        -------
+        lookup_table : tuple
+            A tuple of (indices, weights, mask). See get_lookup_table().
+        '''
+        (pixel_long, pixel_lat) = self.get_pixel_centers()
+        (grid_long, grid_lat) = np.meshgrid(pixel_long, pixel_lat)
+        pixels = np.c_[grid_long.ravel(), grid_lat.ravel()]
+
+        k = min(self.n_neighbours, len(self.surface_coords))
+
+        if cKDTree != None:
+
+            (distances, indices) = cKDTree(self.surface_coords).query(pixels, k=k)
+            (distances, indices) = (distances.reshape(len(pixels), k),
+                indices.reshape(len(pixels), k))
+
+        else:
+
+            distances = np.empty((len(pixels), k))
+            indices = np.empty((len(pixels), k), dtype=np.int64)
+
+            # Bounding the memory of the coordinate differences to ~64 MB per chunk:
+            chunk_size = max(1, 4 * 1024**2 // len(self.surface_coords))
+
+            for start in range(0, len(pixels), chunk_size):
+
+                chunk = pixels[start:start + chunk_size]
+                chunk_distances = np.sqrt(
+                    ((chunk[:, None, :] - self.surface_coords[None, :, :])**2).sum(axis=2))
+
+                nearest = np.argpartition(chunk_distances, k - 1, axis=1)[:, :k]
+                nearest_distances = np.take_along_axis(chunk_distances, nearest, axis=1)
+
+                # Ordering the neighbours from the nearest, as the KD-tree does:
+                order = np.argsort(nearest_distances, axis=1)
+
+                indices[start:start + chunk_size] = np.take_along_axis(nearest, order, axis=1)
+                distances[start:start + chunk_size] = np.take_along_axis(
+                    nearest_distances, order, axis=1)
+
+        # Masking pixels that are not close to any element:
+        mask = distances[:, 0] <= self.max_distance
+
+        # Inverse distance weights, an exact hit takes the full weight:
+        weights = 1 / np.maximum(distances, 1e-12)
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        return (indices.astype(np.int32), weights.astype(np.float32), mask)
+
+    # Method that rasterises the surface values of a single timestep:
+    def rasterise(self, surface_values):
+        '''
+        Method interpolates the values of the surface elements of one timestep
+        onto the raster grid.
+
+        Parameters
+        ----------
+        surface_values : numpy array
+            The values of each surface element, in the order of
+            self.surface_elements.
+
+        Returns
+        -------
+        frame : numpy array
+            A (rows x columns) float32 array. Masked pixels are NaN.
+        '''
+        frame = (np.asarray(surface_values, dtype=np.float32)[self.indices] *
+            self.weights).sum(axis=1)
+
+        frame[~self.mask] = np.nan
+
+        return frame.reshape(self.shape)
+
+    # Method that rasterises every timestep of a category and writes a frame store:
+    def write_frames(self, cat_name, store_path, time_steps=None):
+        '''
+        Method rasterises the surface layer of a data category for each timestep
+        and writes the frames to a compressed npz frame store. Frames are
+        quantized to uint16 between the minimum and maximum of the category,
+        with 65535 marking masked pixels.
+
+        Parameters
+        ----------
+        cat_name : str
+            The data category (key of the engine's map_dict) to rasterise.
+
+        store_path : str
+            The path of the npz file the frames are written to.
+
+        time_steps : list : default = None
+            The indices of the timesteps to rasterise. By default every timestep.
+
+        Returns
+        -------
+        frame_store : surface_frame_store
+            The reader of the written frame store.
+        '''
+        item_data = self.mesh_engine.dataset[self.mesh_engine.map_dict[cat_name]]
+        times = pd.DatetimeIndex(self.mesh_engine.dataset.time)
+
+        if time_steps == None:
+            time_steps = range(len(times))
+
+        time_steps = list(time_steps)
+
+        # Scaling the quantization to the range of the surface values:
+        surface_data = item_data[np.ix_(time_steps, self.surface_elements)]
+        (vmin, vmax) = (float(np.nanmin(surface_data)), float(np.nanmax(surface_data)))
+        scale = (vmax - vmin) / 65534 if vmax > vmin else 1.0
+
+        frames = {}
+
+        for frame_number, time_step in enumerate(time_steps):
+
+            frame = self.rasterise(surface_data[frame_number])
+
+            quantized = np.full(frame.shape, 65535, dtype=np.uint16)
+            valid = np.isfinite(frame)
+            quantized[valid] = np.round((frame[valid] - vmin) / scale).astype(np.uint16)
+
+            frames[f'frame_{frame_number:05d}'] = quantized
+
+        np.savez_compressed(store_path, vmin=vmin, scale=scale,
+            times=times[time_steps].values.astype('datetime64[ns]').astype(np.int64),
+            bounds=np.asarray(self.bounds), cat_name=np.asarray(cat_name), **frames)
+
+        return surface_frame_store(store_path)
+
+
+# Object that reads the frames of a rasterised surface field:
+class surface_frame_store(object):
+    """
+    This object reads a frame store written by surface_rasterizer.write_frames().
+    Frames are decompressed one at a time on request so that a dashboard can
+    stream and animate a forecast map without loading every frame.
+
+    Parameters
+    ----------
+    store_path : str
+        The path of the npz frame store.
+    """
+    def __init__(self, store_path):
+
+        # Declaring instance variables:
+        self.store_path = store_path
+
+        # Opening the store, members are only decompressed when accessed:
+        self.store = np.load(store_path)
+
+        self.vmin = float(self.store['vmin'])
+        self.scale = float(self.store['scale'])
+        self.bounds = tuple(self.store['bounds'])
+        self.cat_name = str(self.store['cat_name'])
+        self.times = pd.to_datetime(self.store['times'])
+
+    def __len__(self):
+        return len(self.times)
+
+    # Method that returns a single de-quantized frame:
+    def get_frame(self, frame_number):
+        '''
+        Method decompresses and de-quantizes a single frame.
+
+        Parameters
+        ----------
+        frame_number : int
+            The position of the frame in the store.
+
+        Returns
+        -------
+        frame : numpy array
+            A (rows x columns) float32 array with NaN for masked pixels.
+        '''
+        quantized = self.store[f'frame_{frame_number:05d}']
+
+        frame = quantized.astype(np.float32) * self.scale + self.vmin
+        frame[quantized == 65535] = np.nan
+
+        return frame
+
+    # Method that builds a plotly animation of the frames:
+    def build_animation_fig(self, frame_step=1, colorscale='Viridis'):
+        '''
+        Method builds a plotly heatmap figure with one animation frame per stored
+        frame.
+
+        Parameters
+        ----------
+        frame_step : int : default = 1
+            Only every frame_step-th frame is included in the animation.
+
+        colorscale : str : default = 'Viridis'
+            The plotly colour scale of the heatmap.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The animated heatmap figure with a play button and time slider.
+        '''
+        frame_numbers = list(range(0, len(self), frame_step))
+
+        (min_long, min_lat, max_long, max_lat) = self.bounds
+        first_frame = self.get_frame(0)
+
+        long_values = np.linspace(min_long, max_long, first_frame.shape[1])
+        lat_values = np.linspace(min_lat, max_lat, first_frame.shape[0])
+
+        # The colour range is fixed so that every frame uses the same scale:
+        zmax = self.vmin + self.scale * 65534
+
+        heatmap_args = dict(x=long_values, y=lat_values, colorscale=colorscale,
+            zmin=self.vmin, zmax=zmax)
+
+        frames = [
+            go.Frame(data=[go.Heatmap(z=self.get_frame(frame_number), **heatmap_args)],
+                name=str(self.times[frame_number]))
+            for frame_number in frame_numbers]
+
+        fig = go.Figure(data=[go.Heatmap(z=first_frame, **heatmap_args)], frames=frames)
+
+        fig.update_layout(
+            title_text=self.cat_name,
+            updatemenus=[dict(type='buttons', buttons=[dict(label='Play',
+                method='animate', args=[None])])],
+            sliders=[dict(steps=[dict(method='animate', label=frame.name,
+                args=[[frame.name], dict(mode='immediate')]) for frame in frames])]
+            )
+
+        return fig
@@ -0,0 +1,448 @@
+# Importing data management packages:
+import numpy as np
+import pandas as pd
+# Importing file management packages:
+import os
+import threading
+
+# The statistics kept for every rollup bucket and the dtype they are stored as:
+ROLLUP_STATS = {'min': np.float32, 'mean': np.float32, 'max': np.float32,
+    'count': np.int32}
+
+# Object that keeps pre-aggregated temporal rollups of time series data:
+class temporal_rollup(object):
+    """
+    This object keeps hourly, daily and weekly min/mean/max/count rollups of a set
+    of time series (a dfs0 item or a dfsu item at a single element) so that long
+    range views can be served from the rollups instead of re-reducing the raw
+    series on every request.
+
+    Rollups are updated incrementally from each new model run. The raw data of a
+    run is reduced into hourly buckets and, as the newest run wins, replaces the
+    hourly buckets of the updated series between the hours of the run's first
+    and last timesteps. Hours outside of the run are kept, so applying an older
+    run (a backfill) does not clear later data. The daily and weekly buckets are
+    then re-derived from the hourly buckets of the days and weeks the run
+    touched. Weeks start on Monday.
+
+    The rollups are stored in a compressed .npz file with every statistic kept as
+    a 4 byte value.
+
+    >>> rollup = temporal_rollup('rollups.npz')
+    >>> rollup.update_dataframe(forecast_df)
+    >>> rollup.get_rollup('daily', ['Current speed'])
+
+    Parameters
+    ----------
+    store_path : str : default = None
+        The path of the .npz file the rollups are stored in. If the file exists
+        the rollups are loaded from it. If None the rollups are only kept in
+        memory.
+    """
+    # The rollup frequencies, from the finest (which the rest are derived from):
+    FREQUENCIES = ['hourly', 'daily', 'weekly']
+
+    def __init__(self, store_path=None):
+
+        # Declaring instance variables:
+        self.store_path = store_path
+        self.lock = threading.RLock()
+
+        # The name of every series and the column of each series in the rollups:
+        self.series = []
+        self.series_index = {}
+
+        # The rollups of each frequency: {'start': (n_buckets,) datetime64 bucket
+        # starts, stat: (n_buckets, n_series) array of each stat in ROLLUP_STATS}:
+        self.rollups = {frequency: self.build_empty_rollup(0, 0)
+            for frequency in self.FREQUENCIES}
+
+        if store_path != None and os.path.exists(store_path):
+            self.load()
+
+    # Method that builds an empty rollup of a set of buckets and series:
+    def build_empty_rollup(self, n_buckets, n_series):
+        '''
+        Method builds the arrays of a rollup without any data: a count of zero and
+        NaN min/mean/max values.
+
+        Parameters
+        ----------
+        n_buckets : int
+            The number of buckets (rows) of the rollup.
+
+        n_series : int
+            The number of series (columns) of the rollup.
+
+        Returns
+        -------
+        rollup_dict : dict
+            A dict of {'start': datetime64 array, stat: numpy array}.
+        '''
+        rollup_dict = {'start': np.zeros(n_buckets, dtype='datetime64[ns]')}
+
+        for stat, dtype in ROLLUP_STATS.items():
+            fill_value = 0 if stat == 'count' else np.nan
+            rollup_dict[stat] = np.full((n_buckets, n_series), fill_value, dtype=dtype)
+
+        return rollup_dict
+
+    # Method that floors timestamps to the start of their rollup bucket:
+    def floor_times(self, times, frequency):
+        '''
+        Method floors an array of timestamps to the start of the hour, day or week
+        (starting on Monday) that contains them.
+
+        Parameters
+        ----------
+        times : numpy array
+            A datetime64 array.
+
+        frequency : str
+            One of self.FREQUENCIES.
+
+        Returns
+        -------
+        bucket_starts : numpy array
+            A datetime64[ns] array of the bucket start of each timestamp.
+        '''
+        if frequency == 'hourly':
+            return times.astype('datetime64[h]').astype('datetime64[ns]')
+
+        days = times.astype('datetime64[D]')
+
+        if frequency == 'daily':
+            return days.astype('datetime64[ns]')
+
+        if frequency == 'weekly':
+            # 1970-01-01 was a Thursday, so Monday is 3 days before each 7 day cycle:
+            weekdays = (days.astype(np.int64) + 3) % 7
+            return (days - weekdays.astype('timedelta64[D]')).astype('datetime64[ns]')
+
+        raise ValueError(f'Unknown rollup frequency {frequency}, expected one of {self.FREQUENCIES}')
+
+    # Method that reduces sorted rows into buckets:
+    def reduce_buckets(self, bucket_starts, count, total, minimum, maximum):
+        '''
+        Method reduces rows of partial statistics that are sorted by their bucket
+        start into a single row per bucket. Raw values are reduced by passing a
+        count of 1 (0 for NaN values) and the values as the total, min and max.
+
+        Parameters
+        ----------
+        bucket_starts : numpy array
+            The sorted (n_rows,) datetime64 bucket start of each row.
+
+        count, total, minimum, maximum : numpy array
+            The (n_rows, n_series) partial count, sum, min and max of each row.
+
+        Returns
+        -------
+        rollup_dict : dict
+            A dict of {'start': datetime64 array, stat: numpy array} with a row
+            per bucket.
+        '''
+        boundaries = np.flatnonzero(np.concatenate([[True],
+            bucket_starts[1:] != bucket_starts[:-1]]))
+
+        bucket_count = np.add.reduceat(count, boundaries, axis=0)
+        bucket_total = np.add.reduceat(total, boundaries, axis=0)
+
+        # fmin/fmax ignore the NaN values of the empty rows and series:
+        bucket_min = np.fmin.reduceat(minimum, boundaries, axis=0)
+        bucket_max = np.fmax.reduceat(maximum, boundaries, axis=0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bucket_mean = np.where(bucket_count > 0, bucket_total / bucket_count, np.nan)
+
+        return {'start': bucket_starts[boundaries],
+            'min': bucket_min.astype(ROLLUP_STATS['min']),
+            'mean': bucket_mean.astype(ROLLUP_STATS['mean']),
+            'max': bucket_max.astype(ROLLUP_STATS['max']),
+            'count': bucket_count.astype(ROLLUP_STATS['count'])}
+
+    # Method that adds new series columns to every rollup:
+    def add_series(self, series_names):
+        '''
+        Method adds empty columns to every rollup for the series that are not
+        already in the rollups.
+
+        Parameters
+        ----------
+        series_names : list
+            The names of the series.
+
+        Returns
+        -------
+        series_ids : numpy array
+            The column of each series in the rollups.
+        '''
+        new_series = [name for name in dict.fromkeys(series_names)
+            if name not in self.series_index]
+
+        if new_series:
+
+            for name in new_series:
+                self.series_index[name] = len(self.series)
+                self.series.append(name)
+
+            for frequency, rollup_dict in self.rollups.items():
+
+                empty_dict = self.build_empty_rollup(len(rollup_dict['start']), len(new_series))
+
+                for stat in ROLLUP_STATS:
+                    rollup_dict[stat] = np.concatenate([rollup_dict[stat], empty_dict[stat]],
+                        axis=1)
+
+        return np.array([self.series_index[name] for name in series_names], dtype=int)
+
+    # Method that updates the rollups with the raw data of a new run:
+    def update(self, times, values, series_names):
+        '''
+        Method reduces the raw data of a new run into hourly buckets, replaces the
+        hourly buckets of the series between the first and last hour of the run
+        (the newest run wins) and re-derives the daily and weekly buckets that the run
+        touched. If a store_path is set the rollups are saved.
+
+        Parameters
+        ----------
+        times : array-like
+            The (n_times,) timestamps of the run.
+
+        values : array-like
+            The (n_times, n_series) raw values of the run. NaN values are ignored.
+
+        series_names : list
+            The name of each column of values.
+        '''
+        times = np.asarray(pd.DatetimeIndex(times).values, dtype='datetime64[ns]')
+        values = np.asarray(values, dtype=float).reshape(len(times), -1)
+
+        if len(times) == 0:
+            return
+
+        # Sorting the run by time so that each bucket is a contiguous block of rows:
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        values = values[order]
+
+        valid = ~np.isnan(values)
+
+        run_rollup = self.reduce_buckets(self.floor_times(times, 'hourly'),
+            valid.astype(np.int64), np.where(valid, values, 0), values, values)
+
+        with self.lock:
+
+            series_ids = self.add_series(series_names)
+
+            self.replace_hourly(run_rollup, series_ids)
+
+            for frequency in self.FREQUENCIES[1:]:
+                self.derive_rollup(frequency, run_rollup['start'][0])
+
+            if self.store_path != None:
+                self.save()
+
+    # Method that writes the hourly buckets of a run into the hourly rollup:
+    def replace_hourly(self, run_rollup, series_ids):
+        '''
+        Method clears the hourly buckets of the run's series between the run's
+        first and last hour and writes the buckets of the run in their place.
+
+        Parameters
+        ----------
+        run_rollup : dict
+            The hourly rollup of the run from reduce_buckets().
+
+        series_ids : numpy array
+            The rollup column of each series of the run.
+        '''
+        hourly_dict = self.rollups['hourly']
+
+        bucket_starts = np.union1d(hourly_dict['start'], run_rollup['start'])
+
+        merged_dict = self.build_empty_rollup(len(bucket_starts), len(self.series))
+        merged_dict['start'] = bucket_starts
+
+        existing_rows = np.searchsorted(bucket_starts, hourly_dict['start'])
+        run_rows = np.searchsorted(bucket_starts, run_rollup['start'])
+
+        # The run replaces its series over the hours it covers:
+        cleared_rows = (bucket_starts >= run_rollup['start'][0]) & \
+            (bucket_starts <= run_rollup['start'][-1])
+
+        for stat in ROLLUP_STATS:
+
+            merged_dict[stat][existing_rows] = hourly_dict[stat]
+
+            cleared = merged_dict[stat][:, series_ids]
+            cleared[cleared_rows] = 0 if stat == 'count' else np.nan
+            cleared[run_rows] = run_rollup[stat]
+            merged_dict[stat][:, series_ids] = cleared
+
+        self.rollups['hourly'] = merged_dict
+
+    # Method that re-derives the coarser buckets touched by a run from the hourly rollup:
+    def derive_rollup(self, frequency, since):
+        '''
+        Method re-derives the buckets of a coarser frequency from the hourly
+        buckets, starting from the bucket that contains the since timestamp.
+        Earlier buckets are kept as they are.
+
+        Parameters
+        ----------
+        frequency : str
+            'daily' or 'weekly'.
+
+        since : numpy datetime64
+            The first hour that changed.
+        '''
+        hourly_dict = self.rollups['hourly']
+        rollup_dict = self.rollups[frequency]
+
+        cutoff = self.floor_times(np.array([since], dtype='datetime64[ns]'), frequency)[0]
+
+        hourly_rows = hourly_dict['start'] >= cutoff
+        count = hourly_dict['count'][hourly_rows].astype(np.int64)
+
+        derived_dict = self.reduce_buckets(
+            self.floor_times(hourly_dict['start'][hourly_rows], frequency),
+            count,
+            np.where(count > 0, hourly_dict['mean'][hourly_rows].astype(float) * count, 0),
+            hourly_dict['min'][hourly_rows],
+            hourly_dict['max'][hourly_rows])
+
+        kept_rows = rollup_dict['start'] < cutoff
+
+        self.rollups[frequency] = {key: np.concatenate([rollup_dict[key][kept_rows],
+            derived_dict[key]]) for key in rollup_dict}
+
+    # Method that updates the rollups from a dataframe such as a dfs0 pipeline output:
+    def update_dataframe(self, dataframe):
+        '''
+        Method updates the rollups from a time indexed dataframe, e.g. the
+        forecast dataframe of the dfs0_pipeline. Each column is a series.
+
+        Parameters
+        ----------
+        dataframe : pandas dataframe
+            The time indexed dataframe of the run.
+        '''
+        self.update(dataframe.index, dataframe.values,
+            [str(column) for column in dataframe.columns])
+
+    # Method that updates the rollups from the dataset of a dfsu ingestion engine:
+    def update_engine(self, engine, cat_names, element_ids=None):
+        '''
+        Method updates the rollups from the dataset of a dfsu_ingestion_engine.
+        Each data category at each element is a series named 'category:element'.
+
+        Parameters
+        ----------
+        engine : dfsu_ingestion_engine
+            The ingestion engine of the run.
+
+        cat_names : list
+            The data categories (keys of engine.map_dict or DERIVED_VARIABLES)
+            to roll up.
+
+        element_ids : list : default = None
+            The elements to roll up. If None every element is rolled up.
+        '''
+        if element_ids is None:
+            element_ids = np.arange(engine.n_elements)
+
+        element_ids = np.asarray(element_ids, dtype=int)
+
+        for cat_name in cat_names:
+
+            category_slice = engine.get_variable_array(cat_name, element_ids)
+
+            self.update(engine.dataset.time, category_slice,
+                [f'{cat_name}:{element_id}' for element_id in element_ids])
+
+    # Method that returns the rollup of a frequency as a dataframe:
+    def get_rollup(self, frequency, series_names=None, start=None, end=None):
+        '''
+        Method returns the rollup of a frequency as a dataframe indexed by the
+        bucket start with a (series, stat) column for every series and stat.
+
+        Parameters
+        ----------
+        frequency : str
+            One of self.FREQUENCIES.
+
+        series_names : list : default = None
+            The series to return. If None every series is returned.
+
+        start : datetime-like : default = None
+            The earliest bucket start returned.
+
+        end : datetime-like : default = None
+            The latest bucket start returned.
+
+        Returns
+        -------
+        rollup_df : pandas dataframe
+            The rollup dataframe.
+        '''
+        if frequency not in self.rollups:
+            raise ValueError(f'Unknown rollup frequency {frequency}, expected one of {self.FREQUENCIES}')
+
+        if series_names == None:
+            series_names = list(self.series)
+
+        with self.lock:
+
+            rollup_dict = self.rollups[frequency]
+            series_ids = [self.series_index[name] for name in series_names]
+
+            rows = np.ones(len(rollup_dict['start']), dtype=bool)
+
+            if start != None:
+                rows &= rollup_dict['start'] >= np.datetime64(pd.Timestamp(start), 'ns')
+
+            if end != None:
+                rows &= rollup_dict['start'] <= np.datetime64(pd.Timestamp(end), 'ns')
+
+            stat_data = {(name, stat): rollup_dict[stat][rows, series_id]
+                for series_id, name in zip(series_ids, series_names)
+                for stat in ROLLUP_STATS}
+
+            return pd.DataFrame(stat_data, index=pd.DatetimeIndex(rollup_dict['start'][rows],
+                name='start'), columns=pd.MultiIndex.from_tuples(list(stat_data),
+                names=['series', 'stat']))
+
+    # Method that writes the rollups to the .npz store:
+    def save(self):
+        '''
+        Method writes every rollup to self.store_path as a compressed .npz file.
+        The file is written to a temporary path and moved into place so that a
+        reader never sees a partially written store.
+        '''
+        arrays = {'series': np.array(self.series, dtype=str)}
+
+        for frequency, rollup_dict in self.rollups.items():
+            for key, array in rollup_dict.items():
+                arrays[f'{frequency}_{key}'] = array
+
+        temp_path = f'{self.store_path}.{os.getpid()}.tmp'
+
+        with open(temp_path, 'wb') as store_file:
+            np.savez_compressed(store_file, **arrays)
+
+        os.replace(temp_path, self.store_path)
+
+    # Method that reads the rollups from the .npz store:
+    def load(self):
+        '''
+        Method reads every rollup from self.store_path.
+        '''
+        with np.load(self.store_path) as arrays:
+
+            self.series = [str(name) for name in arrays['series']]
+            self.series_index = {name: i for i, name in enumerate(self.series)}
+
+            self.rollups = {frequency: {key: arrays[f'{frequency}_{key}']
+                for key in ['start'] + list(ROLLUP_STATS)}
+                for frequency in self.FREQUENCIES}
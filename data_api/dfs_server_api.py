@@ -0,0 +1,440 @@
+# Importing the dfs apis the server is built on:
+from data_api.dfs_file_query_api import file_query_api
+from data_api.dfs_visualization_api import dashboard, figure_cache
+# Importing data management packages:
+import math
+from collections import Counter
+# Importing file and thread management packages:
+import os
+import threading
+
+# Object that serves the dashboards of the newest model run of a client:
+class dashboard_server(object):
+    """
+    This object is the application layer of the dashboard. It loads the dashboard
+    (and with it the dfsu dataset) of the newest model run of a client once, at
+    startup and whenever a new run appears, instead of loading a dfsu file inside
+    every request, and serves the node dashboards and the mesh map through a Dash
+    app built by build_app().
+
+    Requests only read the current dashboard. A new run is loaded by a background
+    thread that polls the file directory every poll_interval seconds (or wakes on
+    notify_new_run()) and then swaps the current dashboard in a single
+    assignment, so requests are never blocked by a load.
+
+    Every view is memoised in a bounded figure_cache keyed by the dfsu file
+    version (see dashboard.plot_node_data()). The elements requested most often
+    are counted and, after every load and every poll, the background thread
+    renders the views of the n_popular most requested elements that are not
+    cached yet, so popular nodes stay cached across new runs. Cached views are
+    served without locking, and concurrent requests for the same uncached
+    element wait for a single build instead of each building the figure.
+
+    >>> server = dashboard_server(root_dir, 'client_name', gis_filepath)
+    >>> server.run(port=8050)
+
+    Or, for a WSGI server such as gunicorn:
+
+    >>> app = create_app(root_dir, 'client_name', gis_filepath)
+    >>> application = app.server
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory of the model output file directory.
+
+    client_name : str
+        The client name of the dfsu files.
+
+    gis_filepath : str : default = None
+        The filepath of the GeoJSON file of the gis_model.
+
+    access_token : str : default = None
+        The access token for the Mapbox API used by the gis_model.
+
+    view_cache : figure_cache : default = None
+        The cache the views are memoised in. By default a figure_cache of
+        cache_size entries local to the server. Pass a figure_cache with a
+        cache_dir to share views between server processes.
+
+    cache_size : int : default = 512
+        The maximum number of views held by the default view_cache.
+
+    poll_interval : float : default = 60
+        The number of seconds between polls of the file directory for new runs.
+
+    n_popular : int : default = 32
+        The number of most requested elements kept rendered by the background
+        thread.
+
+    popular_elements : list : default = None
+        The elements that are rendered before any request is made, e.g. the
+        elements of known monitoring stations.
+
+    max_points : int : default = 2000
+        The maximum number of points in each plotted trace. See dashboard.
+
+    shared_store : shared_dataset_store : default = None
+        The store the datasets are shared through with other server processes.
+        See dfsu_ingestion_engine.
+    """
+    # The number of locks that builds of uncached elements are striped across:
+    BUILD_LOCK_STRIPES = 64
+
+    def __init__(self, root_dir, client_name, gis_filepath=None, access_token=None,
+        view_cache=None, cache_size=512, poll_interval=60, n_popular=32,
+        popular_elements=None, max_points=2000, shared_store=None):
+
+        # Declaring instance variables:
+        self.root_dir = root_dir
+        self.client_name = client_name
+        self.gis_filepath = gis_filepath
+        self.access_token = access_token
+        self.view_cache = figure_cache(max_entries=cache_size) if view_cache == None \
+            else view_cache
+        self.poll_interval = poll_interval
+        self.n_popular = n_popular
+        self.max_points = max_points
+        self.shared_store = shared_store
+
+        self.file_query = file_query_api(self.root_dir)
+
+        # The dashboard of the newest run, replaced as a whole by load_latest_run():
+        self.dashboard = None
+        self.load_lock = threading.Lock()
+
+        # The number of requests of each element, seeded with the popular elements:
+        self.node_requests = Counter({int(element_index): 1 for element_index in
+            (popular_elements or [])})
+        self.requests_lock = threading.Lock()
+
+        self.build_locks = [threading.Lock() for i in range(self.BUILD_LOCK_STRIPES)]
+
+        # The background thread and the events used to wake and stop it:
+        self.worker = None
+        self.new_run_event = threading.Event()
+        self.stop_event = threading.Event()
+
+    # Method that loads the dashboard of the newest run if it has changed:
+    def load_latest_run(self):
+        '''
+        Method finds the newest dfsu file of the client and, if it is not the
+        file version that is currently served, loads its dashboard and makes it
+        the current dashboard.
+
+        Returns
+        -------
+        loaded : bool
+            True if a new dashboard was loaded.
+
+        Raises
+        ------
+        FileNotFoundError : FileNotFoundError
+            If no dfsu file of the client is found and no dashboard is loaded.
+        '''
+        with self.load_lock:
+
+            # The yyyymmddhh date folder in each path orders the runs:
+            filepaths = sorted(self.file_query.get_client_data_paths(self.client_name,
+                file_type='.dfsu'))
+
+            if len(filepaths) == 0:
+
+                if self.dashboard == None:
+                    raise FileNotFoundError(
+                        f'No dfsu files found for {self.client_name} in {self.root_dir}')
+
+                return False
+
+            file_version = (os.path.abspath(filepaths[-1]), os.path.getmtime(filepaths[-1]))
+
+            if self.dashboard != None and self.dashboard.file_version == file_version:
+                return False
+
+            print(f'[LOADING RUN]: {filepaths[-1]}')
+
+            # The swap is a single assignment, requests use either dashboard whole:
+            self.dashboard = dashboard(filepaths[-1], self.gis_filepath,
+                view_cache=self.view_cache, max_points=self.max_points,
+                access_token=self.access_token, shared_store=self.shared_store)
+
+            return True
+
+    # Method that signals that a new run has been written:
+    def notify_new_run(self):
+        '''
+        Method wakes the background thread to load the newest run without waiting
+        for the next poll, e.g. once the pipeline has written a new run.
+        '''
+        self.new_run_event.set()
+
+    # Method that returns the node dashboard of an element:
+    def get_node_figure(self, element_index):
+        '''
+        Method returns the node dashboard of an element of the current run and
+        counts the request towards the popularity of the element.
+
+        Parameters
+        ----------
+        element_index : int
+            The index of the element.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The node dashboard, see dashboard.plot_node_data().
+        '''
+        with self.requests_lock:
+            self.node_requests[element_index] += 1
+
+        return self.render_node(self.dashboard, element_index)
+
+    # Method that renders (or reads from cache) the node dashboard of an element:
+    def render_node(self, dashboard_obj, element_index):
+        '''
+        Method returns the node dashboard of an element from the view cache,
+        building it if it is not cached. Cached views are returned without
+        locking. Only a miss takes the build lock of the element, and
+        plot_node_data() checks the cache again inside the lock, so concurrent
+        requests of an uncached element build it once.
+
+        Parameters
+        ----------
+        dashboard_obj : dashboard
+            The dashboard of the run.
+
+        element_index : int
+            The index of the element.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The node dashboard.
+        '''
+        (long, lat, depth) = [float(coordinate) for coordinate in
+            dashboard_obj.element_coordinates[element_index]]
+
+        resolved_index = dashboard_obj.resolve_element(long, lat, depth)
+
+        if self.view_cache.contains(dashboard_obj.get_node_view_key(resolved_index)):
+            return dashboard_obj.plot_node_data(long, lat, depth)
+
+        with self.build_locks[resolved_index % self.BUILD_LOCK_STRIPES]:
+            return dashboard_obj.plot_node_data(long, lat, depth)
+
+    # Method that returns the mesh map for a zoom level:
+    def get_map_figure(self, zoom=7):
+        '''
+        Method returns the decimated mesh map of the current run for a zoom level,
+        memoised per whole zoom level.
+
+        Parameters
+        ----------
+        zoom : float : default = 7
+            The Mapbox zoom level.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The map figure, see gis_model.build_map_fig().
+        '''
+        dashboard_obj = self.dashboard
+        zoom_level = int(max(0, math.floor(zoom)))
+
+        view_key = self.view_cache.build_key(zoom_level, 'mesh_map',
+            dashboard_obj.file_version)
+
+        return self.view_cache.get_figure(view_key,
+            lambda: dashboard_obj.gis_model.build_map_fig(zoom_level))
+
+    # Method that renders the views of the most requested elements:
+    def precompute_popular_nodes(self):
+        '''
+        Method renders the node dashboards of the n_popular most requested
+        elements of the current run that are not cached yet.
+
+        Returns
+        -------
+        rendered : list
+            The indices of the elements that were rendered.
+        '''
+        dashboard_obj = self.dashboard
+
+        if dashboard_obj == None:
+            return []
+
+        with self.requests_lock:
+            popular_elements = [element_index for (element_index, count) in
+                self.node_requests.most_common(self.n_popular)]
+
+        rendered = []
+
+        for element_index in popular_elements:
+
+            if self.stop_event.is_set():
+                break
+
+            # Elements are cached under the element resolved from their centroid:
+            (long, lat, depth) = dashboard_obj.element_coordinates[element_index]
+            view_key = dashboard_obj.get_node_view_key(
+                dashboard_obj.resolve_element(long, lat, depth))
+
+            if self.view_cache.contains(view_key):
+                continue
+
+            try:
+                self.render_node(dashboard_obj, element_index)
+                rendered.append(element_index)
+
+            except Exception as error:
+                print(f'[PRECOMPUTE FAILED]: element {element_index}: {error}')
+
+        if rendered:
+            print(f'[PRECOMPUTED NODES]: {rendered}')
+
+        return rendered
+
+    # Method run by the background thread:
+    def run_worker(self):
+        '''
+        Method loads new runs and precomputes the popular nodes every
+        poll_interval seconds, or as soon as notify_new_run() is called, until
+        stop() is called.
+        '''
+        while not self.stop_event.is_set():
+
+            try:
+                self.load_latest_run()
+                self.precompute_popular_nodes()
+
+            except Exception as error:
+                print(f'[SERVER WORKER ERROR]: {error}')
+
+            self.new_run_event.wait(self.poll_interval)
+            self.new_run_event.clear()
+
+    # Method that loads the first run and starts the background thread:
+    def start(self):
+        '''
+        Method loads the dashboard of the newest run and starts the background
+        thread. It is called by build_app().
+        '''
+        if self.dashboard == None:
+            self.load_latest_run()
+
+        if self.worker == None or not self.worker.is_alive():
+
+            self.stop_event.clear()
+            self.worker = threading.Thread(target=self.run_worker,
+                name='dashboard_server_worker', daemon=True)
+            self.worker.start()
+
+    # Method that stops the background thread:
+    def stop(self):
+        self.stop_event.set()
+        self.new_run_event.set()
+
+        if self.worker != None:
+            self.worker.join()
+
+    # Method that builds the Dash app:
+    def build_app(self, name=__name__):
+        '''
+        Method starts the server and builds the Dash app: the mesh map, which is
+        re-decimated as it is zoomed, and the node dashboard of the element
+        clicked on the map.
+
+        Parameters
+        ----------
+        name : str : default = __name__
+            The name of the Dash app.
+
+        Returns
+        -------
+        app : dash.Dash
+            The Dash app. app.server is the Flask server of the app.
+        '''
+        # Importing dash only when the app is built:
+        import dash
+        from dash import dcc, html
+        from dash.dependencies import Input, Output
+        from dash.exceptions import PreventUpdate
+
+        self.start()
+
+        app = dash.Dash(name)
+
+        app.layout = html.Div([
+            dcc.Graph(id='mesh-map', figure=self.get_map_figure()),
+            dcc.Graph(id='node-dashboard')
+            ])
+
+        @app.callback(Output('node-dashboard', 'figure'), Input('mesh-map', 'clickData'))
+        def update_node_dashboard(click_data):
+
+            element_index = self.dashboard.gis_model.get_clicked_element(click_data)
+
+            if element_index == None:
+                raise PreventUpdate
+
+            return self.get_node_figure(element_index)
+
+        @app.callback(Output('mesh-map', 'figure'), Input('mesh-map', 'relayoutData'))
+        def update_mesh_map(relayout_data):
+
+            if not relayout_data or 'mapbox.zoom' not in relayout_data:
+                raise PreventUpdate
+
+            return self.get_map_figure(relayout_data['mapbox.zoom'])
+
+        return app
+
+    # Method that builds the Dash app and serves it:
+    def run(self, host='127.0.0.1', port=8050, debug=False):
+        '''
+        Method builds the Dash app and serves it with the development server of
+        Dash. Use create_app() and app.server for a production WSGI server.
+        '''
+        app = self.build_app()
+
+        # Dash 2 renamed run_server() to run():
+        run_app = app.run if hasattr(app, 'run') else app.run_server
+
+        try:
+            run_app(host=host, port=port, debug=debug)
+        finally:
+            self.stop()
+
+
+# Function that builds the Dash app of a dashboard_server:
+def create_app(root_dir, client_name, gis_filepath=None, **kwargs):
+    '''
+    Function that builds a dashboard_server for a client and returns its Dash
+    app. The newest run is loaded and the background thread is started before
+    the app is returned.
+
+    Parameters
+    ----------
+    root_dir : str
+        The root directory of the model output file directory.
+
+    client_name : str
+        The client name of the dfsu files.
+
+    gis_filepath : str : default = None
+        The filepath of the GeoJSON file of the gis_model.
+
+    **kwargs : arguments
+        The other parameters of the dashboard_server.
+
+    Returns
+    -------
+    app : dash.Dash
+        The Dash app. The dashboard_server is app.dashboard_server.
+    '''
+    server = dashboard_server(root_dir, client_name, gis_filepath, **kwargs)
+
+    app = server.build_app()
+    app.dashboard_server = server
+
+    return app
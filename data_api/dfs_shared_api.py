@@ -0,0 +1,367 @@
+# Importing data management packages:
+import numpy as np
+import pandas as pd
+# Importing file and process management packages:
+import os
+import json
+import hashlib
+import shutil
+import weakref
+import itertools
+
+# Object that holds the item arrays of a dataset loaded from the shared store:
+class shared_dataset(object):
+    """
+    This object is the read-only dataset returned by the shared_dataset_store. It
+    provides the parts of the mikeio Dataset interface used by the data apis
+    (dataset['item name'], dataset.time, dataset.data, dataset.items) over the
+    memory mapped item arrays of the store, so every process that loads the same
+    file version shares a single copy of the data through the page cache.
+
+    Parameters
+    ----------
+    item_arrays : dict
+        A dict of {item name: read-only (time, elements) numpy array}.
+
+    time : pandas DatetimeIndex
+        The time of each timestep.
+
+    geometry : dict
+        A dict of {name: read-only numpy array} of the mesh geometry.
+    """
+    def __init__(self, item_arrays, time, geometry):
+
+        # Declaring instance variables:
+        self.item_arrays = item_arrays
+        self.time = time
+        self.geometry = geometry
+
+        self.items = list(item_arrays)
+        self.data = list(item_arrays.values())
+
+    def __getitem__(self, key):
+
+        # Items can be read by name or by position like the mikeio Dataset:
+        if isinstance(key, int):
+            return self.data[key]
+
+        return self.item_arrays[key]
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def n_timesteps(self):
+        return len(self.time)
+
+
+# Object that shares the datasets of dfsu files between processes via mmap files:
+class shared_dataset_store(object):
+    """
+    This object places the item arrays and mesh geometry of a dfsu file into a
+    shared directory of .npy files once per file version, so that every
+    dashboard worker process attaches to the same data read-only and without
+    copying it instead of loading its own copy of the dfsu file.
+
+    Each file version (path, modification time) is published to its own
+    directory under store_dir. The first process to load a version reads the
+    dfsu file, writes the arrays to a temporary directory and renames it into
+    place, so other processes only ever see complete versions. If two processes
+    publish the same version at once the first rename wins and the other copy is
+    discarded. Every process then memory maps the arrays with
+    numpy.load(mmap_mode='r').
+
+    Every attached engine holds a reference file in the version directory which
+    is removed when the engine is garbage collected or its process exits
+    (references of processes that no longer exist are treated as released).
+    When a new version of a file is published, the previous versions of the
+    file without references are removed.
+
+    >>> store = shared_dataset_store('/dev/shm/dfsu_store')
+    >>> dashboard_obj = dashboard(filepath, gis_filepath, shared_store=store)
+
+    Parameters
+    ----------
+    store_dir : str
+        The directory the file versions are published to. A directory on a
+        memory backed filesystem such as /dev/shm keeps the data in shared
+        memory; any other directory is shared through the page cache.
+    """
+    # The mesh geometry of the engine that is published with the item arrays and
+    # used by the engines attached to the version (see get_shared_geometry()):
+    GEOMETRY_ATTRIBUTES = ['element_coordinates', 'node_coordinates']
+
+    # Counter used to give every reference a unique name within the process:
+    reference_counter = itertools.count()
+
+    def __init__(self, store_dir):
+
+        # Declaring instance variables:
+        self.store_dir = store_dir
+
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    # Method that returns the directory of a file version:
+    def get_version_dir(self, file_version):
+        '''
+        Method returns the directory a file version is published to.
+
+        Parameters
+        ----------
+        file_version : tuple
+            The (path, modification time) of the dfsu file. See
+            dfsu_ingestion_engine.file_version.
+
+        Returns
+        -------
+        version_dir : str
+            The path of the version directory.
+        '''
+        path_key = hashlib.sha1(file_version[0].encode()).hexdigest()[:16]
+
+        return os.path.join(self.store_dir, f'{path_key}_{file_version[1]!r}')
+
+    # Method that loads the dataset of an engine from the store:
+    def load(self, engine):
+        '''
+        Method loads the dataset of a dfsu_ingestion_engine from the store. If the
+        file version of the engine is not published yet, the engine reads the
+        file in full and the dataset is published. Otherwise only the mesh of the
+        file is read by the engine (a single timestep) and the published arrays
+        are attached.
+
+        Parameters
+        ----------
+        engine : dfsu_ingestion_engine
+            The engine being initalized. engine.filepath and engine.file_version
+            must be set.
+
+        Returns
+        -------
+        dataset : shared_dataset
+            The read-only dataset attached to the store.
+        '''
+        version_dir = self.get_version_dir(engine.file_version)
+
+        if os.path.exists(os.path.join(version_dir, 'manifest.json')):
+
+            # Reading only the mesh of the file into the engine:
+            engine.read(engine.filepath, time_steps=[0])
+
+        else:
+            self.publish(engine.file_version, engine.read(engine.filepath), engine)
+
+        dataset = self.attach(engine.file_version)
+        self.add_reference(version_dir, dataset)
+
+        return dataset
+
+    # Method that writes a dataset to the store:
+    def publish(self, file_version, dataset, engine=None):
+        '''
+        Method writes the item arrays, the time and the mesh geometry of a dataset
+        to the version directory and removes the unreferenced previous versions
+        of the file.
+
+        Parameters
+        ----------
+        file_version : tuple
+            The (path, modification time) of the dfsu file.
+
+        dataset : mikeio Dataset
+            The dataset read from the file.
+
+        engine : dfsu_ingestion_engine : default = None
+            The engine the dataset was read by. Its GEOMETRY_ATTRIBUTES are
+            published with the dataset.
+        '''
+        version_dir = self.get_version_dir(file_version)
+        temp_dir = f'{version_dir}.{os.getpid()}.tmp'
+
+        os.makedirs(temp_dir, exist_ok=True)
+
+        item_names = [getattr(item, 'name', str(item)) for item in dataset.items]
+
+        for i, item_array in enumerate(dataset.data):
+            np.save(os.path.join(temp_dir, f'item_{i}.npy'), np.asarray(item_array))
+
+        np.save(os.path.join(temp_dir, 'time.npy'),
+            pd.DatetimeIndex(dataset.time).values.astype('datetime64[ns]'))
+
+        geometry_names = []
+
+        for attribute in self.GEOMETRY_ATTRIBUTES if engine != None else []:
+
+            try:
+                geometry = np.asarray(getattr(engine, attribute))
+            except Exception:
+                continue
+
+            np.save(os.path.join(temp_dir, f'{attribute}.npy'), geometry)
+            geometry_names.append(attribute)
+
+        # The manifest is written last, it marks the version as complete:
+        with open(os.path.join(temp_dir, 'manifest.json'), 'w') as manifest_file:
+            json.dump({'file_version': list(file_version), 'items': item_names,
+                'geometry': geometry_names}, manifest_file)
+
+        try:
+            os.rename(temp_dir, version_dir)
+
+        except OSError:
+            # Another process published the version first:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        print(f'[PUBLISHED TO SHARED STORE]: {file_version[0]} -> {version_dir}')
+
+        self.cleanup(file_version)
+
+    # Method that memory maps a published file version:
+    def attach(self, file_version):
+        '''
+        Method memory maps the arrays of a published file version read-only.
+
+        Parameters
+        ----------
+        file_version : tuple
+            The (path, modification time) of the dfsu file.
+
+        Returns
+        -------
+        dataset : shared_dataset
+            The read-only dataset.
+        '''
+        version_dir = self.get_version_dir(file_version)
+
+        with open(os.path.join(version_dir, 'manifest.json'), 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+
+        item_arrays = {item_name: np.load(os.path.join(version_dir, f'item_{i}.npy'),
+            mmap_mode='r') for i, item_name in enumerate(manifest['items'])}
+
+        geometry = {name: np.load(os.path.join(version_dir, f'{name}.npy'), mmap_mode='r')
+            for name in manifest['geometry']}
+
+        time = pd.DatetimeIndex(np.load(os.path.join(version_dir, 'time.npy')))
+
+        return shared_dataset(item_arrays, time, geometry)
+
+    # Method that records a reference to a version held by a dataset:
+    def add_reference(self, version_dir, dataset):
+        '''
+        Method writes a reference file for a dataset in the version directory.
+        The reference is removed when the dataset is garbage collected or the
+        process exits.
+
+        Parameters
+        ----------
+        version_dir : str
+            The version directory of the dataset.
+
+        dataset : shared_dataset
+            The attached dataset.
+        '''
+        reference_path = os.path.join(version_dir,
+            f'ref_{os.getpid()}_{next(shared_dataset_store.reference_counter)}')
+
+        with open(reference_path, 'w'):
+            pass
+
+        weakref.finalize(dataset, self.remove_reference, reference_path)
+
+    # Function that removes a reference file:
+    @staticmethod
+    def remove_reference(reference_path):
+        try:
+            os.remove(reference_path)
+        except OSError:
+            pass
+
+    # Method that counts the live references of a version:
+    def get_reference_count(self, version_dir):
+        '''
+        Method counts the references to a version directory held by processes
+        that are still running. References of processes that no longer exist
+        are removed.
+
+        Parameters
+        ----------
+        version_dir : str
+            The version directory.
+
+        Returns
+        -------
+        reference_count : int
+            The number of live references.
+        '''
+        reference_count = 0
+
+        for entry in os.scandir(version_dir):
+
+            if not entry.name.startswith('ref_'):
+                continue
+
+            pid = int(entry.name.split('_')[1])
+
+            if self.is_process_alive(pid):
+                reference_count += 1
+            else:
+                self.remove_reference(entry.path)
+
+        return reference_count
+
+    # Function that checks if a process is still running:
+    @staticmethod
+    def is_process_alive(pid):
+        '''
+        Function returns True if a process with the pid is running. On Windows,
+        where signalling a process would terminate it, every process is assumed
+        to be running.
+        '''
+        if pid == os.getpid() or os.name == 'nt':
+            return True
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+        return True
+
+    # Method that removes the unreferenced old versions of a file:
+    def cleanup(self, file_version):
+        '''
+        Method removes every version of the file other than file_version that
+        has no live references.
+
+        Parameters
+        ----------
+        file_version : tuple
+            The current (path, modification time) of the dfsu file.
+
+        Returns
+        -------
+        removed_dirs : list
+            The version directories that were removed.
+        '''
+        current_dir = self.get_version_dir(file_version)
+        path_prefix = os.path.basename(current_dir).split('_')[0] + '_'
+
+        removed_dirs = []
+
+        for entry in os.scandir(self.store_dir):
+
+            if not entry.is_dir() or not entry.name.startswith(path_prefix) or \
+                entry.path == current_dir or entry.name.endswith('.tmp'):
+                continue
+
+            if self.get_reference_count(entry.path) == 0:
+
+                # Mapped arrays stay readable after removal on POSIX systems. On
+                # Windows the removal fails while the arrays are mapped:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed_dirs.append(entry.path)
+
+        return removed_dirs
@@ -1,18 +1,869 @@
 # Importing data ingestion engine to access data from dfsu files:
-from data_api.dfs_ingestion_api import dfsu_ingestion_engine
+from data_api.dfs_ingestion_api import dfsu_ingestion_engine, lru_cache_store
+# Importing the memory profiler that is enabled via DFS_MEMORY_PROFILE:
+from data_api.dfs_profiling_api import shared_memory_profiler, profiled_stage
 # Importing data management packages:
 import math
 import pandas as pd
+import numpy as np
+# Importing cache management packages:
+import os
+import time
+import multiprocessing
+import hashlib
+import threading
+from collections import OrderedDict
+# Importing serialization packages:
 import json
+import base64
 # Importing data visualization packages:
 import plotly.graph_objects as go
-import plotly.express as px
+import plotly.io as pio
+import plotly.colors
+import plotly.utils
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
-# Importing Dash library packages:
-import dash
-import dash_core_components as dcc
-import dash_html_components as html
+
+# The numpy aware orjson encoder is used for figure payloads when it is installed:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Class that serializes dashboard figures to JSON payloads:
+class figure_serializer(object):
+    """
+    This object serializes plotly figures to the JSON payloads that are cached
+    and sent to the browser, and reads them back.
+
+    In binary mode every numeric array of the figure with at least min_length
+    values is written as a plotly.js typed array, {'dtype': 'f8', 'bdata':
+    base64 bytes, 'shape': 'rows, columns'}, instead of a list of floats written
+    as text. This makes payloads of long series several times smaller and
+    faster to encode and decode. The payload is encoded with orjson when it is
+    installed and with the plotly JSON encoder otherwise.
+
+    Typed arrays are decoded by plotly.js 2.28 and above. from_json() decodes
+    them for every version of plotly.py, so binary and text payloads can be
+    read by the same serializer.
+
+    Parameters
+    ----------
+    binary : bool : default = True
+        If True numeric arrays are written as typed arrays. If False the figure
+        is written by plotly.io.to_json().
+
+    min_length : int : default = 64
+        The minimum number of values of an array written as a typed array.
+    """
+    # The plotly.js typed array names of each numpy dtype:
+    TYPED_ARRAY_DTYPES = {'float64': 'f8', 'float32': 'f4', 'int32': 'i4',
+        'uint32': 'u4', 'int16': 'i2', 'uint16': 'u2', 'int8': 'i1', 'uint8': 'u1'}
+
+    def __init__(self, binary=True, min_length=64):
+
+        # Declaring instance variables:
+        self.binary = binary
+        self.min_length = min_length
+
+    # Method that encodes a numeric numpy array as a plotly.js typed array:
+    def encode_array(self, array):
+        '''
+        Method encodes a numeric numpy array as a typed array dict. 64 bit
+        integers are written as 32 bit integers when their values fit and as
+        64 bit floats otherwise, as plotly.js has no 64 bit integer arrays.
+
+        Parameters
+        ----------
+        array : numpy array
+            The numeric array.
+
+        Returns
+        -------
+        typed_array : dict or numpy array
+            The typed array dict, or the array itself if it is not numeric or is
+            shorter than min_length.
+        '''
+        if array.dtype.kind not in 'biuf' or array.size < self.min_length:
+            return array
+
+        if array.dtype.kind == 'b':
+            array = array.astype(np.uint8)
+
+        elif array.dtype.kind in 'iu' and array.dtype.name not in self.TYPED_ARRAY_DTYPES:
+            int32_info = np.iinfo(np.int32)
+            fits_int32 = array.min() >= int32_info.min and array.max() <= int32_info.max
+            array = array.astype(np.int32 if fits_int32 else np.float64)
+
+        elif array.dtype.name not in self.TYPED_ARRAY_DTYPES:
+            array = array.astype(np.float64)
+
+        # plotly.js reads typed arrays as little endian:
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+
+        typed_array = {'dtype': self.TYPED_ARRAY_DTYPES[array.dtype.name],
+            'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+        if array.ndim > 1:
+            typed_array['shape'] = ', '.join(str(length) for length in array.shape)
+
+        return typed_array
+
+    # Method that decodes a plotly.js typed array into a numpy array:
+    def decode_array(self, typed_array):
+        '''
+        Method decodes a typed array dict into a numpy array.
+
+        Parameters
+        ----------
+        typed_array : dict
+            The {'dtype', 'bdata', 'shape'} typed array dict.
+
+        Returns
+        -------
+        array : numpy array
+            The decoded array.
+        '''
+        array = np.frombuffer(base64.b64decode(typed_array['bdata']),
+            dtype=np.dtype(typed_array['dtype']).newbyteorder('<'))
+
+        if 'shape' in typed_array:
+            array = array.reshape([int(length) for length in
+                str(typed_array['shape']).split(',')])
+
+        return array
+
+    # Method that replaces the numeric arrays of a figure dict with typed arrays:
+    def encode_arrays(self, value):
+        '''
+        Method walks a figure dict (see plotly's to_plotly_json()) and replaces
+        every numeric array, or list of numbers, by a typed array.
+
+        Parameters
+        ----------
+        value : object
+            A figure dict or any value within it.
+
+        Returns
+        -------
+        encoded_value : object
+            The value with its numeric arrays encoded.
+        '''
+        if isinstance(value, dict):
+            return {key: self.encode_arrays(item) for key, item in value.items()}
+
+        if isinstance(value, (list, tuple)):
+
+            if len(value) >= self.min_length and all(isinstance(item, (int, float))
+                and not isinstance(item, bool) for item in value):
+                return self.encode_array(np.asarray(value))
+
+            return [self.encode_arrays(item) for item in value]
+
+        if isinstance(value, np.ndarray):
+            return self.encode_array(value)
+
+        return value
+
+    # Method that replaces the typed arrays of a figure dict with numpy arrays:
+    def decode_arrays(self, value):
+        '''
+        Method walks a figure dict and replaces every typed array by a numpy array.
+
+        Parameters
+        ----------
+        value : object
+            A figure dict or any value within it.
+
+        Returns
+        -------
+        decoded_value : object
+            The value with its typed arrays decoded.
+        '''
+        if isinstance(value, dict):
+
+            if 'bdata' in value and 'dtype' in value:
+                return self.decode_array(value)
+
+            return {key: self.decode_arrays(item) for key, item in value.items()}
+
+        if isinstance(value, list):
+            return [self.decode_arrays(item) for item in value]
+
+        return value
+
+    # Method that encodes any value the fast JSON encoder cannot:
+    def encode_default(self, value):
+        '''
+        Method is the fallback of the JSON encoder for values it cannot encode
+        natively, such as pandas timestamps and object arrays.
+        '''
+        return plotly.utils.PlotlyJSONEncoder().default(value)
+
+    # Method that serializes a figure to a JSON payload:
+    def to_json(self, fig):
+        '''
+        Method serializes a plotly figure to a JSON payload.
+
+        Parameters
+        ----------
+        fig : plotly figure object
+            The figure.
+
+        Returns
+        -------
+        payload : str
+            The JSON payload of the figure.
+        '''
+        if not self.binary:
+            return pio.to_json(fig, validate=False)
+
+        fig_dict = self.encode_arrays(fig.to_plotly_json())
+
+        if orjson != None:
+            return orjson.dumps(fig_dict, default=self.encode_default,
+                option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+        return json.dumps(fig_dict, cls=plotly.utils.PlotlyJSONEncoder)
+
+    # Method that reads a figure from a JSON payload:
+    def from_json(self, payload):
+        '''
+        Method reads a plotly figure from a JSON payload written by to_json() in
+        either mode.
+
+        Parameters
+        ----------
+        payload : str
+            The JSON payload of the figure.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The figure.
+        '''
+        fig_dict = orjson.loads(payload) if orjson != None else json.loads(payload)
+
+        return go.Figure(self.decode_arrays(fig_dict))
+
+# Class that caches serialized dashboard figures by node and source file version:
+class figure_cache(object):
+    """
+    This object is an LRU cache of serialized plotly figures used by the dashboard
+    so that views of popular nodes are rendered from cache instead of being
+    rebuilt from the raw dfsu data on every request.
+
+    Figures are stored as their JSON payload and keyed by (resolved element
+    index, view type, dfsu path, dfsu modification time). As the key contains
+    the version of the dfsu file, a new model run produces new keys and the
+    views of the previous run are evicted as the cache fills.
+
+    The in-memory cache is bounded both by number of entries and by total
+    payload size. If a cache_dir is given the payloads are also written to
+    disk so that they are shared by every process using the same directory,
+    such as the workers of a dashboard server.
+
+    Parameters
+    ----------
+    max_entries : int : default = 256
+        The maximum number of figures held in memory.
+
+    max_bytes : int : default = 256 * 1024**2
+        The maximum total size of the in-memory payloads in bytes.
+
+    cache_dir : str : default = None
+        The directory used to share payloads across processes. If None the
+        cache is memory only.
+
+    max_disk_bytes : int : default = 1024**3
+        The maximum total size of the payloads in cache_dir. The least recently
+        written payloads are removed first.
+
+    serializer : figure_serializer : default = None
+        The serializer of the cached payloads. By default the text (plotly.io)
+        serialization. Pass figure_serializer(binary=True) to cache binary
+        encoded payloads.
+    """
+    def __init__(self, max_entries=256, max_bytes=256 * 1024**2, cache_dir=None,
+        max_disk_bytes=1024**3, serializer=None):
+
+        # Declaring instance variables:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.serializer = figure_serializer(binary=False) if serializer == None \
+            else serializer
+
+        # Key-Value store of {cache key: JSON payload} in LRU order:
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+
+        # Counters used to measure the effectiveness of the cache:
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir != None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        shared_memory_profiler.register_source('figure_cache', self,
+            lambda cache: cache.total_bytes)
+
+    # Method that builds a cache key from the view and the dfsu file version:
+    def build_key(self, element_index, view_type, file_version):
+        '''
+        Method builds the cache key of a view.
+
+        Parameters
+        ----------
+        element_index : int or tuple
+            The resolved element index (or indices) the view is built from.
+
+        view_type : str
+            The name of the view, e.g. 'node_dashboard'.
+
+        file_version : tuple
+            The (path, modification time) of the dfsu file the view is built
+            from. See dfsu_ingestion_engine.file_version.
+
+        Returns
+        -------
+        key : str
+            A sha1 hex digest of the key components.
+        '''
+        key_str = f"{element_index}|{view_type}|{file_version[0]}|{file_version[1]}"
+
+        return hashlib.sha1(key_str.encode()).hexdigest()
+
+    # Method that returns a cached payload from memory or disk:
+    def get_payload(self, key):
+        '''
+        Method returns the JSON payload of a cached figure. Payloads that are only
+        found on disk are loaded into the in-memory cache.
+
+        Parameters
+        ----------
+        key : str
+            The key built via build_key().
+
+        Returns
+        -------
+        payload : str or None
+            The JSON payload of the figure or None if it is not cached.
+        '''
+        with self.lock:
+
+            if key in self.entries:
+
+                self.entries.move_to_end(key)
+                self.hits += 1
+
+                return self.entries[key]
+
+        payload = self.read_disk_payload(key)
+
+        if payload == None:
+
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.store_memory_payload(key, payload)
+
+        return payload
+
+    # Method that checks if a key is cached without counting a hit or miss:
+    def contains(self, key):
+        '''
+        Method returns True if a payload is cached for the key in memory or in the
+        cache directory. The hit and miss counters are not changed.
+        '''
+        with self.lock:
+            if key in self.entries:
+                return True
+
+        return self.cache_dir != None and \
+            os.path.exists(os.path.join(self.cache_dir, f'{key}.json'))
+
+    # Method that adds a payload to the cache:
+    def put_payload(self, key, payload):
+        '''
+        Method adds a JSON payload to the in-memory cache and, if a cache
+        directory is set, to disk.
+
+        Parameters
+        ----------
+        key : str
+            The key built via build_key().
+
+        payload : str
+            The JSON payload of the figure.
+        '''
+        self.store_memory_payload(key, payload)
+
+        if self.cache_dir != None:
+            self.write_disk_payload(key, payload)
+
+    # Method that returns a cached figure or builds and caches it:
+    def get_figure(self, key, build_figure):
+        '''
+        Method returns the cached figure for a key. If the figure is not cached
+        it is built, serialized and cached. A new figure object is returned on
+        every call so callers can modify it without changing the cache.
+
+        Parameters
+        ----------
+        key : str
+            The key built via build_key().
+
+        build_figure : callable
+            A function with no arguments that builds the plotly figure.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The cached or newly built figure.
+        '''
+        payload = self.get_payload(key)
+
+        if payload == None:
+
+            payload = self.serializer.to_json(build_figure())
+            self.put_payload(key, payload)
+
+        return self.serializer.from_json(payload)
+
+    # Method that adds a payload to memory and evicts least recently used entries:
+    def store_memory_payload(self, key, payload):
+        '''
+        Method adds a payload to the in-memory LRU and evicts the least recently
+        used payloads until the entry and byte bounds are met. Payloads larger
+        than max_bytes are not held in memory.
+        '''
+        if len(payload) > self.max_bytes:
+            return
+
+        with self.lock:
+
+            if key in self.entries:
+                self.total_bytes -= len(self.entries.pop(key))
+
+            self.entries[key] = payload
+            self.total_bytes += len(payload)
+
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+
+                (evicted_key, evicted_payload) = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted_payload)
+
+    # Method that reads a payload from the cache directory:
+    def read_disk_payload(self, key):
+        '''
+        Method reads a payload from the cache directory.
+
+        Returns
+        -------
+        payload : str or None
+            The payload or None if there is no cache directory or no payload
+            for the key.
+        '''
+        if self.cache_dir == None:
+            return None
+
+        try:
+            with open(os.path.join(self.cache_dir, f'{key}.json'), 'r') as payload_file:
+                return payload_file.read()
+
+        except OSError:
+            return None
+
+    # Method that writes a payload to the cache directory:
+    def write_disk_payload(self, key, payload):
+        '''
+        Method writes a payload to the cache directory. The payload is written to
+        a temporary file that is then renamed so other processes never read a
+        partially written payload. The oldest payloads are removed once the
+        directory exceeds max_disk_bytes.
+        '''
+        payload_path = os.path.join(self.cache_dir, f'{key}.json')
+        temp_path = f'{payload_path}.{os.getpid()}.tmp'
+
+        with open(temp_path, 'w') as payload_file:
+            payload_file.write(payload)
+
+        os.replace(temp_path, payload_path)
+
+        # Pruning the oldest payloads once the directory exceeds its bound:
+        payload_entries = [entry for entry in os.scandir(self.cache_dir)
+            if entry.name.endswith('.json')]
+
+        disk_bytes = sum(entry.stat().st_size for entry in payload_entries)
+
+        if disk_bytes <= self.max_disk_bytes:
+            return
+
+        for entry in sorted(payload_entries, key=lambda entry: entry.stat().st_mtime):
+
+            if disk_bytes <= self.max_disk_bytes:
+                break
+
+            try:
+                disk_bytes -= entry.stat().st_size
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    # Method that removes every cached payload:
+    def clear(self):
+        '''
+        Method removes every payload from memory and from the cache directory.
+        '''
+        with self.lock:
+
+            self.entries.clear()
+            self.total_bytes = 0
+
+        if self.cache_dir != None:
+
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith('.json'):
+                    os.remove(entry.path)
+
+# Class that reduces time series traces to a bounded number of points before plotting:
+class trace_downsampler(object):
+    """
+    This object contains the shape preserving downsampling algorithms used by the
+    dashboard to bound the number of points pushed into each plotly trace, no
+    matter how long the plotted history is.
+
+    Two algorithms are provided:
+
+    - 'lttb': Largest-Triangle-Three-Buckets. Keeps the point in each bucket that
+        forms the largest triangle with the previously kept point and the mean of
+        the next bucket, which preserves the visual shape of the series.
+    - 'minmax': Keeps the minimum and maximum of each bucket, which preserves the
+        envelope of the series including every spike.
+
+    All methods return the sorted integer positions of the kept points so that
+    the same selection can be applied to the x values, the y values and any
+    other column sampled at the same times.
+
+    Parameters
+    ----------
+    max_points : int : default = 2000
+        The target number of points of each downsampled trace.
+
+    method : str : default = 'lttb'
+        The default algorithm, either 'lttb' or 'minmax'.
+    """
+    def __init__(self, max_points=2000, method='lttb'):
+
+        # Declaring instance variables:
+        self.max_points = max_points
+        self.method = method
+
+    # Method that selects the points of a series to be plotted in a viewport:
+    def downsample(self, x, y, max_points=None, method=None, x_range=None):
+        '''
+        Method selects at most max_points points of the series (x, y) that lie
+        inside the x_range viewport. Calling it again with the zoomed x_range
+        refines the trace to max_points points of the visible window.
+
+        Parameters
+        ----------
+        x : array-like
+            The x values of the series in ascending order. Datetime values are
+            supported.
+
+        y : array-like
+            The y values of the series.
+
+        max_points : int : default = None
+            The target number of points. Defaults to self.max_points.
+
+        method : str : default = None
+            The algorithm, either 'lttb' or 'minmax'. Defaults to self.method.
+
+        x_range : tuple : default = None
+            The (start, end) of the viewport. If None the whole series is used.
+
+        Returns
+        -------
+        keep_index : numpy array
+            The sorted integer positions in x and y of the points to plot.
+        '''
+        max_points = self.max_points if max_points == None else max_points
+        method = self.method if method == None else method
+
+        x_values = self.to_numeric(x)
+        y_values = np.asarray(y, dtype=float)
+
+        # Restricting the series to the viewport and dropping missing values:
+        mask = np.isfinite(y_values)
+
+        if x_range != None:
+
+            (x_start, x_end) = self.to_numeric(list(x_range))
+            mask &= (x_values >= x_start) & (x_values <= x_end)
+
+        candidates = np.flatnonzero(mask)
+
+        if len(candidates) <= max_points:
+            return candidates
+
+        if method == 'minmax':
+            keep = self.min_max(y_values[candidates], max_points)
+        else:
+            keep = self.lttb(x_values[candidates], y_values[candidates], max_points)
+
+        return candidates[keep]
+
+    # Method that converts x values to floats:
+    def to_numeric(self, x):
+        '''
+        Method converts an array of numeric or datetime x values to a float array.
+        Datetimes are converted to nanoseconds since the epoch.
+        '''
+        x_values = np.asarray(x)
+
+        if np.issubdtype(x_values.dtype, np.number):
+            return x_values.astype(float)
+
+        return pd.to_datetime(x_values).values.astype('datetime64[ns]').astype(np.int64).astype(float)
+
+    # Method that implements the Largest-Triangle-Three-Buckets algorithm:
+    def lttb(self, x, y, n_out):
+        '''
+        Method downsamples a series to n_out points via Largest-Triangle-Three-
+        Buckets. The first and last points are always kept. The area of every
+        candidate triangle in a bucket is computed in a single vectorized step.
+
+        Parameters
+        ----------
+        x : numpy array
+            The float x values in ascending order.
+
+        y : numpy array
+            The float y values.
+
+        n_out : int
+            The number of points to keep. Must be at least 3.
+
+        Returns
+        -------
+        keep_index : numpy array
+            The sorted integer positions of the kept points.
+        '''
+        n = len(x)
+        n_out = max(3, n_out)
+
+        # Bucket boundaries of the n - 2 interior points split into n_out - 2 buckets:
+        edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+        keep = np.empty(n_out, dtype=int)
+        keep[0] = 0
+        keep[-1] = n - 1
+
+        for i in range(n_out - 2):
+
+            (start, end) = (edges[i], edges[i + 1])
+
+            # The mean of the next bucket (or the last point for the last bucket):
+            if i < n_out - 3:
+                next_slice = slice(edges[i + 1], edges[i + 2])
+                (next_x, next_y) = (x[next_slice].mean(), y[next_slice].mean())
+            else:
+                (next_x, next_y) = (x[-1], y[-1])
+
+            (prev_x, prev_y) = (x[keep[i]], y[keep[i]])
+
+            areas = np.abs((prev_x - next_x) * (y[start:end] - prev_y) -
+                (prev_x - x[start:end]) * (next_y - prev_y))
+
+            keep[i + 1] = start + int(np.argmax(areas))
+
+        return keep
+
+    # Method that keeps the minimum and maximum of each bucket:
+    def min_max(self, y, n_out):
+        '''
+        Method downsamples a series to at most n_out points by keeping the
+        minimum and the maximum of n_out / 2 equally sized buckets. The
+        selection of every bucket is made with a single lexsort.
+
+        Parameters
+        ----------
+        y : numpy array
+            The float y values.
+
+        n_out : int
+            The maximum number of points to keep.
+
+        Returns
+        -------
+        keep_index : numpy array
+            The sorted integer positions of the kept points.
+        '''
+        n = len(y)
+        n_buckets = max(1, n_out // 2)
+
+        bucket = (np.arange(n) * n_buckets) // n
+
+        # Ordering by bucket, then by value, puts each bucket's min first and max last:
+        order = np.lexsort((y, bucket))
+        sorted_bucket = bucket[order]
+
+        first = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+        last = np.r_[first[1:] - 1, n - 1]
+
+        return np.unique(np.concatenate([order[first], order[last]]))
+
+# Class that bins current speed and direction into rose diagram frequency tables:
+class rose_binner(object):
+    """
+    This object bins current speed and direction samples into the frequency
+    table of a current rose diagram. Every sample is assigned to a direction
+    sector and a speed class with a single vectorized 2D histogram, so the rose
+    plot contains one bar per (sector, speed class) instead of one bar per sample.
+
+    Directions are binned clockwise from north with the first sector centered
+    on north. Tables are cached per key (e.g. element and file version) in a
+    bounded LRU so that repeated views of the same element are not re-binned.
+
+    Parameters
+    ----------
+    n_sectors : int : default = 16
+        The number of direction sectors.
+
+    speed_bins : list : default = None
+        The edges of the speed classes in the units of the speed data. The last
+        class is open ended. By default [0, 0.1, 0.25, 0.5, 0.75, 1.0] m/s.
+
+    direction_units : str : default = 'radians'
+        The units of the direction data, either 'radians' or 'degrees'.
+
+    max_entries : int : default = 256
+        The maximum number of cached frequency tables.
+    """
+    def __init__(self, n_sectors=16, speed_bins=None, direction_units='radians',
+        max_entries=256):
+
+        # Declaring instance variables:
+        self.n_sectors = n_sectors
+        self.speed_bins = [0, 0.1, 0.25, 0.5, 0.75, 1.0] if speed_bins == None else speed_bins
+        self.direction_units = direction_units
+        self.max_entries = max_entries
+
+        # Key-Value store of {cache key: frequency table} in LRU order:
+        self.tables = OrderedDict()
+        self.lock = threading.RLock()
+
+    # Method that builds the labels of each speed class:
+    def get_speed_labels(self):
+        '''
+        Method returns the labels of the speed classes, e.g. '0.1-0.25' and '>1.0'.
+        '''
+        edges = self.speed_bins
+
+        labels = [f'{edges[i]}-{edges[i + 1]}' for i in range(len(edges) - 1)]
+        labels.append(f'>{edges[-1]}')
+
+        return labels
+
+    # Method that bins speed and direction samples into a frequency table:
+    def bin(self, speed, direction):
+        '''
+        Method bins speed and direction samples into a table of the percentage
+        of samples in each direction sector and speed class. Samples with a
+        missing speed or direction are ignored.
+
+        Parameters
+        ----------
+        speed : array-like
+            The current speed samples.
+
+        direction : array-like
+            The current direction samples in self.direction_units.
+
+        Returns
+        -------
+        rose_df : pandas dataframe
+            A dataframe indexed by the sector center in degrees with one column
+            of frequencies (in percent) per speed class.
+        '''
+        speed = np.asarray(speed, dtype=float)
+        direction = np.asarray(direction, dtype=float)
+
+        if self.direction_units == 'radians':
+            direction = np.degrees(direction)
+
+        valid = np.isfinite(speed) & np.isfinite(direction)
+        (speed, direction) = (speed[valid], direction[valid])
+
+        # Shifting by half a sector so that the first sector is centered on north:
+        sector_width = 360 / self.n_sectors
+        direction = (direction + sector_width / 2) % 360
+
+        direction_edges = np.linspace(0, 360, self.n_sectors + 1)
+        speed_edges = np.append(self.speed_bins, np.inf)
+
+        (counts, _, _) = np.histogram2d(direction, np.clip(speed, self.speed_bins[0], None),
+            bins=[direction_edges, speed_edges])
+
+        frequency = counts * 100 / max(1, len(speed))
+
+        return pd.DataFrame(frequency, columns=self.get_speed_labels(),
+            index=pd.Index(np.arange(self.n_sectors) * sector_width, name='Direction'))
+
+    # Method that returns a cached frequency table or bins and caches it:
+    def get_table(self, key, speed, direction):
+        '''
+        Method returns the cached frequency table for key, binning speed and
+        direction via bin() if it is not cached.
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the table, such as (element index, file version).
+
+        speed : array-like or callable
+            The speed samples, or a function with no arguments returning them so
+            that the samples are only extracted when the table is not cached.
+
+        direction : array-like or callable
+            The direction samples, or a function with no arguments returning them.
+
+        Returns
+        -------
+        rose_df : pandas dataframe
+            The frequency table. See bin().
+        '''
+        with self.lock:
+
+            if key in self.tables:
+
+                self.tables.move_to_end(key)
+                return self.tables[key]
+
+        if callable(speed):
+            speed = speed()
+
+        if callable(direction):
+            direction = direction()
+
+        rose_df = self.bin(speed, direction)
+
+        with self.lock:
+
+            self.tables[key] = rose_df
+
+            while len(self.tables) > self.max_entries:
+                self.tables.popitem(last=False)
+
+        return rose_df
+
+# The figure cache shared by every dashboard in the process by default:
+shared_figure_cache = figure_cache()
 
 # Class that handels and processes the model's map and other GIS data:
 class gis_model(object):
@@ -22,11 +873,23 @@ class gis_model(object):
     generated by input parameters are used to create an interactive Matchbox
     map.
 
+    The map layer is built from the dfsu mesh of a dfsu_ingestion_engine. Each
+    point on the map is the centroid of a surface element and carries the index
+    of that element as its customdata, so a click on the map maps straight back
+    to an element index (see get_clicked_element()).
+
+    Meshes can contain hundreds of thousands of elements, so the centroids are
+    decimated for each zoom level by clustering them into a grid of screen sized
+    cells and plotting one representative element per cell. The decimated
+    layers are cached per mesh and zoom level and shared by every gis_model of
+    the same mesh in the process.
+
     Parameters
     ----------
     center_loc : tuple
         A tuple of (lat,long) data that represents the center of the map area.
-        This tuple would be used to center the Scattermapbox satellite map.
+        This tuple would be used to center the Scattermapbox satellite map. If
+        None the map is centered on the mean of the mesh centroids.
 
     client_model : str
         The string representing the name of the client model that the object is
@@ -35,54 +898,199 @@ class gis_model(object):
 
     access_token : str
         The access token for the Mapbox API.
+
+    mesh_engine : dfsu_ingestion_engine : default = None
+        The ingestion engine whose mesh the map layer is built from. If None the
+        map contains no points.
+
+    max_points : int : default = 5000
+        The maximum number of points plotted at any zoom level.
+
+    cluster_pixels : int : default = 8
+        The approximate size in screen pixels of each clustering cell.
     """
+    # LRU store of {(mesh key, zoom level): decimated layer dict} shared by every
+    # gis_model in the process, enough for every zoom level of a few meshes:
+    layer_cache = lru_cache_store(64)
 
-    def __init__(self, center_loc, client_model, access_token):
+    def __init__(self, center_loc, client_model, access_token, mesh_engine=None,
+        max_points=5000, cluster_pixels=8):
 
         # Instance Variables:
         self.center_loc = center_loc
         self.client_model = client_model
         self.access_token = access_token
+        self.mesh_engine = mesh_engine
+        self.max_points = max_points
+        self.cluster_pixels = cluster_pixels
 
         # Initalizing methods that build data structures based on input parms:
         self.data_points = self.build_coord_lst()
 
+        # Key identifying the mesh so that decimated layers are cached per mesh:
+        self.mesh_key = hashlib.sha1(
+            np.ascontiguousarray([self.data_points['long'], self.data_points['lat']]
+            ).tobytes()).hexdigest()
 
     def build_coord_lst(self):
         '''
-        Internal method that queries the file search api and builds a list of all
-        the lat and long points that will be displayed on this instance of the
-        GIS model.
+        Internal method that extracts the centroid of every surface element of
+        the mesh that will be displayed on this instance of the GIS model.
 
         Returns
         -------
         coord_dict : dict
             A python dictionary that contains all of the latitude and longnitude
             data to be plotted onto the Scattermapbox plot. Dict follows the structure:
-            {'lat': [list of lat values], 'long': [list of long values]}
+            {'lat': [array of lat values], 'long': [array of long values],
+            'element_index': [array of element indices]}
         '''
-        # TODO: Invoke and initalize the file query api
-        data_points = []
+        if self.mesh_engine == None:
+            return {'lat': np.array([]), 'long': np.array([]),
+                'element_index': np.array([], dtype=int)}
+
+        surface_elements = self.mesh_engine.get_surface_elements()
+        surface_coords = np.asarray(self.mesh_engine.element_coordinates)[surface_elements]
+
+        data_points = {
+            'lat': surface_coords[:, 1],
+            'long': surface_coords[:, 0],
+            'element_index': surface_elements
+            }
 
         return data_points
 
+    # Method that returns the decimated map layer for a zoom level:
+    def get_zoom_points(self, zoom):
+        '''
+        Method returns the surface element centroids to be plotted at a zoom
+        level. The centroids are clustered into a grid whose cells are roughly
+        cluster_pixels wide on screen at that zoom level and the first element
+        of each cell is kept. If more than max_points cells remain the cell size
+        is doubled until they fit. Layers are cached per mesh and zoom level.
 
-    def build_map_fig(self):
+        Parameters
+        ----------
+        zoom : float
+            The Mapbox zoom level. It is rounded down to a whole level.
 
-        # For Dev-- Mapbox public access token:
-        access_token = "pk.eyJ1IjoibWF0dGhld3RlZSIsImEiOiJja2FwaW5xYWMwbDJ1MndwMXJmMDM0b2hoIn0.lrkYRxipKJe4s5IyA1kq7w"
+        Returns
+        -------
+        layer_dict : dict
+            A dict of {'lat', 'long', 'element_index', 'cluster_size'} arrays of
+            the kept points, where cluster_size is the number of elements each
+            point represents.
+        '''
+        zoom_level = int(max(0, math.floor(zoom)))
+        cache_key = (self.mesh_key, zoom_level, self.max_points, self.cluster_pixels)
+
+        layer_dict = gis_model.layer_cache.get(cache_key)
+
+        if layer_dict is not None:
+            return layer_dict
+
+        (long, lat) = (self.data_points['long'], self.data_points['lat'])
+
+        # Width in degrees of cluster_pixels at this zoom level of 256 px tiles:
+        cell_size = 360 / (256 * 2**zoom_level) * self.cluster_pixels
+
+        while True:
+
+            cell_x = np.floor(long / cell_size).astype(np.int64)
+            cell_y = np.floor(lat / cell_size).astype(np.int64)
+
+            (cells, keep, cluster_size) = np.unique(np.stack([cell_x, cell_y], axis=1),
+                axis=0, return_index=True, return_counts=True)
+
+            if len(keep) <= self.max_points:
+                break
+
+            cell_size *= 2
+
+        layer_dict = {
+            'lat': lat[keep],
+            'long': long[keep],
+            'element_index': self.data_points['element_index'][keep],
+            'cluster_size': cluster_size
+            }
+
+        gis_model.layer_cache.put(cache_key, layer_dict)
+
+        return layer_dict
 
-        # Creating test Scatter Map Box Graph Object:
-        fig = go.Figure(go.Scattermapbox())
+    # Method that maps a click on the map back to an element index:
+    def get_clicked_element(self, click_data):
+        '''
+        Method returns the element index of the point clicked on the map.
+
+        Parameters
+        ----------
+        click_data : dict
+            The clickData of the map graph.
+
+        Returns
+        -------
+        element_index : int or None
+            The index of the clicked surface element or None if no point was
+            clicked.
+        '''
+        if not click_data or not click_data.get('points'):
+            return None
 
-        # Updating figure to display Sat data:
+        return int(click_data['points'][0]['customdata'])
+
+    def build_map_fig(self, zoom=7):
+        '''
+        Method builds the Scattermapbox figure of the mesh for a zoom level.
+
+        Parameters
+        ----------
+        zoom : float : default = 7
+            The Mapbox zoom level the mesh is decimated for.
+
+        Returns
+        -------
+        fig : plotly figure object
+            The map figure. Each point carries its element index as customdata.
+            The viewport of a displayed map is kept when the figure is replaced.
+        '''
+        # For Dev-- Mapbox public access token:
+        access_token = self.access_token if self.access_token else \
+            "pk.eyJ1IjoibWF0dGhld3RlZSIsImEiOiJja2FwaW5xYWMwbDJ1MndwMXJmMDM0b2hoIn0.lrkYRxipKJe4s5IyA1kq7w"
+
+        layer_dict = self.get_zoom_points(zoom)
+
+        # Centering the map on the mesh if no center is given:
+        if self.center_loc != None:
+            center = dict(lat=self.center_loc[0], lon=self.center_loc[1])
+
+        elif len(self.data_points['lat']) > 0:
+            center = dict(lat=float(np.mean(self.data_points['lat'])),
+                lon=float(np.mean(self.data_points['long'])))
+
+        else:
+            center = dict(lat=10.008, lon=-60.306)
+
+        # Creating the Scatter Map Box Graph Object of the decimated mesh:
+        fig = go.Figure(go.Scattermapbox(
+            lat=layer_dict['lat'],
+            lon=layer_dict['long'],
+            customdata=layer_dict['element_index'],
+            mode='markers',
+            marker=dict(size=np.clip(4 + np.log2(layer_dict['cluster_size']), 4, 12)),
+            hovertemplate='Element %{customdata}<extra></extra>'
+            ))
+
+        # Updating figure to display Sat data. The constant uirevision keeps the
+        # user's pan and zoom when the figure of another zoom level replaces it:
         fig.update_layout(
             mapbox = {
                 'accesstoken' : access_token,
                 'style' : 'satellite',
-                'center': dict(lat=10.008, lon=-60.306 ),
-                'zoom' : 7
-            }
+                'center': center,
+                'zoom' : zoom
+            },
+            uirevision = 'mesh-map'
         )
 
         return fig
@@ -108,17 +1116,43 @@ class dashboard(dfsu_ingestion_engine):
     gis_filepath : str
         This is the filepath of the GeoJSON file that will be used to initalize the
         gis_model() object used for plotting maps and spatial visualization.
+
+    view_cache : figure_cache : default = None
+        The figure_cache the dashboard's views are cached in. By default every
+        dashboard in the process shares shared_figure_cache.
+
+    max_points : int : default = 2000
+        The maximum number of points in each plotted trace. Longer series are
+        reduced via the trace_downsampler.
+
+    access_token : str : default = None
+        The access token for the Mapbox API used by the gis_model.
+
+    shared_store : shared_dataset_store : default = None
+        The store the dataset is shared through with the other dashboard worker
+        processes. See dfsu_ingestion_engine.
     '''
 
-    def __init__(self, filepath, gis_filepath):
+    def __init__(self, filepath, gis_filepath, view_cache=None, max_points=2000,
+        access_token=None, shared_store=None):
 
         self.filepath = filepath
 
         # Initalizing dfsu_ingestion_engine:
-        super().__init__(filepath) # NOTE: initalizes ingestion engine internally.
+        super().__init__(filepath, shared_store) # NOTE: initalizes ingestion engine internally.
+
+        # Declaring the cache that rendered views are stored in:
+        self.view_cache = shared_figure_cache if view_cache == None else view_cache
 
-        # Initalizing the gis model data:
-        self.gis_model = gis_model(gis_filepath)
+        # Initalizing the downsampler that bounds the size of each trace:
+        self.downsampler = trace_downsampler(max_points)
+
+        # Initalizing the binner that builds the current rose of the polar plot
+        # from the derived direction in degrees:
+        self.rose_binner = rose_binner(direction_units='degrees')
+
+        # Initalizing the gis model data from the mesh of the dfsu file:
+        self.gis_model = gis_model(None, gis_filepath, access_token, mesh_engine=self)
 
         # Key-Value store of config information for each time series plot:
         self.timeseries_format = {
@@ -127,12 +1161,17 @@ class dashboard(dfsu_ingestion_engine):
             'Density' : {'df_column':'Density', 'title':'Water Density', 'units':'kg/m^3'},
             'Current direction' : {'df_column':'Current direction', 'title':'Current Direction', 'units':'Radians'},
             'Current speed' : {'df_column':'Current speed', 'title':'Current Speed', 'units': 'm/s'},
+            'Current direction (degrees)' : {'df_column':'Current direction (degrees)', 'title':'Current Direction', 'units':'Degrees'},
+            'Current u' : {'df_column':'Current u', 'title':'Current U Component', 'units':'m/s'},
+            'Current v' : {'df_column':'Current v', 'title':'Current V Component', 'units':'m/s'},
+            'Density anomaly' : {'df_column':'Density anomaly', 'title':'Water Density Anomaly', 'units':'kg/m^3'},
                                 }
 
         # Key-Value store of config information for each polar radial plot:
         self.barpolar_format = {}
 
     # Method that returns a figure representing the main dashboard of a single point:
+    @profiled_stage('node_dashboard')
     def plot_node_data(self, long, lat, depth):
         '''
         Method returns a plotly figure object containing all the relevant graphs
@@ -161,7 +1200,68 @@ class dashboard(dfsu_ingestion_engine):
             with all the relevant graphs plotted. It is intended to be placed
             passed into a Dash applicaiton or a Django view.
         '''
+        # Resolving the node once so the view can be looked up by its element:
+        element_index = self.resolve_element(long, lat, depth)
+
+        view_key = self.get_node_view_key(element_index)
+
+        fig = self.view_cache.get_figure(view_key,
+            lambda: self.build_node_figure(long, lat, depth, element_index))
+
+        # Building title text string based on coordinate input:
+        title_text = f'CDL Analytics Dashboard for Model Node Located at \
+[Long:{long}     Lat:{lat}   Depth:{depth}]'
+
+        # The title is set outside of the cache as nearby points share an element:
+        fig.update_layout(title_text=title_text)
+
+        return fig
+
+    # Method that returns the view cache key of the main dashboard of an element:
+    def get_node_view_key(self, element_index):
+        '''
+        Method returns the key plot_node_data() caches the main dashboard of a
+        resolved element under.
+
+        Parameters
+        ----------
+        element_index : int
+            The index of the resolved element.
+
+        Returns
+        -------
+        view_key : str
+            The figure_cache key of the view.
+        '''
+        return self.view_cache.build_key(element_index,
+            f'node_dashboard:{self.downsampler.max_points}', self.file_version)
+
+    # Method that builds the main dashboard figure for a resolved element:
+    def build_node_figure(self, long, lat, depth, element_index):
+        '''
+        Method builds the subplot figure returned by plot_node_data() for an
+        element that has already been resolved. It is called by plot_node_data()
+        when the view of the element is not cached.
+
+        Parameters
+        ----------
+        long : float
+            The longnitude value of the location point
+
+        lat : float
+            The latitude value of the location point
+
+        depth : float
+            The depth value of the location point
+
+        element_index : int
+            The index of the element closest to the location point.
 
+        Returns
+        -------
+        subplot_figure : plotly figure object
+            The dashboard figure without a title.
+        '''
         # Creating the subplot format:
         fig = make_subplots(
             rows=4, cols=2,
@@ -182,41 +1282,44 @@ class dashboard(dfsu_ingestion_engine):
                      )
         fig['layout'].update(height=800) # Pysical Size of Page
 
+        # Extracting views of every plotted category of the element in one pass:
+        node_data = self.extract_view(['Current speed', 'Temperature',
+            'Density', 'Salinity', 'Current direction (degrees)'], element_index)
+
         # Current Speed:
-        fig.add_trace(self.create_timeseries(long, lat, depth, 'Current speed'),
-        row=1, col=1)
+        fig.add_trace(self.create_timeseries(long, lat, depth, 'Current speed',
+            node_data), row=1, col=1)
         fig.update_yaxes(title_text=self.timeseries_format['Current speed']['units'],
             row=1, col=1)
 
         # Temperature:
-        fig.add_trace(self.create_timeseries(long, lat, depth, 'Temperature'),
+        fig.add_trace(self.create_timeseries(long, lat, depth, 'Temperature', node_data),
             row=2, col=1)
         fig.update_yaxes(title_text=self.timeseries_format['Temperature']['units'],
             row=2, col=1)
 
         # Density:
-        fig.add_trace(self.create_timeseries(long, lat, depth, 'Density'),
+        fig.add_trace(self.create_timeseries(long, lat, depth, 'Density', node_data),
             row=3, col=1)
         fig.update_yaxes(title_text=self.timeseries_format['Density']['units'],
             row=3, col=1)
 
         # Salinity:
-        fig.add_trace(self.create_timeseries(long, lat, depth, 'Salinity'),
+        fig.add_trace(self.create_timeseries(long, lat, depth, 'Salinity', node_data),
             row=4, col=1)
         fig.update_yaxes(title_text=self.timeseries_format['Salinity']['units'],
             row=4, col=1)
 
-        # Polar Current Direction and Speed Plot:
-        fig.add_trace(self.create_polar_plot(long, lat, depth, 'Current speed',
-        'Current direction'), row=1, col=2)
+        # Polar Current Direction and Speed Plot, one trace per speed class:
+        for barpolar_plot in self.create_polar_plot(long, lat, depth, 'Current speed',
+            'Current direction (degrees)', node_data):
 
-        # Building title text string based on coordinate input:
-        title_text = f'CDL Analytics Dashboard for Model Node Located at \
-[Long:{long}     Lat:{lat}   Depth:{depth}]'
+            fig.add_trace(barpolar_plot, row=1, col=2)
 
-        fig.update_layout(title_text=title_text,
+        fig.update_layout(
             xaxis_rangeslider_visible=False,
             showlegend=False,
+            barmode='stack',
             # Setting polar plot axis to correct directional format:
             polar=dict(
                 angularaxis = dict(
@@ -264,6 +1367,31 @@ class dashboard(dfsu_ingestion_engine):
         column_data = {-12.39876: 59927, -10.16637: 2, -8.297584: 3, -6.722366: 35, -5.382481: 59683,
          -4.229135: 59684, -3.221019: 85, -2.322656: 59600, -1.50297: 8, -0.7340443: 38, 0.01: 9}
 
+        # The water column view is cached by the elements that make up the column:
+        view_key = self.view_cache.build_key(tuple(column_data.items()),
+            'water_column_table', self.file_version)
+
+        return self.view_cache.get_figure(view_key,
+            lambda: self.build_water_column_table(column_data))
+
+    # Method that builds the water column summary table for a resolved column:
+    def build_water_column_table(self, column_data):
+        '''
+        Method builds the summary table figure returned by plot_water_column_table()
+        from the resolved elements of a water column.
+
+        Parameters
+        ----------
+        column_data : dict
+            A dictionary of {layer depth: element index} for every layer of the
+            water column. See get_node_layers().
+
+        Returns
+        -------
+        table_figure : plotly graph object
+            The table of summary data for each water depth layer.
+        '''
+
         # Creating the dataframe that will be used to create the plotly table:
         table_df = pd.DataFrame(columns=['Depth', 'Avg Current Speed (m/s)',
             'Avg Water Salinity (PSU)', 'Avg Water Temperature (Degrees Celsius)', 'Avg Water Density (kg/m^3)'])
@@ -272,18 +1400,21 @@ class dashboard(dfsu_ingestion_engine):
          # Loop that itterates over column_data dict to create dataframe of relevant data:
         for depth, index in column_data.items():
 
-            # Extracting the water data based on the index value and declaring vars:
-            current_speed_data = self.extract_data('Current speed',
-                index)[self.timeseries_format['Current speed']['df_column']].mean()
+            # Extracting views of the water data based on the index value and declaring vars:
+            layer_data = self.extract_view(['Current speed', 'Salinity',
+                'Temperature', 'Density'], index)
+
+            current_speed_data = np.nanmean(
+                layer_data[self.timeseries_format['Current speed']['df_column']])
 
-            salinity_data = self.extract_data('Salinity',
-                index)[self.timeseries_format['Salinity']['df_column']].mean()
+            salinity_data = np.nanmean(
+                layer_data[self.timeseries_format['Salinity']['df_column']])
 
-            temperature_data = self.extract_data('Temperature',
-                index)[self.timeseries_format['Temperature']['df_column']].mean()
+            temperature_data = np.nanmean(
+                layer_data[self.timeseries_format['Temperature']['df_column']])
 
-            density_data = self.extract_data('Density',
-                index)[self.timeseries_format['Density']['df_column']].mean()
+            density_data = np.nanmean(
+                layer_data[self.timeseries_format['Density']['df_column']])
 
             # Creating dicit of column names and column vals to be appended to table_df:
             df_map_dict = {
@@ -312,7 +1443,8 @@ class dashboard(dfsu_ingestion_engine):
         return go.Figure(data=table)
 
     # Method that returns a timeseries scatterplot plotly object based on input data:
-    def create_timeseries(self, long, lat, depth, plot_name):
+    def create_timeseries(self, long, lat, depth, plot_name, node_data=None,
+        x_range=None, method='lttb'):
         '''
         Method plots and returns a plotly graph objects of timeseries data. The
         data is extracted from the dfsu_ingestion_engine and the format of the
@@ -333,6 +1465,20 @@ class dashboard(dfsu_ingestion_engine):
             This is the category string that will be used to retrieve the dfsu data
             and to determine the format of the timeseries.
 
+        node_data : pandas dataframe or node_view : default = None
+            A node snapshot built via get_node_snapshot() or a node_view built via
+            extract_view() that contains the plot_name column. If None the data
+            is extracted for the location point.
+
+        x_range : tuple : default = None
+            The (start, end) time of the viewport. Only points in the viewport
+            are plotted, so passing the zoomed range of a graph refines the trace.
+            If None the whole series is plotted.
+
+        method : str : default = 'lttb'
+            The downsampling algorithm used when the series has more points than
+            the dashboard's max_points, either 'lttb' or 'minmax'.
+
         Returns
         -------
         timeseries_plot : plotly.graph_objects
@@ -340,22 +1486,79 @@ class dashboard(dfsu_ingestion_engine):
             onto a subplot.
         '''
 
-        # Extracting data based on category:
-        timeseries_data = self.get_node_data(long, lat, depth, plot_name)
+        # Extracting data based on category if no snapshot is given:
+        if node_data is None:
+            node_data = self.extract_view([plot_name],
+                self.resolve_element(long, lat, depth))
+
+        timeseries_values = np.asarray(
+            node_data[self.timeseries_format[plot_name]['df_column']])
+
+        # Reducing the series to a bounded number of points in the viewport:
+        keep_index = self.downsampler.downsample(node_data.index,
+            timeseries_values, method=method, x_range=x_range)
 
         # Creating the timeseries plot and formatting it based on timeseries_format:
-        timeseries_plot = go.Scatter(x=timeseries_data.index,
-            y=timeseries_data[self.timeseries_format[plot_name]['df_column']],
+        timeseries_plot = go.Scatter(x=node_data.index[keep_index],
+            y=timeseries_values[keep_index],
             name= self.timeseries_format[plot_name]['title'])
 
         return timeseries_plot
 
+    # Method that rebuilds a timeseries trace for the zoomed range of a graph:
+    def refine_timeseries(self, long, lat, depth, plot_name, relayout_data):
+        '''
+        Method rebuilds a downsampled timeseries trace for the x axis range of a
+        zoomed graph so that zooming in reveals the full detail of the visible
+        window. It is intended to be called from a Dash callback on the
+        relayoutData of the graph.
+
+        Parameters
+        ----------
+        long : float
+            The longnitude value of the location point
+
+        lat : float
+            The latitude value of the location point
+
+        depth : float
+            The depth value of the location point
+
+        plot_name : str
+            The category string of the timeseries.
+
+        relayout_data : dict
+            The relayoutData of the graph. Ranges are read from the
+            'xaxis.range[0]' and 'xaxis.range[1]' keys or the 'xaxis.range' key.
+            If no range is present the whole series is used.
+
+        Returns
+        -------
+        timeseries_plot : plotly.graph_objects
+            The downsampled trace of the visible window.
+        '''
+        x_range = None
+
+        if relayout_data != None:
+
+            if 'xaxis.range[0]' in relayout_data:
+                x_range = (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+
+            elif 'xaxis.range' in relayout_data:
+                x_range = tuple(relayout_data['xaxis.range'])
+
+        return self.create_timeseries(long, lat, depth, plot_name, x_range=x_range)
+
     # Method that plots a specific polar plot:
-    def create_polar_plot(self, long, lat, depth, r_column, theta_column):
+    def create_polar_plot(self, long, lat, depth, r_column, theta_column,
+        node_data=None):
         '''
-        Method plots and returns a plotly graph object that contains a polar/radial
-        plot based on the input coordinates and the graph format pulled from a
-        formatting dictionary
+        Method plots and returns the plotly graph objects of a current rose for
+        the input coordinates. The r and theta samples are binned into direction
+        sectors and speed classes by the dashboard's rose_binner and each speed
+        class is returned as a Barpolar trace of sample frequencies, to be
+        stacked in a polar subplot. Frequency tables are cached per element and
+        file version.
 
         Parameters
         ----------
@@ -376,38 +1579,345 @@ class dashboard(dfsu_ingestion_engine):
         theta_column : str
             A string indicating the data category that will be extracted to form
             the theta values in the (r, theta) polar coordinate system via the data
-            extraction api. This value MUST be either radians or degrees.
+            extraction api. This value MUST be in the direction_units of the
+            rose_binner (degrees, e.g. 'Current direction (degrees)').
+
+        node_data : pandas dataframe or node_view : default = None
+            A node snapshot built via get_node_snapshot() or a node_view built via
+            extract_view() that contains the r_column and theta_column columns.
+            If None the data is extracted for the location point.
+
+        Returns
+        -------
+        barpolar_plots : list
+            A list of plotly Barpolar graph objects, one per speed class, that can
+            be inserted into a plotly figure.
+        '''
+
+        # Extracting data from the ingestion engine if no snapshot is given:
+        if node_data is None:
+            node_data = self.extract_view([r_column, theta_column],
+                self.resolve_element(long, lat, depth))
+
+        r = np.asarray(node_data[self.timeseries_format[r_column]['df_column']])
+        theta = np.asarray(node_data[self.timeseries_format[theta_column]['df_column']])
+
+        element_index = node_data.attrs.get('element_index')
+
+        # Binning the samples into a frequency table, re-using the cached table of
+        # the element if there is one:
+        if element_index == None:
+            rose_df = self.rose_binner.bin(r, theta)
+
+        else:
+            rose_df = self.rose_binner.get_table((element_index, r_column,
+                theta_column, self.file_version), r, theta)
+
+        # Picking a colour for each speed class from the Viridis colour scale:
+        viridis = plotly.colors.sequential.Viridis
+        colors = [viridis[int(i)] for i in
+            np.linspace(0, len(viridis) - 1, len(rose_df.columns))]
+
+        # Initalizing a barpolar plot for each speed class:
+        barpolar_plots = [
+            go.Barpolar(
+                r=rose_df[speed_class].values,
+                theta=rose_df.index.values,
+                width=360 / len(rose_df.index),
+                name=f"{speed_class} {self.timeseries_format[r_column]['units']}",
+                opacity=0.8,
+                marker=dict(color=color)
+                ) for speed_class, color in zip(rose_df.columns, colors)
+            ]
+
+        return barpolar_plots
+
+    # Method that plots a vertical section of a data category along a polyline:
+    def plot_transect(self, polyline, spacing, cat_name, time_step=0):
+        '''
+        Method plots the vertical section of a data category along a polyline at
+        a single timestep as a plotly heatmap of distance against depth. The
+        section is extracted via get_transect().
+
+        Parameters
+        ----------
+        polyline : list
+            A list of (long, lat) vertices of the transect.
+
+        spacing : float
+            The distance between transect samples in metres.
+
+        cat_name : str
+            The data category (key of self.timeseries_format) to plot.
+
+        time_step : int : default = 0
+            The index of the timestep to plot.
+
+        Returns
+        -------
+        fig : plotly figure
+            The heatmap figure of the transect.
+        '''
+        transect_dict = self.get_transect(polyline, spacing, [cat_name])
+
+        # Each heatmap row is a layer, placed at the mean z value of the layer:
+        layer_z = np.nanmean(transect_dict['z'], axis=0)
+
+        fig = go.Figure(go.Heatmap(
+            x=transect_dict['distance'],
+            y=layer_z,
+            z=transect_dict[cat_name][:, :, time_step].T,
+            colorscale='Viridis',
+            colorbar=dict(title=self.timeseries_format[cat_name]['units'])
+            ))
+
+        fig.update_layout(
+            title=f"{self.timeseries_format[cat_name]['title']} Transect "
+                f"({transect_dict['time'][time_step]})",
+            xaxis_title='Distance (m)',
+            yaxis_title='Z')
+
+        return fig
+
+
+# Key-Value store of the state inherited by forked batch export workers. The
+# dashboard is placed here before the worker pool is forked so that every worker
+# shares the loaded mesh and dataset without copying or re-reading it:
+batch_export_state = {'dashboard': None, 'output_dir': None, 'output_format': None,
+    'serializer': None}
+
+# Function run by the batch export workers to render and write a single point:
+def render_batch_point(job):
+    '''
+    Function that renders the node dashboard of a single point with the
+    dashboard inherited through batch_export_state and writes it to the output
+    directory. It is a module level function so that it can be sent to the
+    workers of a process pool.
+
+    Parameters
+    ----------
+    job : tuple
+        A tuple of (client name, dfsu path, (long, lat, depth)).
+
+    Returns
+    -------
+    timing_dict : dict
+        The client, dfsu path, point, output path, output size in bytes, the
+        render and write times in seconds and the error of the point. If the
+        point fails the error is its repr() and the output path is None,
+        otherwise the error is None.
+    '''
+    (client_name, dfsu_path, (long, lat, depth)) = job
+    dashboard_obj = batch_export_state['dashboard']
+    output_format = batch_export_state['output_format']
+
+    timing_dict = {'client_name': client_name, 'dfsu_path': dfsu_path, 'long': long,
+        'lat': lat, 'depth': depth, 'output_path': None, 'bytes': 0,
+        'render_s': np.nan, 'write_s': np.nan, 'error': None}
+
+    # A failing point is reported in its timing dict so the rest of the batch
+    # is still exported:
+    try:
+        start_time = time.perf_counter()
+        fig = dashboard_obj.plot_node_data(long, lat, depth)
+        timing_dict['render_s'] = time.perf_counter() - start_time
+
+        # Building a unique file name from the client, dfsu file and point:
+        file_name = f"{client_name}_{os.path.splitext(os.path.basename(dfsu_path))[0]}" \
+            f"_{long}_{lat}_{depth}.{output_format}"
+        output_path = os.path.join(batch_export_state['output_dir'], file_name)
+
+        start_time = time.perf_counter()
+
+        if output_format == 'html':
+            fig.write_html(output_path, include_plotlyjs='cdn')
+
+        else:
+            with open(output_path, 'w') as output_file:
+                output_file.write(batch_export_state['serializer'].to_json(fig))
+
+        timing_dict['write_s'] = time.perf_counter() - start_time
+        timing_dict['output_path'] = output_path
+        timing_dict['bytes'] = os.path.getsize(output_path)
+
+    except Exception as error:
+        timing_dict['error'] = repr(error)
+
+    return timing_dict
+
+
+# Class that renders static dashboard exports for many fixed points in parallel:
+class dashboard_batch_exporter(object):
+    """
+    This object exports the node dashboards of many fixed monitoring points as
+    static JSON or HTML files. For each dfsu file the dashboard (and so the mesh
+    and dataset) is loaded once in the parent process and a process pool is then
+    forked so that every worker shares the loaded data copy-on-write. Points are
+    rendered in parallel and each worker writes its figure as soon as it is
+    rendered, so exports appear incrementally.
+
+    Where fork is not available (e.g. Windows) the points are rendered one after
+    another in the parent process.
+
+    Parameters
+    ----------
+    output_dir : str
+        The directory the exported figures and the timing summary are written to.
+
+    gis_filepath : str : default = None
+        The gis_filepath used to initalize each dashboard.
+
+    processes : int : default = None
+        The number of worker processes. Defaults to the number of CPUs.
+
+    output_format : str : default = 'json'
+        The format of the exported figures, either 'json' or 'html'.
+
+    serializer : figure_serializer : default = None
+        The serializer of 'json' exports. By default the text (plotly.io)
+        serialization. Pass figure_serializer(binary=True) to export binary
+        encoded payloads.
+    """
+    def __init__(self, output_dir, gis_filepath=None, processes=None, output_format='json',
+        serializer=None):
+
+        # Declaring instance variables:
+        self.output_dir = output_dir
+        self.gis_filepath = gis_filepath
+        self.processes = processes if processes != None else os.cpu_count()
+        self.output_format = output_format
+        self.serializer = figure_serializer(binary=False) if serializer == None \
+            else serializer
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    # Method that exports the dashboards of every point of every job:
+    def export(self, jobs):
+        '''
+        Method renders and writes the node dashboard of every point. Jobs of the
+        same dfsu file are grouped so that each file is only loaded once.
+
+        Parameters
+        ----------
+        jobs : list
+            A list of (client name, dfsu path, points) tuples where points is a
+            list of (long, lat, depth) tuples.
 
         Returns
         -------
-        barpolar_plot : plotly.graph_objects
-            A plotly graphing object that can be inserted into a plotly figure.
+        summary_df : pandas dataframe
+            One row of timings per point. The load time of each dfsu file is in
+            the 'load_s' column and the error of each failed point (or of its
+            dfsu file) in the 'error' column. The summary is also written to
+            'export_summary.json' in the output directory, even if the export
+            is interrupted.
         '''
+        # Grouping the points of every job by dfsu file:
+        dfsu_jobs = {}
 
-        # Extracting data from the ingestion engine:
-        r = self.get_node_data(long, lat, depth, r_column)
-        theta = self.get_node_data(long, lat, depth, theta_column)
+        for (client_name, dfsu_path, points) in jobs:
+            dfsu_jobs.setdefault(dfsu_path, []).extend(
+                [(client_name, dfsu_path, tuple(point)) for point in points])
+
+        timing_lst = []
 
-        # Attempting to convert the theta to degree values of they are in radians:
         try:
-            theta = theta.apply(lambda x : math.degree(x))
-        except:
-            pass
+            for dfsu_path, point_jobs in dfsu_jobs.items():
+                self.export_file(dfsu_path, point_jobs, timing_lst)
 
+        finally:
+            summary_df = pd.DataFrame(timing_lst)
+            summary_df.to_json(os.path.join(self.output_dir, 'export_summary.json'),
+                orient='records', indent=2)
 
-        # Initalizing the barpolar plot based on formatting dict:
-        barpolar_plot = go.Barpolar(
-                r=r[self.timeseries_format[r_column]['df_column']],
-                theta=theta[self.timeseries_format[theta_column]['df_column']],
-                width=7.0,
-                opacity=0.8,
-                marker=dict(
-                    color=r[self.timeseries_format[r_column]['df_column']],
-                    colorscale="Viridis",
-                    colorbar=dict(
-                        title=self.timeseries_format[r_column]['units']
-                        )
-                    )
-                )
+        return summary_df
+
+    # Method that exports the points of a single dfsu file:
+    def export_file(self, dfsu_path, point_jobs, timing_lst):
+        '''
+        Method loads the dashboard of a dfsu file and renders and writes each of
+        its points, appending the timing dict of every point to timing_lst. If
+        the file can not be loaded every point of the file is reported with the
+        load error.
+
+        Parameters
+        ----------
+        dfsu_path : str
+            The filepath of the .dfsu file.
+
+        point_jobs : list
+            A list of (client name, dfsu path, (long, lat, depth)) tuples.
+
+        timing_lst : list
+            The list the timing dicts are appended to.
+        '''
+        # Loading the dashboard once in the parent, before the pool is forked:
+        start_time = time.perf_counter()
+
+        try:
+            batch_export_state['dashboard'] = dashboard(dfsu_path, self.gis_filepath)
+
+        except Exception as error:
+
+            print(f'[EXPORT FAILED]: {dfsu_path}: {error!r}')
+
+            for (client_name, dfsu_path, (long, lat, depth)) in point_jobs:
+                timing_lst.append({'client_name': client_name, 'dfsu_path': dfsu_path,
+                    'long': long, 'lat': lat, 'depth': depth, 'output_path': None,
+                    'bytes': 0, 'render_s': np.nan, 'write_s': np.nan,
+                    'error': repr(error), 'load_s': time.perf_counter() - start_time})
+
+            return
+
+        batch_export_state['output_dir'] = self.output_dir
+        batch_export_state['output_format'] = self.output_format
+        batch_export_state['serializer'] = self.serializer
+        load_time = time.perf_counter() - start_time
+
+        print(f'[LOADED FOR EXPORT]: {dfsu_path} in {load_time:.2f}s')
+
+        try:
+            for timing_dict in self.render_points(point_jobs):
+
+                timing_dict['load_s'] = load_time
+                timing_lst.append(timing_dict)
+
+                if timing_dict['error'] != None:
+                    print(f"[EXPORT FAILED]: {timing_dict['long']}, {timing_dict['lat']}, "
+                        f"{timing_dict['depth']} of {dfsu_path}: {timing_dict['error']}")
+                else:
+                    print(f"[EXPORTED]: {timing_dict['output_path']} in {timing_dict['render_s']:.2f}s")
+
+        finally:
+            batch_export_state['dashboard'] = None
+
+    # Method that renders the points of a single dfsu file:
+    def render_points(self, point_jobs):
+        '''
+        Generator that renders the points of a single dfsu file on a forked
+        process pool, yielding the timing dict of each point as it finishes.
+
+        Parameters
+        ----------
+        point_jobs : list
+            A list of (client name, dfsu path, (long, lat, depth)) tuples.
+
+        Yields
+        ------
+        timing_dict : dict
+            The timings of a rendered point. See render_batch_point().
+        '''
+        if self.processes <= 1 or len(point_jobs) == 1 or \
+            'fork' not in multiprocessing.get_all_start_methods():
+
+            for job in point_jobs:
+                yield render_batch_point(job)
+
+            return
+
+        fork_context = multiprocessing.get_context('fork')
+
+        with fork_context.Pool(min(self.processes, len(point_jobs))) as pool:
 
-        return barpolar_plot
+            for timing_dict in pool.imap_unordered(render_batch_point, point_jobs):
+                yield timing_dict
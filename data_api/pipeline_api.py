@@ -1,15 +1,439 @@
 # Importing all dfs apis:
 # API Imports for production:
 from data_api.dfs_file_query_api import file_query_api
-from data_api.dfs_ingestion_api import dfs0_ingestion_engine
+from data_api.dfs_prefetch_api import dfs_prefetch_reader
+from data_api.dfs_profiling_api import profiled_stage
+
+# NOTE: The dfs0 ingestion engine (mikeio), pandas and the rollup api (numpy) are
+# imported on first use via load_dfs0_ingestion_engine(), concat_forecast_data()
+# and update_rollup() so that scheduled pipeline invocations do not pay their
+# import cost before they are needed.
 
 # Importing path management packages:
 import os
 
 # Importing data management packages:
-import pandas as pd
 from datetime import datetime
 import sqlite3
+import pickle
+import hashlib
+import threading
+
+# Object that stores checkpoints of completed pipeline stages in a sqlite database:
+class pipeline_state_store(object):
+    """
+    This object is the local state store used by the dfs0_pipeline to checkpoint
+    the result of each completed stage and each successfully decoded dfs0 file.
+    It allows a pipeline run that has failed part of the way through a large
+    backfill to be resumed from the last good point instead of restarting.
+
+    Each dfs0 file is recorded against its client name and its file signature
+    (modification time and size). A file is only considered done if the signature
+    stored with the checkpoint matches the file currently on disk, which means
+    files that have changed since they were decoded are decoded again.
+
+    Files that fail to decode are not checkpointed. Instead their failure count
+    is incremented and once it reaches max_failures the file is quarantined and
+    skipped by all following runs until it is released.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the sqlite database file used to store the checkpoints. The
+        file is created if it does not exist.
+
+    max_failures : int : default = 3
+        The number of failed decode attempts after which a file is quarantined.
+    """
+    def __init__(self, db_path, max_failures=3):
+
+        # Declaring instance variables:
+        self.db_path = db_path
+        self.max_failures = max_failures
+
+        # sqlite connections cannot be shared between threads so one is opened
+        # per thread via the connection property:
+        self.thread_local = threading.local()
+        self.build_tables()
+
+    # Property that returns the sqlite connection of the calling thread:
+    @property
+    def connection(self):
+        '''
+        The sqlite connection to the state store database owned by the calling
+        thread. It is opened on first access from each thread.
+        '''
+        if not hasattr(self.thread_local, 'connection'):
+            self.thread_local.connection = sqlite3.connect(self.db_path, timeout=30)
+
+        return self.thread_local.connection
+
+    # Method that creates the checkpoint tables if they do not already exist:
+    def build_tables(self):
+        '''
+        Method creates the two tables used by the state store if they are not
+        already present in the database:
+
+        - file_checkpoints: The status, signature, failure count and decoded
+            dataframe of each dfs0 file processed by the pipeline.
+        - stage_checkpoints: The result of each completed pipeline stage for a
+            specific run key.
+        '''
+        with self.connection:
+
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS file_checkpoints (
+                    client_name TEXT, filepath TEXT, mtime REAL, size INTEGER,
+                    status TEXT, failures INTEGER, last_error TEXT, result BLOB,
+                    updated TEXT, PRIMARY KEY (client_name, filepath))"""
+                )
+
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS stage_checkpoints (
+                    client_name TEXT, run_key TEXT, stage TEXT, result BLOB,
+                    updated TEXT, PRIMARY KEY (client_name, run_key, stage))"""
+                )
+
+    # Method that builds the (mtime, size) signature used to detect changed files:
+    def get_file_signature(self, filepath):
+        '''
+        Method returns the signature of a file on disk that is used to determine
+        if a checkpointed file has changed since it was last decoded.
+
+        Parameters
+        ----------
+        filepath : str
+            The path of the file the signature is built for.
+
+        Returns
+        -------
+        signature : tuple
+            A tuple of (modification time, size in bytes) of the file.
+        '''
+        file_stat = os.stat(filepath)
+
+        return (file_stat.st_mtime, file_stat.st_size)
+
+    # Method that builds a single run key string from a list of file paths:
+    def build_run_key(self, filepaths):
+        '''
+        Method builds a run key that uniquely identifies a pipeline run by the
+        files it processes and the signature of each of those files. If any of
+        the files change, are added or are removed the run key changes.
+
+        Parameters
+        ----------
+        filepaths : list
+            The list of file paths processed by the pipeline run.
+
+        Returns
+        -------
+        run_key : str
+            A sha1 hex digest of the file paths and their signatures.
+        '''
+        run_hash = hashlib.sha1()
+
+        for filepath in filepaths:
+            run_hash.update(f"{filepath}|{self.get_file_signature(filepath)}".encode())
+
+        return run_hash.hexdigest()
+
+    # Method that returns the decoded dataframe of a file if it is checkpointed:
+    def get_file_result(self, client_name, filepath):
+        '''
+        Method queries the file_checkpoints table for a successfully decoded
+        file. The checkpointed dataframe is only returned if the signature of
+        the file on disk matches the stored signature.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the file was processed for.
+
+        filepath : str
+            The path of the dfs0 file.
+
+        Returns
+        -------
+        result : pandas dataframe or None
+            The checkpointed dataframe or None if the file has not been decoded
+            or has changed since it was decoded.
+        '''
+        row = self.connection.execute(
+            """SELECT mtime, size, result FROM file_checkpoints WHERE
+            client_name = ? AND filepath = ? AND status = 'done'""",
+            (client_name, filepath)).fetchone()
+
+        if row is None:
+            return None
+
+        # Only returning the checkpoint if the file has not changed:
+        if (row[0], row[1]) != self.get_file_signature(filepath):
+            return None
+
+        return pickle.loads(row[2])
+
+    # Method that determines if a file is checkpointed without loading its result:
+    def is_file_done(self, client_name, filepath):
+        '''
+        Method checks if an unchanged file has already been decoded and
+        checkpointed, without un-pickling the checkpointed dataframe.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the file was processed for.
+
+        filepath : str
+            The path of the dfs0 file.
+
+        Returns
+        -------
+        done : bool
+            True if get_file_result() would return the checkpointed dataframe.
+        '''
+        row = self.connection.execute(
+            """SELECT mtime, size FROM file_checkpoints WHERE client_name = ?
+            AND filepath = ? AND status = 'done'""",
+            (client_name, filepath)).fetchone()
+
+        if row is None:
+            return False
+
+        return (row[0], row[1]) == self.get_file_signature(filepath)
+
+    # Method that determines if a file has been quarantined:
+    def is_quarantined(self, client_name, filepath):
+        '''
+        Method checks if a file has been quarantined after repeatedly failing
+        to decode. A quarantined file that has changed on disk since its last
+        failure is no longer considered quarantined.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the file was processed for.
+
+        filepath : str
+            The path of the dfs0 file.
+
+        Returns
+        -------
+        quarantined : bool
+            True if the file is quarantined and should be skipped.
+        '''
+        row = self.connection.execute(
+            """SELECT mtime, size FROM file_checkpoints WHERE client_name = ?
+            AND filepath = ? AND status = 'quarantined'""",
+            (client_name, filepath)).fetchone()
+
+        if row is None:
+            return False
+
+        return (row[0], row[1]) == self.get_file_signature(filepath)
+
+    # Method that checkpoints a successfully decoded file:
+    def record_file_success(self, client_name, filepath, result):
+        '''
+        Method writes the decoded dataframe of a file to the file_checkpoints
+        table along with the current signature of the file.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the file was processed for.
+
+        filepath : str
+            The path of the dfs0 file.
+
+        result : pandas dataframe
+            The decoded dataframe that is being checkpointed.
+        '''
+        (mtime, size) = self.get_file_signature(filepath)
+
+        with self.connection:
+
+            self.connection.execute(
+                """INSERT OR REPLACE INTO file_checkpoints VALUES
+                (?, ?, ?, ?, 'done', 0, NULL, ?, ?)""",
+                (client_name, filepath, mtime, size, pickle.dumps(result),
+                datetime.now().isoformat()))
+
+    # Method that records a failed decode and quarantines repeatedly failing files:
+    def record_file_failure(self, client_name, filepath, error):
+        '''
+        Method increments the failure count of a file that could not be decoded.
+        Once the failure count reaches max_failures the status of the file is
+        set to 'quarantined'.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the file was processed for.
+
+        filepath : str
+            The path of the dfs0 file.
+
+        error : Exception
+            The exception raised while decoding the file.
+
+        Returns
+        -------
+        status : str
+            The new status of the file, either 'failed' or 'quarantined'.
+        '''
+        row = self.connection.execute(
+            """SELECT mtime, size, failures FROM file_checkpoints WHERE
+            client_name = ? AND filepath = ?""", (client_name, filepath)).fetchone()
+
+        # The signature is stored so that a replaced file leaves quarantine:
+        try:
+            (mtime, size) = self.get_file_signature(filepath)
+        except OSError:
+            (mtime, size) = (None, None)
+
+        # Failures of a previous version of the file are not counted:
+        if row is None or (row[0], row[1]) != (mtime, size):
+            failures = 1
+        else:
+            failures = row[2] + 1
+
+        status = 'quarantined' if failures >= self.max_failures else 'failed'
+
+        with self.connection:
+
+            self.connection.execute(
+                """INSERT OR REPLACE INTO file_checkpoints VALUES
+                (?, ?, ?, ?, ?, ?, ?, NULL, ?)""",
+                (client_name, filepath, mtime, size, status, failures,
+                repr(error), datetime.now().isoformat()))
+
+        return status
+
+    # Method that returns the checkpointed result of a pipeline stage:
+    def get_stage_result(self, client_name, run_key, stage):
+        '''
+        Method queries the stage_checkpoints table for the result of a completed
+        pipeline stage.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the stage was run for.
+
+        run_key : str
+            The run key built via build_run_key().
+
+        stage : str
+            The name of the pipeline stage.
+
+        Returns
+        -------
+        result : object or None
+            The checkpointed result or None if the stage has not completed.
+        '''
+        row = self.connection.execute(
+            """SELECT result FROM stage_checkpoints WHERE client_name = ? AND
+            run_key = ? AND stage = ?""", (client_name, run_key, stage)).fetchone()
+
+        if row is None:
+            return None
+
+        return pickle.loads(row[0])
+
+    # Method that checkpoints the result of a completed pipeline stage:
+    def record_stage_result(self, client_name, run_key, stage, result):
+        '''
+        Method writes the result of a completed pipeline stage to the
+        stage_checkpoints table.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the stage was run for.
+
+        run_key : str
+            The run key built via build_run_key().
+
+        stage : str
+            The name of the pipeline stage.
+
+        result : object
+            The picklable result of the stage.
+        '''
+        with self.connection:
+
+            self.connection.execute(
+                """INSERT OR REPLACE INTO stage_checkpoints VALUES (?, ?, ?, ?, ?)""",
+                (client_name, run_key, stage, pickle.dumps(result),
+                datetime.now().isoformat()))
+
+    # Method that returns the list of quarantined files for a client:
+    def get_quarantined_files(self, client_name):
+        '''
+        Method returns the paths and last errors of all quarantined files for
+        a client so they can be inspected.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the files were processed for.
+
+        Returns
+        -------
+        quarantine_dict : dict
+            A dictionary of {filepath: last error string}.
+        '''
+        rows = self.connection.execute(
+            """SELECT filepath, last_error FROM file_checkpoints WHERE
+            client_name = ? AND status = 'quarantined'""", (client_name,))
+
+        return dict(rows.fetchall())
+
+    # Method that releases quarantined files so they are retried on the next run:
+    def release_quarantine(self, client_name, filepath=None):
+        '''
+        Method removes the quarantine and failure records of either a single
+        file or all files of a client so that they are retried.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the files were processed for.
+
+        filepath : str : default = None
+            The path of the file to be released. If None all quarantined files
+            of the client are released.
+        '''
+        with self.connection:
+
+            if filepath == None:
+                self.connection.execute(
+                    """DELETE FROM file_checkpoints WHERE client_name = ? AND
+                    status != 'done'""", (client_name,))
+
+            else:
+                self.connection.execute(
+                    """DELETE FROM file_checkpoints WHERE client_name = ? AND
+                    filepath = ? AND status != 'done'""", (client_name, filepath))
+
+    # Method that removes all checkpoints for a client:
+    def clear(self, client_name):
+        '''
+        Method deletes every file and stage checkpoint of a client, forcing the
+        next run to start from nothing.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name of the checkpoints being deleted.
+        '''
+        with self.connection:
+
+            self.connection.execute(
+                "DELETE FROM file_checkpoints WHERE client_name = ?", (client_name,))
+            self.connection.execute(
+                "DELETE FROM stage_checkpoints WHERE client_name = ?", (client_name,))
 
 # Object that provides the methods for scheduling ETL processes for dfs0 files:
 class dfs0_pipeline(object):
@@ -38,29 +462,150 @@ class dfs0_pipeline(object):
         HD Model output files are stored / written to. This is the root_dir string
         that will be used to initalize the file_query_api method.
 
+    state_path : str : default = None
+        The path to the sqlite database used to checkpoint completed stages and
+        decoded files via the pipeline_state_store. If None no checkpoints are
+        written and every run starts from nothing.
+
+    max_failures : int : default = 3
+        The number of failed decode attempts after which a dfs0 file is
+        quarantined by the pipeline_state_store.
+
+    rollup_path : str : default = None
+        The path to the .npz store of the hourly, daily and weekly temporal_rollup
+        of the client's forecast data. If given, the rollups are updated with
+        every forecast built by build_seven_day_forecast_data().
+
     """
-    def __init__(self, client_name, root_dir):
+    def __init__(self, client_name, root_dir, state_path=None, max_failures=3,
+        rollup_path=None):
 
         # Declaring instance variables:
         self.client_name = client_name
         self.root_dir = root_dir
+        self.rollup_path = rollup_path
 
         # Initalizing the file query api object as an instance variable:
         self.file_query = file_query_api(self.root_dir)
 
+        # Initalizing the checkpoint state store if a state path is given:
+        if state_path != None:
+            self.state_store = pipeline_state_store(state_path, max_failures)
+
+        else:
+            self.state_store = None
+
+# <----------------------------Checkpointed Ingestion Methods------------------>
+
+    # Method that imports the dfs0 ingestion engine on first use:
+    def load_dfs0_ingestion_engine(self):
+        '''
+        Method imports and returns the dfs0_ingestion_engine class. The import of
+        the ingestion api (and with it mikeio) is deferred until the first file
+        is decoded.
+
+        Returns
+        -------
+        dfs0_ingestion_engine : class
+            The dfs0_ingestion_engine class of the dfs ingestion api.
+        '''
+        from data_api.dfs_ingestion_api import dfs0_ingestion_engine
+
+        return dfs0_ingestion_engine
+
+    # Method that determines if a dfs0 file has to be decoded on this run:
+    def needs_decode(self, filepath):
+        '''
+        Method determines if ingest_dfs0_file() will decode a file or if it will
+        be served from the state store or skipped as quarantined. It is used to
+        avoid prefetching files that will not be read.
+
+        Parameters
+        ----------
+        filepath : str
+            The path to the dfs0 file.
+
+        Returns
+        -------
+        needs_decode : bool
+            True if the file will be decoded.
+        '''
+        if self.state_store == None:
+            return True
+
+        return not (self.state_store.is_file_done(self.client_name, filepath) or
+            self.state_store.is_quarantined(self.client_name, filepath))
+
+    # Method that decodes a single dfs0 file, resuming from its checkpoint if possible:
+    def ingest_dfs0_file(self, filepath, local_path=None):
+        '''
+        Method initalizes a dfs0 file via the dfs0 ingestion engine and returns
+        its dataframe. If the pipeline has a state store the decoded dataframe
+        is checkpointed, files that are already checkpointed and unchanged are
+        read from the store instead of being decoded again and files that fail
+        to decode are recorded and eventually quarantined.
+
+        Parameters
+        ----------
+        filepath : str
+            The path to the dfs0 file being decoded.
+
+        local_path : str : default = None
+            The path of a local copy of the file, such as a scratch copy made by
+            the dfs_prefetch_reader, that is decoded instead of filepath. The
+            file is still checkpointed under filepath.
+
+        Returns
+        -------
+        dfs0_df : pandas dataframe or None
+            The dataframe of the dfs0 file. None if the file is quarantined or
+            failed to decode while a state store is in use.
+        '''
+        if local_path == None:
+            local_path = filepath
+
+        # Without a state store errors propagate as they always have:
+        if self.state_store == None:
+            return self.load_dfs0_ingestion_engine()(local_path).main_df
+
+        if self.state_store.is_quarantined(self.client_name, filepath):
+
+            print(f'[SKIPPING QUARANTINED FILE]: {filepath}')
+            return None
+
+        # Resuming from the checkpointed dataframe if the file is unchanged:
+        dfs0_df = self.state_store.get_file_result(self.client_name, filepath)
+
+        if dfs0_df is not None:
+            return dfs0_df
+
+        try:
+            dfs0_df = self.load_dfs0_ingestion_engine()(local_path).main_df
+
+        except Exception as error:
+
+            status = self.state_store.record_file_failure(self.client_name,
+                filepath, error)
+
+            print(f'\n![ERROR]: Could not decode {filepath} ({status}): {error}!')
+            return None
+
+        self.state_store.record_file_success(self.client_name, filepath, dfs0_df)
+
+        return dfs0_df
+
 # <----------------------------7-Day Forecast building methods----------------->
 
-    # Method that builds a dataframe containing 7-Day Forcasting data:
-    def build_seven_day_forecast_data(self, date=None):
+    # Method that builds the ordered list of dfs0 paths that make up the 7-Day Forecast:
+    def get_seven_day_forecast_paths(self, date=None):
         '''
         This method makes uses of the get_seven_day_forcast_files() method in the
-        file query api to build a pandas dataframe containing the TimeSeries data
-        for the seven day forecast.
+        file query api to build the ordered list of dfs0 file paths that make up
+        the seven day forecast.
 
-        The method iterates through the dictionary of dfs0 paths, generates a list
-        of those paths within seven days using the date string keys of the dict.
-        The method then initalizes all the dfs0 paths using the dfs0 ingestion
-        engine and concatinates all the dfs0 dataframes into a single dataframe.
+        The method iterates through the dictionary of dfs0 paths and generates a
+        list of those paths within seven days using the date string keys of the
+        dict, sorted from oldest to most recent.
 
         Parameters
         ----------
@@ -73,15 +618,8 @@ class dfs0_pipeline(object):
 
         Returns
         -------
-        forecast_df : pandas dataframe
-            The dataframe containing all the forecasting data. This is generated
-            as the result of dataframe list concatenation.
-
-        Raises
-        ------
-        ValueError : ValueError
-            The error that is raised at the end of the method when no dataframes
-            are found to be concatinated.
+        forecast_paths : list
+            The ordered list of dfs0 file paths to be concatenated.
         '''
         # Initalizing the file query api to get seven day forecasting dict:
         forecast_dict = self.file_query.get_seven_day_forcast_files(self.client_name)
@@ -157,25 +695,187 @@ class dfs0_pipeline(object):
 
         print('[LIST OF TIMESERIES TO BE CONCATINATED FOR FORECAST]:', forecast_date_lst)
 
-        # Creating a list of dfs0 dataframes from paths in forecast_dict:
-        forecast_df_lst = [
+        # forecast_dict[date_key] == path to dfs0 file (see file_query_api)
+        forecast_paths = [forecast_dict[date_key] for date_key in forecast_date_lst]
 
-            # forecaast[date_key] == path to dfs0 file (see file_query_api)
-            dfs0_ingestion_engine(forecast_dict[date_key]).main_df for date_key in
-            forecast_date_lst
-            ]
+        return forecast_paths
+
+    # Method that returns the checkpointed 7-Day Forecast for a list of dfs0 paths:
+    def get_checkpointed_forecast(self, forecast_paths):
+        '''
+        Method queries the state store for a completed seven day forecast built
+        from exactly the files in forecast_paths. The checkpoint is only used if
+        none of the files have changed since it was written.
+
+        Parameters
+        ----------
+        forecast_paths : list
+            The ordered list of dfs0 file paths that make up the forecast.
+
+        Returns
+        -------
+        forecast_df : pandas dataframe or None
+            The checkpointed forecast dataframe or None if there is no state store
+            or no checkpoint for the files.
+        '''
+        if self.state_store == None:
+            return None
+
+        run_key = self.state_store.build_run_key(forecast_paths)
+
+        forecast_df = self.state_store.get_stage_result(self.client_name,
+            run_key, 'seven_day_forecast')
+
+        if forecast_df is not None:
+            print('[RESUMING FROM CHECKPOINTED FORECAST]:', run_key)
+
+        return forecast_df
+
+    # Method that concatenates the decoded dfs0 dataframes of the 7-Day Forecast:
+    @profiled_stage('forecast_concat')
+    def concat_forecast_data(self, forecast_paths, forecast_df_lst):
+        '''
+        Method concatenates the list of decoded dfs0 dataframes into the seven
+        day forecast dataframe and checkpoints the result if every file in
+        forecast_paths was decoded.
+
+        Parameters
+        ----------
+        forecast_paths : list
+            The ordered list of dfs0 file paths that make up the forecast.
+
+        forecast_df_lst : list
+            The list of dataframes decoded from forecast_paths, in the same
+            order. Files that were quarantined or failed to decode are None.
+
+        Returns
+        -------
+        forecast_df : pandas dataframe
+            The dataframe containing all the forecasting data. None if no files
+            could be concatenated.
+        '''
+        # Importing pandas on first use:
+        import pandas as pd
+
+        # Dropping files that were quarantined or failed to decode:
+        forecast_df_lst = [df for df in forecast_df_lst if df is not None]
 
         # Error handeling:
         try:
             # Concatinating list of dataframes into main df:
             forecast_df = pd.concat(forecast_df_lst)
 
+            # Only checkpointing the stage if every file was decoded:
+            if self.state_store != None and len(forecast_df_lst) == len(forecast_paths):
+
+                self.state_store.record_stage_result(self.client_name,
+                    self.state_store.build_run_key(forecast_paths),
+                    'seven_day_forecast', forecast_df)
+
             return forecast_df
 
         except ValueError: # If the forecast_df_lst is empty:
 
             print('\n![NO FILES FOUND CONFORMING TO CONCATINATION SPECIFICATIONS]!')
 
+    # Method that builds a dataframe containing 7-Day Forcasting data:
+    @profiled_stage('seven_day_forecast')
+    def build_seven_day_forecast_data(self, date=None, lookahead=2):
+        '''
+        This method makes uses of the get_seven_day_forcast_files() method in the
+        file query api to build a pandas dataframe containing the TimeSeries data
+        for the seven day forecast.
+
+        The method iterates through the dictionary of dfs0 paths, generates a list
+        of those paths within seven days using the date string keys of the dict.
+        The method then initalizes all the dfs0 paths using the dfs0 ingestion
+        engine and concatinates all the dfs0 dataframes into a single dataframe.
+
+        Parameters
+        ----------
+        date : tuple
+            A tuple that by default is None. If the tuple is input, it must be in
+            the form (year, month, day) as integers. It is used to create the
+            'current_date' varable that is used as the starting point of the
+            seven day file search-concatenation algo. This parameter is mainly
+            used for back-testing and development.
+
+        lookahead : int : default = 2
+            The number of upcoming dfs0 files the dfs_prefetch_reader copies to
+            local scratch while the current file is decoded. If 0 the files are
+            read directly from the file directory.
+
+        Returns
+        -------
+        forecast_df : pandas dataframe
+            The dataframe containing all the forecasting data. This is generated
+            as the result of dataframe list concatenation.
+
+        Raises
+        ------
+        ValueError : ValueError
+            The error that is raised at the end of the method when no dataframes
+            are found to be concatinated.
+        '''
+        forecast_paths = self.get_seven_day_forecast_paths(date)
+
+        # Resuming from the checkpointed concatenation if no file has changed:
+        forecast_df = self.get_checkpointed_forecast(forecast_paths)
+
+        if forecast_df is not None:
+            self.update_rollup(forecast_df)
+            return forecast_df
+
+        # Creating a list of dfs0 dataframes from paths in forecast_paths:
+        if lookahead > 0:
+
+            # Reading upcoming files into local scratch while each file is decoded:
+            with dfs_prefetch_reader(forecast_paths, lookahead=lookahead,
+                prefetch_filter=self.needs_decode) as reader:
+
+                forecast_df_lst = [
+                    self.ingest_dfs0_file(path, local_path) for path, local_path
+                    in reader]
+
+        else:
+            forecast_df_lst = [
+                self.ingest_dfs0_file(path) for path in forecast_paths]
+
+        forecast_df = self.concat_forecast_data(forecast_paths, forecast_df_lst)
+
+        self.update_rollup(forecast_df)
+
+        return forecast_df
+
+    # Method that updates the temporal rollups with a forecast:
+    def update_rollup(self, forecast_df):
+        '''
+        Method updates the temporal_rollup stored at self.rollup_path with the
+        forecast dataframe. The forecast replaces the rollup buckets over the
+        hours it covers, so re-applying the same forecast leaves the rollups
+        unchanged. If no rollup_path is set the method does nothing.
+
+        Parameters
+        ----------
+        forecast_df : pandas dataframe
+            The time indexed forecast dataframe. None if no forecast was built.
+
+        Returns
+        -------
+        rollup : temporal_rollup
+            The updated rollup, or None if no rollup_path is set or there is no
+            forecast.
+        '''
+        if self.rollup_path == None or forecast_df is None:
+            return None
+
+        from data_api.dfs_rollup_api import temporal_rollup
+
+        rollup = temporal_rollup(self.rollup_path)
+        rollup.update_dataframe(forecast_df)
+
+        return rollup
+
 # <----------------------------File Format Converstion/Export Methods---------->
 
     # Method that exports a formatted pandas dataframe as a .csv file:
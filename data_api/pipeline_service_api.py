@@ -0,0 +1,514 @@
+# Importing the dfs0 pipeline api:
+from data_api.pipeline_api import dfs0_pipeline
+
+# Importing asynchronous execution packages:
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Importing data management packages:
+import os
+import json
+import itertools
+from datetime import datetime
+
+# Object that runs dfs0 pipelines for many clients concurrently on an asyncio loop:
+class dfs0_pipeline_service(object):
+    """
+    This object is the asynchronous service entry point for the dfs0_pipeline. It
+    allows the seven day forecast pipeline to be run for many clients at once
+    without blocking the caller's scheduler while directory walks and dfs0
+    decodes run.
+
+    All blocking work (os.walk based file queries and mikeio decodes) is
+    offloaded to a thread pool executor. The number of files being decoded at
+    once is bounded by a semaphore and finished forecasts are passed to a single
+    writer task through a bounded queue. When the writer falls behind the queue
+    fills up and runs wait before handing over their result, applying
+    backpressure to the rest of the service.
+
+    Runs can be triggered, paused, resumed and inspected either by calling the
+    object's coroutines directly or through a small local control endpoint that
+    accepts one JSON command per line (see serve()).
+
+    Parameters
+    ----------
+    root_dir : str
+        A path string that represents the path to the root file directory where the
+        HD Model output files are stored. It is used to initalize the dfs0_pipeline
+        of each client.
+
+    state_path : str : default = None
+        The path to the sqlite database used by each dfs0_pipeline to checkpoint
+        its runs. See pipeline_state_store.
+
+    max_workers : int : default = 4
+        The number of threads in the executor used for blocking file I/O and
+        dfs0 decodes.
+
+    max_concurrent_decodes : int : default = 4
+        The maximum number of dfs0 files being decoded at the same time across
+        all runs.
+
+    max_pending_writes : int : default = 8
+        The size of the writer queue. Runs wait once this many finished forecasts
+        are waiting to be written.
+
+    writer : callable : default = None
+        A blocking function of (pipeline, forecast_df, file_name) used to write
+        each finished forecast. By default the forecast is written via
+        dfs0_pipeline.write_csv().
+
+    rollup_dir : str : default = None
+        The directory the temporal_rollup of each client is stored in, as
+        '{client_name}_rollup.npz'. If given, the rollups are updated with every
+        forecast built by the service. See dfs0_pipeline.update_rollup().
+    """
+    def __init__(self, root_dir, state_path=None, max_workers=4,
+        max_concurrent_decodes=4, max_pending_writes=8, writer=None, rollup_dir=None):
+
+        # Declaring instance variables:
+        self.root_dir = root_dir
+        self.state_path = state_path
+        self.max_concurrent_decodes = max_concurrent_decodes
+        self.max_pending_writes = max_pending_writes
+        self.writer = writer
+        self.rollup_dir = rollup_dir
+
+        # Executor that all blocking I/O and decoding is offloaded to, created by
+        # start() so the service can be started again after stop():
+        self.max_workers = max_workers
+        self.executor = None
+
+        # Key-Value stores of {client_name: dfs0_pipeline} and {run_id: run status dict}:
+        self.pipelines = {}
+        self.runs = {}
+        self.run_ids = itertools.count(1)
+
+        # The asyncio primitives are created on the running loop in start():
+        self.decode_semaphore = None
+        self.write_queue = None
+        self.resume_event = None
+        self.writer_task = None
+
+        # The paused state, kept so pause() and resume() work before start():
+        self.paused = False
+
+    # Method that creates the asyncio primitives and starts the writer task:
+    async def start(self):
+        '''
+        Coroutine that initalizes the service on the running event loop. It
+        must be awaited before runs are triggered. It is called by serve().
+        '''
+        if self.writer_task != None:
+            return
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        self.decode_semaphore = asyncio.Semaphore(self.max_concurrent_decodes)
+        self.write_queue = asyncio.Queue(maxsize=self.max_pending_writes)
+
+        # The service starts un-paused unless pause() was called before start():
+        self.resume_event = asyncio.Event()
+
+        if not self.paused:
+            self.resume_event.set()
+
+        self.writer_task = asyncio.ensure_future(self.write_forecasts())
+
+    # Method that stops the writer task once all runs are finished and written:
+    async def stop(self):
+        '''
+        Coroutine that resumes the service if it is paused, waits for every run in
+        progress to finish and for its forecast to be written, and then stops
+        the writer task and shuts down the executor. The service is started
+        again by the next trigger().
+        '''
+        if self.writer_task == None:
+            return
+
+        # Paused runs would never finish, so the service is drained un-paused:
+        self.resume()
+
+        run_tasks = [run['task'] for run in self.runs.values() if not run['task'].done()]
+        await asyncio.gather(*run_tasks, return_exceptions=True)
+
+        await self.write_queue.join()
+
+        self.writer_task.cancel()
+        await asyncio.gather(self.writer_task, return_exceptions=True)
+        self.writer_task = None
+
+        # Shutting the executor down off the event loop so the loop keeps serving
+        # while the worker threads exit:
+        (executor, self.executor) = (self.executor, None)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, executor.shutdown)
+
+    # Method that returns the dfs0_pipeline of a client, creating it if necessary:
+    def get_pipeline(self, client_name):
+        '''
+        Method returns the dfs0_pipeline object used for a client. Pipelines are
+        created once per client and re-used for every run.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name of the pipeline.
+
+        Returns
+        -------
+        pipeline : dfs0_pipeline
+            The pipeline object of the client.
+        '''
+        if client_name not in self.pipelines:
+
+            rollup_path = None if self.rollup_dir == None else \
+                os.path.join(self.rollup_dir, f'{client_name}_rollup.npz')
+
+            self.pipelines[client_name] = dfs0_pipeline(client_name, self.root_dir,
+                state_path=self.state_path, rollup_path=rollup_path)
+
+        return self.pipelines[client_name]
+
+# <----------------------------Run Control Methods----------------------------->
+
+    # Method that schedules a seven day forecast run for a client:
+    async def trigger(self, client_name, date=None, file_name=None):
+        '''
+        Coroutine that schedules a seven day forecast run for a client on the
+        event loop and returns immediately.
+
+        Parameters
+        ----------
+        client_name : str
+            The client name the pipeline is run for.
+
+        date : tuple : default = None
+            The (year, month, day) start point of the forecast file search. See
+            dfs0_pipeline.build_seven_day_forecast_data().
+
+        file_name : str : default = None
+            The name of the file the forecast is written to. By default the file
+            is named '{client_name}_seven_day_forecast'.
+
+        Returns
+        -------
+        run_id : int
+            The id used to inspect the run via get_status().
+        '''
+        await self.start()
+
+        run_id = next(self.run_ids)
+
+        if file_name == None:
+            file_name = f'{client_name}_seven_day_forecast'
+
+        self.runs[run_id] = {
+            'client_name': client_name, 'status': 'queued', 'files_total': None,
+            'files_done': 0, 'files_failed': 0, 'started': None, 'finished': None,
+            'error': None}
+
+        self.runs[run_id]['task'] = asyncio.ensure_future(
+            self.run_forecast(run_id, client_name, date, file_name))
+
+        return run_id
+
+    # Method that pauses the service before the next file decode of every run:
+    def pause(self):
+        '''
+        Method pauses the service. Decodes that are in progress finish but no run
+        starts decoding another file until resume() is called. If the service
+        has not started yet it starts paused.
+        '''
+        self.paused = True
+
+        if self.resume_event != None:
+            self.resume_event.clear()
+
+    # Method that resumes a paused service:
+    def resume(self):
+        '''
+        Method resumes all runs paused via pause().
+        '''
+        self.paused = False
+
+        if self.resume_event != None:
+            self.resume_event.set()
+
+    # Method that returns the status of one or all runs:
+    def get_status(self, run_id=None):
+        '''
+        Method returns a JSON serializable summary of the service and the status
+        of its runs.
+
+        Parameters
+        ----------
+        run_id : int : default = None
+            The id of the run to be inspected. If None every run is returned.
+
+        Returns
+        -------
+        status_dict : dict
+            A dictionary containing the paused state, the number of forecasts
+            waiting to be written and {run_id: run status} for the requested runs.
+        '''
+        run_ids = list(self.runs) if run_id == None else [run_id]
+
+        runs = {
+            str(key): {field: value for field, value in self.runs[key].items()
+                if field != 'task'} for key in run_ids if key in self.runs}
+
+        return {
+            'paused': self.paused,
+            'pending_writes': 0 if self.write_queue == None else self.write_queue.qsize(),
+            'runs': runs}
+
+# <----------------------------Pipeline Execution Methods---------------------->
+
+    # Method that runs a blocking function on the executor:
+    async def run_blocking(self, function, *args):
+        '''
+        Coroutine that runs a blocking function on the service's thread pool
+        executor and returns its result.
+        '''
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    # Method that decodes a single dfs0 file with bounded concurrency:
+    async def ingest_file(self, run, pipeline, filepath):
+        '''
+        Coroutine that waits until the service is not paused and a decode slot is
+        free and then decodes a single dfs0 file via dfs0_pipeline.ingest_dfs0_file()
+        on the executor.
+
+        Parameters
+        ----------
+        run : dict
+            The status dict of the run the file belongs to.
+
+        pipeline : dfs0_pipeline
+            The pipeline of the client.
+
+        filepath : str
+            The path of the dfs0 file.
+
+        Returns
+        -------
+        dfs0_df : pandas dataframe or None
+            The decoded dataframe or None if the file was skipped or failed.
+        '''
+        await self.resume_event.wait()
+
+        async with self.decode_semaphore:
+            dfs0_df = await self.run_blocking(pipeline.ingest_dfs0_file, filepath)
+
+        if dfs0_df is None:
+            run['files_failed'] += 1
+        else:
+            run['files_done'] += 1
+
+        return dfs0_df
+
+    # Method that runs every stage of the seven day forecast for a single run:
+    async def run_forecast(self, run_id, client_name, date, file_name):
+        '''
+        Coroutine that runs the seven day forecast pipeline for a client. The file
+        query and every file decode run on the executor, the decodes of the run
+        are gathered concurrently and the concatenated forecast is handed to the
+        writer through the bounded write queue.
+
+        Parameters
+        ----------
+        run_id : int
+            The id of the run being executed.
+
+        client_name : str
+            The client name the pipeline is run for.
+
+        date : tuple
+            The (year, month, day) start point of the forecast file search.
+
+        file_name : str
+            The name of the file the forecast is written to.
+        '''
+        run = self.runs[run_id]
+        run['status'] = 'running'
+        run['started'] = datetime.now().isoformat()
+
+        pipeline = self.get_pipeline(client_name)
+
+        try:
+            await self.resume_event.wait()
+            forecast_paths = await self.run_blocking(
+                pipeline.get_seven_day_forecast_paths, date)
+
+            run['files_total'] = len(forecast_paths)
+
+            # Resuming from the checkpointed forecast if the files are unchanged:
+            forecast_df = await self.run_blocking(
+                pipeline.get_checkpointed_forecast, forecast_paths)
+
+            if forecast_df is None:
+
+                forecast_df_lst = await asyncio.gather(*[
+                    self.ingest_file(run, pipeline, path) for path in forecast_paths])
+
+                forecast_df = await self.run_blocking(pipeline.concat_forecast_data,
+                    forecast_paths, forecast_df_lst)
+
+            if forecast_df is None:
+                run['status'] = 'empty'
+                run['finished'] = datetime.now().isoformat()
+
+            else:
+                # Updating the temporal rollups with the new run:
+                await self.run_blocking(pipeline.update_rollup, forecast_df)
+
+                # Waiting here when the writer has fallen behind:
+                run['status'] = 'writing'
+                await self.write_queue.put((run_id, pipeline, forecast_df, file_name))
+
+        except Exception as error:
+
+            run['status'] = 'error'
+            run['error'] = repr(error)
+            run['finished'] = datetime.now().isoformat()
+
+    # Method that writes finished forecasts from the write queue:
+    async def write_forecasts(self):
+        '''
+        Coroutine that runs for the lifetime of the service and writes every
+        finished forecast placed on the write queue, one at a time, on the
+        executor.
+        '''
+        while True:
+
+            (run_id, pipeline, forecast_df, file_name) = await self.write_queue.get()
+            run = self.runs[run_id]
+
+            try:
+                if self.writer == None:
+                    await self.run_blocking(pipeline.write_csv, forecast_df, file_name)
+                else:
+                    await self.run_blocking(self.writer, pipeline, forecast_df, file_name)
+
+                run['status'] = 'done'
+
+            except Exception as error:
+
+                run['status'] = 'error'
+                run['error'] = repr(error)
+
+            finally:
+                run['finished'] = datetime.now().isoformat()
+                self.write_queue.task_done()
+
+# <----------------------------Local Control Endpoint-------------------------->
+
+    # Method that handles a single control command:
+    async def handle_command(self, command):
+        '''
+        Coroutine that executes a single control command and returns its JSON
+        serializable response. Commands are dicts with a 'command' key of:
+
+        - {'command': 'trigger', 'client_name': str, 'date': [y, m, d], 'file_name': str}
+        - {'command': 'pause'}
+        - {'command': 'resume'}
+        - {'command': 'status', 'run_id': int}
+
+        Parameters
+        ----------
+        command : dict
+            The decoded control command.
+
+        Returns
+        -------
+        response : dict
+            The response to the command. Unknown commands return an 'error' key.
+        '''
+        command_name = command.get('command')
+
+        if command_name == 'trigger':
+
+            date = command.get('date')
+            run_id = await self.trigger(command['client_name'],
+                date=tuple(date) if date != None else None,
+                file_name=command.get('file_name'))
+
+            return {'run_id': run_id}
+
+        if command_name == 'pause':
+            self.pause()
+            return self.get_status()
+
+        if command_name == 'resume':
+            self.resume()
+            return self.get_status()
+
+        if command_name == 'status':
+            return self.get_status(command.get('run_id'))
+
+        return {'error': f'Unknown command: {command_name}'}
+
+    # Method that serves control commands for a single client connection:
+    async def handle_connection(self, reader, writer):
+        '''
+        Coroutine that reads newline delimited JSON commands from a control
+        connection and writes one JSON response line per command.
+        '''
+        try:
+            while True:
+
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                try:
+                    response = await self.handle_command(json.loads(line))
+                except Exception as error:
+                    response = {'error': repr(error)}
+
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+
+        finally:
+            writer.close()
+
+    # Method that starts the local control endpoint and serves until cancelled:
+    async def serve(self, host='127.0.0.1', port=8765):
+        '''
+        Coroutine that starts the service and a local TCP control endpoint that
+        accepts newline delimited JSON commands (see handle_command()). It serves
+        until the coroutine is cancelled.
+
+        Parameters
+        ----------
+        host : str : default = '127.0.0.1'
+            The interface the control endpoint listens on. This should remain
+            a local interface as the endpoint has no authentication.
+
+        port : int : default = 8765
+            The port the control endpoint listens on.
+        '''
+        await self.start()
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+
+        print(f'[PIPELINE SERVICE LISTENING]: {host}:{port}')
+
+        try:
+            async with server:
+                await server.serve_forever()
+
+        finally:
+            await self.stop()
+
+    # Method that runs the service as a blocking entry point:
+    def run_forever(self, host='127.0.0.1', port=8765):
+        '''
+        Blocking entry point that runs serve() on a new event loop.
+        '''
+        asyncio.run(self.serve(host, port))
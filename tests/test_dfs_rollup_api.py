@@ -0,0 +1,35 @@
+# Importing data management packages:
+import numpy as np
+import pandas as pd
+# Importing the api being tested:
+from data_api.dfs_rollup_api import temporal_rollup
+
+# Function that builds an hourly forecast dataframe of a single series:
+def build_forecast(start, days):
+    index = pd.date_range(start, periods=24 * days, freq='h')
+    return pd.DataFrame({'Current speed': np.arange(len(index), dtype=float)}, index=index)
+
+# Test that applying an older run after a newer one keeps the newer run's hours:
+def test_backfill_keeps_later_buckets():
+    rollup = temporal_rollup()
+
+    rollup.update_dataframe(build_forecast('2020-01-08', 7))
+    rollup.update_dataframe(build_forecast('2020-01-01', 2))
+
+    daily_counts = rollup.get_rollup('daily')[('Current speed', 'count')]
+
+    assert (daily_counts['2020-01-01':'2020-01-02'] == 24).all()
+    assert (daily_counts['2020-01-08':'2020-01-14'] == 24).all()
+
+# Test that a newer run replaces the overlapping hours of an older run:
+def test_newer_run_replaces_overlap():
+    rollup = temporal_rollup()
+
+    rollup.update_dataframe(build_forecast('2020-01-01', 4))
+    rollup.update_dataframe(build_forecast('2020-01-03', 4) + 1000)
+
+    hourly = rollup.get_rollup('hourly')[('Current speed', 'mean')]
+
+    assert hourly['2020-01-02 23:00'] == 47
+    assert hourly['2020-01-03 00:00'] == 1000
+    assert rollup.get_rollup('daily')[('Current speed', 'count')].sum() == 24 * 6